@@ -7,8 +7,8 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from backend import __version__
 from backend.communication.communication import initiate_links, terminate_links
-from backend.database.database import setup_tables
-from backend.routers.common import router as common_router
+from backend.database.migrations import setup_tables
+from backend.routers.common import NEXT_STARTING_ID_HEADER, router as common_router
 from backend.routers.crazyflie import router as crazyflie_router
 from backend.tasks.tasks import initiate_tasks, terminate_tasks
 
@@ -32,7 +32,13 @@ app.include_router(common_router)
 app.include_router(crazyflie_router)
 
 app.add_middleware(
-    CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    # The WebUI reads the cursor of the logs from this header
+    expose_headers=[NEXT_STARTING_ID_HEADER],
 )
 
 
@@ -0,0 +1,42 @@
+from asyncio import Queue
+from enum import Enum
+from typing import TypeVar
+
+from backend.models.statistics import QueueStatistics
+
+T = TypeVar("T")
+
+
+class QueuePolicy(str, Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+
+class BoundedQueue(Queue[T]):
+    """asyncio.Queue that applies a policy instead of growing without limit when its consumer falls behind"""
+
+    def __init__(self, maxsize: int = 0, policy: QueuePolicy = QueuePolicy.BLOCK) -> None:
+        super().__init__(maxsize)
+        self.policy = policy
+        self.dropped = 0
+
+    async def put(self, item: T) -> None:
+        if self.policy == QueuePolicy.BLOCK:
+            await super().put(item)
+        else:
+            self.offer(item)
+
+    def offer(self, item: T) -> bool:
+        """Never wait for room in the queue. A blocking queue drops the new item, since the caller can't be blocked."""
+        if self.full():
+            self.dropped += 1
+            if self.policy != QueuePolicy.DROP_OLDEST:
+                return False
+            self.get_nowait()
+
+        self.put_nowait(item)
+        return True
+
+    def to_model(self) -> QueueStatistics:
+        return QueueStatistics(size=self.qsize(), maxsize=self.maxsize, policy=self.policy.value, dropped=self.dropped)
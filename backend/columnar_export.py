@@ -0,0 +1,31 @@
+import struct
+import sys
+from array import array
+from typing import Final
+
+COLUMNAR_MEDIA_TYPE: Final = "application/vnd.argos.metrics.columnar"
+COLUMNAR_MAGIC: Final = b"ARGM"
+COLUMNAR_VERSION: Final = 1
+COLUMNAR_COLUMNS: Final = ("x", "y", "z", "yaw", "front", "back", "up", "left", "right", "bottom")
+
+# Magic, version, column count and drone count, then for every drone its id and sample count followed by one block of
+# little-endian float32 per column, in the order of COLUMNAR_COLUMNS
+COLUMNAR_HEADER: Final = struct.Struct("<4sBBH")
+COLUMNAR_DRONE_HEADER: Final = struct.Struct("<II")
+
+
+def create_columns() -> list[array]:
+    return [array("f") for _ in COLUMNAR_COLUMNS]
+
+
+def encode_columnar_metrics(metrics: dict[int, list[array]]) -> bytes:
+    chunks = [COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(COLUMNAR_COLUMNS), len(metrics))]
+    for drone_id, columns in metrics.items():
+        chunks.append(COLUMNAR_DRONE_HEADER.pack(drone_id, len(columns[0])))
+        for column in columns:
+            if sys.byteorder == "big":  # pragma: no cover as the backend only runs on little-endian hosts
+                column = array("f", column)
+                column.byteswap()
+            chunks.append(column.tobytes())
+
+    return b"".join(chunks)
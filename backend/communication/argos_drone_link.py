@@ -4,15 +4,27 @@ import asyncio
 import struct
 from asyncio import CancelledError, StreamReader, StreamWriter, Task
 from dataclasses import dataclass
+from enum import Enum
 from typing import Optional
 
 from fastapi.logger import logger
 
 from backend.communication.command import Command
 from backend.communication.drone_link import DroneLink, InboundLogMessageCallable
+from backend.communication.log_message import (
+    ARGOS_BINARY_FRAME_HEADER,
+    ARGOS_BINARY_FRAME_MAGIC,
+    ARGOS_BINARY_SCHEMA_VERSION,
+)
 from backend.exceptions.communication import ArgosCommunicationException
 
 
+class ArgosWireFormat(str, Enum):
+    JSON = "json"
+    # The positions and the yaw are truncated to float32
+    BINARY = "binary"
+
+
 @dataclass
 class ArgosDroneLink(DroneLink):
     argos_endpoint: str
@@ -21,22 +33,32 @@ class ArgosDroneLink(DroneLink):
     writer: StreamWriter
     on_inbound_message: InboundLogMessageCallable
     incoming_message_task: Optional[Task] = None
+    wire_format: ArgosWireFormat = ArgosWireFormat.JSON
 
     @classmethod
     async def create(
-        cls, argos_endpoint: str, argos_port: int, on_inbound_message: InboundLogMessageCallable
+        cls,
+        argos_endpoint: str,
+        argos_port: int,
+        on_inbound_message: InboundLogMessageCallable,
+        wire_format: ArgosWireFormat = ArgosWireFormat.JSON,
     ) -> ArgosDroneLink:
         try:
             reader, writer = await asyncio.open_connection(argos_endpoint, argos_port)
         except OSError as e:
             raise ArgosCommunicationException(argos_port) from e
 
-        adapter = cls(argos_endpoint, argos_port, reader, writer, on_inbound_message)
+        adapter = cls(argos_endpoint, argos_port, reader, writer, on_inbound_message, wire_format=wire_format)
         await adapter.initiate()
         return adapter
 
     async def initiate(self) -> None:
-        self.incoming_message_task = asyncio.create_task(self.process_incoming_message())
+        if self.wire_format == ArgosWireFormat.BINARY:
+            # The drone keeps sending JSON lines until it processes this command, both formats are accepted until then
+            await self.send_command_with_payload(Command.SET_WIRE_FORMAT, bytes((ARGOS_BINARY_SCHEMA_VERSION,)))
+            self.incoming_message_task = asyncio.create_task(self.process_incoming_frames())
+        else:
+            self.incoming_message_task = asyncio.create_task(self.process_incoming_message())
 
     async def terminate(self) -> None:
         if self.incoming_message_task:
@@ -50,6 +72,20 @@ class ArgosDroneLink(DroneLink):
         except CancelledError:
             logger.exception("Process incoming message task was cancelled")
 
+    async def process_incoming_frames(self) -> None:
+        try:
+            while first_byte := await self.reader.read(1):
+                if first_byte[0] == ARGOS_BINARY_FRAME_MAGIC:
+                    header = first_byte + await self.reader.readexactly(ARGOS_BINARY_FRAME_HEADER.size - 1)
+                    _, _, length = ARGOS_BINARY_FRAME_HEADER.unpack(header)
+                    await self.on_inbound_message(data=header + await self.reader.readexactly(length))
+                else:
+                    await self.on_inbound_message(data=first_byte + await self.reader.readline())
+        except asyncio.IncompleteReadError:
+            logger.error(f"Connection to Argos drone on port {self.argos_port} was closed in the middle of a frame")
+        except CancelledError:
+            logger.exception("Process incoming frames task was cancelled")
+
     async def send_command(self, command: Command) -> None:
         self.writer.write(struct.pack("Ic", command.value, b"\n"))
         await self.writer.drain()
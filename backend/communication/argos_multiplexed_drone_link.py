@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import struct
+from asyncio import BaseTransport, Protocol, Task, Transport
+from collections import deque
+from dataclasses import dataclass
+from typing import Final, Optional, cast
+
+from fastapi.logger import logger
+
+from backend.communication.argos_drone_link import ArgosWireFormat
+from backend.communication.command import Command
+from backend.communication.drone_link import DroneLink, InboundLogMessageCallable
+from backend.communication.log_message import ARGOS_BINARY_SCHEMA_VERSION
+from backend.exceptions.communication import ArgosCommunicationException, ArgosMultiplexedCommunicationException
+
+# Every frame on the multiplexed connection is the drone tag, the body length and the body. The body is what the drone
+# would have sent on its own connection: a JSON document or a binary frame inbound, a command outbound.
+ARGOS_MULTIPLEXED_FRAME_HEADER: Final = struct.Struct("<HH")
+ARGOS_MULTIPLEXED_PAUSE_READING_THRESHOLD: Final = 10000
+
+
+class ArgosMultiplexedProtocol(Protocol):
+    """Demultiplex the frames of a single Argos connection to the links of every simulated drone"""
+
+    def __init__(self) -> None:
+        self.transport: Optional[Transport] = None
+        self.buffer = bytearray()
+        self.subscribers: dict[int, InboundLogMessageCallable] = {}
+        self.pending_frames: deque[tuple[int, bytes]] = deque()
+        self.dispatch_task: Optional[Task] = None
+        self.reading_paused = False
+
+    def connection_made(self, transport: BaseTransport) -> None:
+        self.transport = cast(Transport, transport)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        logger.error(f"Multiplexed connection to Argos was lost: {exc}")
+        self.transport = None
+
+    def data_received(self, data: bytes) -> None:
+        self.buffer += data
+        offset = 0
+        while len(self.buffer) - offset >= ARGOS_MULTIPLEXED_FRAME_HEADER.size:
+            drone_tag, length = ARGOS_MULTIPLEXED_FRAME_HEADER.unpack_from(self.buffer, offset)
+            body_start = offset + ARGOS_MULTIPLEXED_FRAME_HEADER.size
+            body_end = body_start + length
+            if len(self.buffer) < body_end:
+                break
+
+            self.pending_frames.append((drone_tag, bytes(self.buffer[body_start:body_end])))
+            offset = body_end
+        del self.buffer[:offset]
+
+        if self.pending_frames and (not self.dispatch_task or self.dispatch_task.done()):
+            self.dispatch_task = asyncio.create_task(self.dispatch_frames())
+
+        if len(self.pending_frames) > ARGOS_MULTIPLEXED_PAUSE_READING_THRESHOLD and self.transport:
+            self.transport.pause_reading()
+            self.reading_paused = True
+
+    async def dispatch_frames(self) -> None:
+        """A single task awaits the callbacks so the frames of a drone are processed in the order they were received. A
+        frame that fails is dropped, and the reading is resumed even when the task is cancelled."""
+        try:
+            while self.pending_frames:
+                drone_tag, body = self.pending_frames.popleft()
+                if not (on_inbound_message := self.subscribers.get(drone_tag)):
+                    logger.error(f"Received a frame for unknown Argos drone tag {drone_tag}")
+                    continue
+
+                try:
+                    await on_inbound_message(data=body)
+                except Exception as e:
+                    logger.error(f"Unable to process a frame of Argos drone tag {drone_tag}: {e}")
+        finally:
+            if self.reading_paused and self.transport:
+                self.transport.resume_reading()
+                self.reading_paused = False
+
+    def subscribe(self, drone_tag: int, on_inbound_message: InboundLogMessageCallable) -> None:
+        self.subscribers[drone_tag] = on_inbound_message
+
+    def unsubscribe(self, drone_tag: int) -> None:
+        self.subscribers.pop(drone_tag, None)
+        if not self.subscribers:
+            self.close()
+
+    def send(self, drone_tag: int, body: bytes) -> None:
+        if not self.transport:
+            raise ArgosMultiplexedCommunicationException(drone_tag)
+        self.transport.write(ARGOS_MULTIPLEXED_FRAME_HEADER.pack(drone_tag, len(body)) + body)
+
+    def close(self) -> None:
+        if self.dispatch_task:
+            self.dispatch_task.cancel()
+        if self.transport:
+            self.transport.close()
+
+
+async def open_argos_multiplexed_connection(argos_endpoint: str, argos_port: int) -> ArgosMultiplexedProtocol:
+    protocol = ArgosMultiplexedProtocol()
+    try:
+        await asyncio.get_running_loop().create_connection(lambda: protocol, argos_endpoint, argos_port)
+    except OSError as e:
+        raise ArgosCommunicationException(argos_port) from e
+
+    return protocol
+
+
+@dataclass
+class ArgosMultiplexedDroneLink(DroneLink):
+    protocol: ArgosMultiplexedProtocol
+    drone_tag: int
+    on_inbound_message: InboundLogMessageCallable
+    wire_format: ArgosWireFormat = ArgosWireFormat.JSON
+
+    @classmethod
+    async def create(
+        cls,
+        protocol: ArgosMultiplexedProtocol,
+        drone_tag: int,
+        on_inbound_message: InboundLogMessageCallable,
+        wire_format: ArgosWireFormat = ArgosWireFormat.JSON,
+    ) -> ArgosMultiplexedDroneLink:
+        link = cls(protocol, drone_tag, on_inbound_message, wire_format)
+        await link.initiate()
+        return link
+
+    async def initiate(self) -> None:
+        self.protocol.subscribe(self.drone_tag, self.on_inbound_message)
+        if self.wire_format == ArgosWireFormat.BINARY:
+            await self.send_command_with_payload(Command.SET_WIRE_FORMAT, bytes((ARGOS_BINARY_SCHEMA_VERSION,)))
+
+    async def terminate(self) -> None:
+        # The connection is closed once the last drone using it is terminated
+        self.protocol.unsubscribe(self.drone_tag)
+
+    async def send_command(self, command: Command) -> None:
+        self.protocol.send(self.drone_tag, struct.pack("Ic", command.value, b"\n"))
+
+    async def send_command_with_payload(self, command: Command, payload: bytes) -> None:
+        self.protocol.send(self.drone_tag, struct.pack(f"I{len(payload)}sc", command.value, payload, b"\n"))
@@ -9,3 +9,4 @@ class Command(IntEnum):
     IDENTIFY = 4
     ACTIVATE_P2P = 5
     SET_POSITION = 6
+    SET_WIRE_FORMAT = 7
@@ -1,17 +1,24 @@
 import asyncio
 import datetime
 import itertools
+from enum import Enum
 from functools import partial
 from itertools import count, islice
-from typing import Final
+from typing import Final, Optional
 
 from cflib import crtp
-from coveo_settings import IntSetting, StringSetting
+from coveo_settings import BoolSetting, IntSetting, StringSetting
 from fastapi.logger import logger
 
-from backend.communication.argos_drone_link import ArgosDroneLink
+from backend.communication.argos_drone_link import ArgosDroneLink, ArgosWireFormat
+from backend.communication.argos_multiplexed_drone_link import (
+    ArgosMultiplexedDroneLink,
+    ArgosMultiplexedProtocol,
+    open_argos_multiplexed_connection,
+)
 from backend.communication.command import Command
 from backend.communication.crazyflie_drone_link import CrazyflieDroneLink
+from backend.communication.drone_mailbox import DroneMailbox
 from backend.communication.log_message import (
     on_incoming_argos_log_message,
     on_incoming_crazyflie_debug_message,
@@ -19,20 +26,36 @@ from backend.communication.log_message import (
 )
 from backend.database.models import SavedLog
 from backend.database.statements import create_drone
-from backend.exceptions.communication import CrazyflieCommunicationException
+from backend.exceptions.communication import CommunicationException, CrazyflieCommunicationException
 from backend.models.drone import Drone
 from backend.registered_drone import RegisteredDrone
 from backend.registry import get_registry
 
+
+class ArgosLinkMode(str, Enum):
+    PER_PORT = "per_port"
+    MULTIPLEXED = "multiplexed"
+
+
 ARGOS_ENDPOINT: Final = StringSetting("argos.endpoint", fallback="localhost")
 ARGOS_DRONES_STARTING_PORT: Final = IntSetting("argos.starting_port", fallback=3995)
 ARGOS_NUMBER_OF_DRONES: Final = IntSetting("argos.number_of_drones", fallback=2)
+ARGOS_WIRE_FORMAT: Final = StringSetting("argos.wire_format", fallback=ArgosWireFormat.JSON.value)
+# In multiplexed mode, all the drones share a single connection on the starting port
+ARGOS_LINK_MODE: Final = StringSetting("argos.link_mode", fallback=ArgosLinkMode.PER_PORT.value)
+
+# Apply only the newest live state of every drone instead of every queued sample, the metrics still get every sample
+INBOUND_COALESCE_LIVE_STATE: Final = BoolSetting("inbound.coalesce_live_state", fallback=False)
 
 CRAZYFLIE_ADDRESSES: Final = [0xE7E7E7EE01, 0xE7E7E7EE02]
 
 next_available_id: int = 0
 
 
+def create_mailbox() -> Optional[DroneMailbox]:
+    return DroneMailbox() if bool(INBOUND_COALESCE_LIVE_STATE) else None
+
+
 def get_next_available_drone_id() -> int:
     global next_available_id
     drone_id = next_available_id
@@ -58,17 +81,50 @@ async def send_command_to_all_drones(
 
 async def initiate_argos_drone_link(drone_port: int) -> None:
     drone_id = get_next_available_drone_id()
+    mailbox = create_mailbox()
     drone_link = await ArgosDroneLink.create(
         str(ARGOS_ENDPOINT),
         drone_port,
-        partial(on_incoming_argos_log_message, drone_id=drone_id, inbound_queue=get_registry().inbound_log_queue),
+        partial(
+            on_incoming_argos_log_message,
+            drone_id=drone_id,
+            inbound_queue=get_registry().get_inbound_log_queue(drone_id),
+            mailbox=mailbox,
+        ),
+        ArgosWireFormat(str(ARGOS_WIRE_FORMAT)),
+    )
+
+    drone = RegisteredDrone(drone_id, drone_link, mailbox=mailbox)
+    await create_drone(drone)
+    get_registry().register_drone(drone)
+
+
+async def initiate_argos_multiplexed_drone_link(protocol: ArgosMultiplexedProtocol, drone_tag: int) -> None:
+    drone_id = get_next_available_drone_id()
+    mailbox = create_mailbox()
+    drone_link = await ArgosMultiplexedDroneLink.create(
+        protocol,
+        drone_tag,
+        partial(
+            on_incoming_argos_log_message,
+            drone_id=drone_id,
+            inbound_queue=get_registry().get_inbound_log_queue(drone_id),
+            mailbox=mailbox,
+        ),
+        ArgosWireFormat(str(ARGOS_WIRE_FORMAT)),
     )
 
-    drone = RegisteredDrone(drone_id, drone_link)
+    drone = RegisteredDrone(drone_id, drone_link, mailbox=mailbox)
     await create_drone(drone)
     get_registry().register_drone(drone)
 
 
+async def initiate_argos_multiplexed_drone_links() -> None:
+    protocol = await open_argos_multiplexed_connection(str(ARGOS_ENDPOINT), int(ARGOS_DRONES_STARTING_PORT))
+    for drone_tag in range(int(ARGOS_NUMBER_OF_DRONES)):
+        await initiate_argos_multiplexed_drone_link(protocol, drone_tag)
+
+
 async def initiate_crazyflie_drone_link(crazyflie_address: int) -> None:
     # scan_interfaces returns a list of lists (ಠ_ಠ) so this flatten the result
     scanned_uris: list[str] = list(filter(None, itertools.chain(*crtp.scan_interfaces(crazyflie_address))))
@@ -77,9 +133,15 @@ async def initiate_crazyflie_drone_link(crazyflie_address: int) -> None:
 
     drone_uri: str = next(iter(scanned_uris))
     drone_id = get_next_available_drone_id()
+    mailbox = create_mailbox()
     drone_link = await CrazyflieDroneLink.create(
         drone_uri,
-        partial(on_incoming_crazyflie_log_message, drone_id=drone_id, inbound_queue=get_registry().inbound_log_queue),
+        partial(
+            on_incoming_crazyflie_log_message,
+            drone_id=drone_id,
+            inbound_queue=get_registry().get_inbound_log_queue(drone_id),
+            mailbox=mailbox,
+        ),
         partial(
             on_incoming_crazyflie_debug_message,
             drone_id=drone_id,
@@ -87,7 +149,7 @@ async def initiate_crazyflie_drone_link(crazyflie_address: int) -> None:
         ),
     )
 
-    drone = RegisteredDrone(drone_id, drone_link)
+    drone = RegisteredDrone(drone_id, drone_link, mailbox=mailbox)
     await create_drone(drone)
     get_registry().register_drone(drone)
 
@@ -102,6 +164,13 @@ async def initiate_links() -> None:
         except CrazyflieCommunicationException as e:
             logger.error(e)
 
+    if ArgosLinkMode(str(ARGOS_LINK_MODE)) == ArgosLinkMode.MULTIPLEXED:
+        try:
+            await initiate_argos_multiplexed_drone_links()
+        except CommunicationException as e:
+            logger.error(e)
+        return
+
     argos_drones_initiation = (
         initiate_argos_drone_link(drone_port)
         for drone_port in islice(count(int(ARGOS_DRONES_STARTING_PORT)), int(ARGOS_NUMBER_OF_DRONES))
@@ -4,11 +4,11 @@ import asyncio
 import shutil
 import struct
 import tempfile
-from asyncio import AbstractEventLoop, Event
-from dataclasses import dataclass
+from asyncio import AbstractEventLoop, Event, Task
+from dataclasses import dataclass, field
 from functools import partial
 from pathlib import Path
-from typing import Any, Final
+from typing import Any, Final, Optional
 
 from cflib.crazyflie import Crazyflie
 from cflib.crazyflie.log import LogConfig
@@ -17,6 +17,7 @@ from fastapi.logger import logger
 from backend.communication.command import Command
 from backend.communication.drone_link import DroneLink, InboundLogMessageCallable
 from backend.communication.log_message import generate_log_configs
+from backend.communication.thread_handoff import ThreadHandoff
 from backend.exceptions.communication import CrazyflieCommunicationException
 
 CRAZYFLIE_CONNECTION_TIMEOUT: Final = 15
@@ -31,6 +32,10 @@ class CrazyflieDroneLink(DroneLink):
     on_inbound_log_message: InboundLogMessageCallable
     on_debug_log_message: InboundLogMessageCallable
     rw_cache: Path
+    # The cflib threads hand the packets over to the event loop in batches, the forwarding tasks then call the callables
+    log_handoff: Optional[ThreadHandoff[tuple[int, dict[str, Any], LogConfig]]] = None
+    debug_handoff: Optional[ThreadHandoff[str]] = None
+    forwarding_tasks: list[Task] = field(default_factory=list)
 
     @classmethod
     async def create(
@@ -55,16 +60,18 @@ class CrazyflieDroneLink(DroneLink):
 
     async def initiate(self) -> None:
         # We need to call get_running_loop() here and not within the callback as there is no running loop in the thread
-        # processing incoming Crazyflie messages. By using run_coroutine_threadsafe, it also schedule the callback in
-        # the main event loop which also allow manipulating non threadsafe asyncio objects
+        # processing incoming Crazyflie messages. The packets are handed over to the main event loop, which also allow
+        # manipulating non threadsafe asyncio objects
         loop = asyncio.get_running_loop()
+        self.log_handoff = ThreadHandoff(loop)
+        self.debug_handoff = ThreadHandoff(loop)
         self.crazyflie.connected.add_callback(partial(self._on_connected, loop=loop))
         self.crazyflie.disconnected.add_callback(partial(self._on_disconnected, loop=loop))
         self.crazyflie.connection_failed.add_callback(partial(self._on_connection_failed, loop=loop))
         self.crazyflie.connection_lost.add_callback(partial(self._on_connection_lost, loop=loop))
-        self.crazyflie.console.receivedChar.add_callback(partial(self._on_received_char, loop=loop))
+        self.crazyflie.console.receivedChar.add_callback(self._on_received_char)
         for log_config in self.log_configs:
-            log_config.data_received_cb.add_callback(partial(self._on_incoming_log_message, loop=loop))
+            log_config.data_received_cb.add_callback(self._on_incoming_log_message)
         await asyncio.to_thread(self.crazyflie.open_link, self.uri)
 
         try:
@@ -76,7 +83,17 @@ class CrazyflieDroneLink(DroneLink):
             self.crazyflie.log.add_config(log_config)
             await asyncio.to_thread(log_config.start)
 
+        # The tasks are only started once the link is up, a failed connection would otherwise leave them waiting
+        # forever as nothing terminates it. The messages pushed until then wait in the handoffs.
+        self.forwarding_tasks = [
+            asyncio.create_task(self.forward_log_messages(self.log_handoff)),
+            asyncio.create_task(self.forward_debug_messages(self.debug_handoff)),
+        ]
+
     async def terminate(self) -> None:
+        for task in self.forwarding_tasks:
+            task.cancel()
+        self.forwarding_tasks = []
         for log_config in self.log_configs:
             await asyncio.to_thread(log_config.stop)
         await asyncio.to_thread(self.crazyflie.close_link)
@@ -86,9 +103,10 @@ class CrazyflieDroneLink(DroneLink):
         logger.error(f"Crazyflie {link_uri} is connected")
         loop.call_soon_threadsafe(self.connection_established.set)
 
-    def _on_received_char(self, text: str, loop: AbstractEventLoop) -> None:
+    def _on_received_char(self, text: str) -> None:
         logger.warning(f"Log from Crazyflie {self.uri}: {text}")
-        asyncio.run_coroutine_threadsafe(self.on_debug_log_message(message=text), loop)
+        assert self.debug_handoff
+        self.debug_handoff.push(text)
 
     def _on_connection_failed(self, link_uri: str, msg: Any, loop: AbstractEventLoop) -> None:
         logger.error(f"Connection to {link_uri} failed: {msg}")
@@ -102,12 +120,25 @@ class CrazyflieDroneLink(DroneLink):
         logger.error(f"Crazyflie {link_uri} is disconnected")
         loop.call_soon_threadsafe(self.connection_established.clear)
 
-    def _on_incoming_log_message(
-        self, timestamp: int, data: dict[str, Any], log_config: LogConfig, loop: AbstractEventLoop
-    ) -> None:
-        asyncio.run_coroutine_threadsafe(
-            self.on_inbound_log_message(timestamp=timestamp, data=data, log_config=log_config), loop
-        )
+    def _on_incoming_log_message(self, timestamp: int, data: dict[str, Any], log_config: LogConfig) -> None:
+        assert self.log_handoff
+        self.log_handoff.push((timestamp, data, log_config))
+
+    async def forward_log_messages(self, handoff: ThreadHandoff[tuple[int, dict[str, Any], LogConfig]]) -> None:
+        while True:
+            for timestamp, data, log_config in await handoff.take_batch():
+                try:
+                    await self.on_inbound_log_message(timestamp=timestamp, data=data, log_config=log_config)
+                except Exception as e:
+                    logger.error(f"Unable to process a log message of Crazyflie {self.uri}: {e}")
+
+    async def forward_debug_messages(self, handoff: ThreadHandoff[str]) -> None:
+        while True:
+            for text in await handoff.take_batch():
+                try:
+                    await self.on_debug_log_message(message=text)
+                except Exception as e:
+                    logger.error(f"Unable to process a debug message of Crazyflie {self.uri}: {e}")
 
     async def send_command(self, command: Command) -> None:
         await asyncio.wait_for(self.connection_established.wait(), timeout=CRAZYFLIE_CONNECTION_TIMEOUT)
@@ -0,0 +1,35 @@
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+from backend.communication.log_message import BatteryAndPositionLogMessage, LogMessage, RangeLogMessage
+
+
+@dataclass
+class DroneMailbox:
+    """Keep only the newest live state of a drone, posted by its link as soon as a message is received. Samples that are
+    overwritten before being applied still count in the distance travelled."""
+
+    position_message: Optional[BatteryAndPositionLogMessage] = None
+    range_message: Optional[RangeLogMessage] = None
+    last_position: tuple[float, float, float] = (0.0, 0.0, 0.0)
+    pending_distance: float = 0.0
+
+    @property
+    def has_pending(self) -> bool:
+        return self.position_message is not None or self.range_message is not None
+
+    def post(self, log_message: LogMessage) -> None:
+        if isinstance(log_message, BatteryAndPositionLogMessage):
+            position = (log_message.kalman_state_x, log_message.kalman_state_y, log_message.kalman_state_z)
+            self.pending_distance += math.dist(self.last_position, position)
+            self.last_position = position
+            self.position_message = log_message
+
+        if isinstance(log_message, RangeLogMessage):
+            self.range_message = log_message
+
+    def take(self) -> tuple[Optional[BatteryAndPositionLogMessage], Optional[RangeLogMessage], float]:
+        taken = (self.position_message, self.range_message, self.pending_distance)
+        self.position_message, self.range_message, self.pending_distance = None, None, 0.0
+        return taken
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+import dataclasses
 import datetime
 import json
-from asyncio import Queue
+import struct
 from dataclasses import dataclass
-from typing import Any, Final, Generator, Type
+from typing import TYPE_CHECKING, Any, Callable, Final, Generator, Generic, Mapping, Optional, Type, TypeVar
 
 from cflib.crazyflie.log import LogConfig
-from coveo_functools import flex
 from fastapi.logger import logger
 
+from backend.bounded_queue import BoundedQueue
 from backend.models.drone import DroneState
 
+if TYPE_CHECKING:  # pragma: no cover
+    from backend.communication.drone_mailbox import DroneMailbox
+
+try:
+    import orjson
+
+    json_loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # pragma: no cover as orjson is an optional speedup
+    json_loads = json.loads
+
 STATES: Final = {
     0: DroneState.NOT_READY,
     1: DroneState.READY,
@@ -124,6 +135,96 @@ CRAZYFLIE_LOG_CONFIGS: Final = [
 ]
 
 
+T = TypeVar("T", bound=LogMessage)
+
+
+def normalize_field_name(name: str) -> str:
+    """Same matching rules that flex used: case insensitive and ignoring everything that isn't alphanumeric"""
+    return "".join(character for character in name.lower() if character.isalnum())
+
+
+class LogMessageDecoder(Generic[T]):
+    """Constructor specialized for a LogMessage dataclass. The dataclass fields are introspected once, and each incoming
+    key is only normalized the first time it is seen, which keeps the reflection out of the ingestion hot path."""
+
+    def __init__(self, message_type: Type[T]) -> None:
+        self.message_type = message_type
+        self.fields_by_normalized_name = {
+            normalize_field_name(field.name): field.name for field in dataclasses.fields(message_type)
+        }
+        self.fields_by_key: dict[str, Optional[str]] = {}
+
+    def get_field_name(self, key: str) -> Optional[str]:
+        try:
+            return self.fields_by_key[key]
+        except KeyError:
+            field_name = self.fields_by_key[key] = self.fields_by_normalized_name.get(normalize_field_name(key))
+            return field_name
+
+    def decode(self, data: Mapping[str, Any], **overrides: Any) -> T:
+        """Unknown keys are ignored and missing fields raise a TypeError, like flex.deserialize did"""
+        arguments = {}
+        for key, value in data.items():
+            if field_name := self.get_field_name(key):
+                arguments[field_name] = value
+        arguments.update(overrides)
+        return self.message_type(**arguments)
+
+
+LOG_MESSAGE_DECODERS: Final[dict[Type[LogMessage], LogMessageDecoder[LogMessage]]] = {
+    message_type: LogMessageDecoder(message_type)
+    for message_type in (BatteryAndPositionLogMessage, RangeLogMessage, FullLogMessage)
+}
+CRAZYFLIE_LOG_MESSAGE_DECODERS: Final = {
+    configuration.name: LOG_MESSAGE_DECODERS[configuration.dataclass] for configuration in CRAZYFLIE_LOG_CONFIGS
+}
+
+
+# Argos drones can send their telemetry as fixed layout binary frames instead of JSON lines. A frame is the magic byte,
+# the schema version of the payload, the payload length and the payload. The payload fields are in the same order as
+# the FullLogMessage fields (without drone_id) so it can be passed as is to the constructor. The positions and the yaw
+# are packed as float32, so binary mode is lossy: they are truncated to about 7 significant digits.
+ARGOS_BINARY_FRAME_MAGIC: Final = 0xB1
+ARGOS_BINARY_FRAME_HEADER: Final = struct.Struct("<BBH")
+ARGOS_BINARY_SCHEMA_VERSION: Final = 1
+ARGOS_BINARY_PAYLOADS: Final = {1: struct.Struct("<I6H4f2B")}
+ARGOS_BINARY_FIELDS: Final = (
+    "timestamp",
+    "range_front",
+    "range_back",
+    "range_up",
+    "range_left",
+    "range_right",
+    "range_zrange",
+    "kalman_state_x",
+    "kalman_state_y",
+    "kalman_state_z",
+    "state_estimate_yaw",
+    "drone_state",
+    "drone_battery_level",
+)
+
+
+def encode_argos_binary_frame(log_message: FullLogMessage) -> bytes:
+    payload = ARGOS_BINARY_PAYLOADS[ARGOS_BINARY_SCHEMA_VERSION].pack(
+        *(getattr(log_message, field_name) for field_name in ARGOS_BINARY_FIELDS)
+    )
+    return ARGOS_BINARY_FRAME_HEADER.pack(ARGOS_BINARY_FRAME_MAGIC, ARGOS_BINARY_SCHEMA_VERSION, len(payload)) + payload
+
+
+def decode_argos_binary_frame(data: bytes, drone_id: int) -> Optional[FullLogMessage]:
+    _, schema_version, length = ARGOS_BINARY_FRAME_HEADER.unpack_from(data)
+    if not (payload_struct := ARGOS_BINARY_PAYLOADS.get(schema_version)):
+        logger.error(f"Argos binary frame schema version {schema_version} is unknown")
+        return None
+
+    if length != payload_struct.size:
+        logger.error(f"Argos binary frame of {length} bytes doesn't match schema version {schema_version}")
+        return None
+
+    return FullLogMessage(drone_id, *payload_struct.unpack_from(data, ARGOS_BINARY_FRAME_HEADER.size))
+
+
 def generate_log_configs() -> Generator[LogConfig, None, None]:
     for configuration in CRAZYFLIE_LOG_CONFIGS:
         log_config = LogConfig(configuration.name, configuration.period_ms)
@@ -133,27 +234,42 @@ def generate_log_configs() -> Generator[LogConfig, None, None]:
 
 
 async def on_incoming_crazyflie_log_message(
-    drone_id: int, inbound_queue: Queue[LogMessage], timestamp: int, data: dict[str, Any], log_config: LogConfig
+    drone_id: int,
+    inbound_queue: BoundedQueue[LogMessage],
+    timestamp: int,
+    data: dict[str, Any],
+    log_config: LogConfig,
+    mailbox: Optional[DroneMailbox] = None,
 ) -> None:
-    log_message_type = next(
-        (config.dataclass for config in CRAZYFLIE_LOG_CONFIGS if log_config.name == config.name), None
-    )
-
-    if log_message_type:
-        incoming_data = data | {"drone_id": drone_id, "timestamp": timestamp}
-        await inbound_queue.put(flex.deserialize(value=incoming_data, hint=log_message_type))
+    # Crazyflie messages are never waited on, a full queue must not hold back the cflib callbacks
+    if decoder := CRAZYFLIE_LOG_MESSAGE_DECODERS.get(log_config.name):
+        log_message = decoder.decode(data, drone_id=drone_id, timestamp=timestamp)
+        if mailbox:
+            mailbox.post(log_message)
+        inbound_queue.offer(log_message)
     else:
         logger.error(f"LogConfig with name {log_config.name} is unknown")
 
 
 async def on_incoming_crazyflie_debug_message(
-    message: str, drone_id: int, crazyflie_debug_queue: Queue[CrazyflieDebugMessage]
+    message: str, drone_id: int, crazyflie_debug_queue: BoundedQueue[CrazyflieDebugMessage]
 ) -> None:
-    await crazyflie_debug_queue.put(
+    crazyflie_debug_queue.offer(
         CrazyflieDebugMessage(drone_id=drone_id, timestamp=datetime.datetime.utcnow(), message=message)
     )
 
 
-async def on_incoming_argos_log_message(drone_id: int, inbound_queue: Queue[LogMessage], data: bytes) -> None:
-    incoming_data = json.loads(data) | {"drone_id": drone_id}
-    await inbound_queue.put(flex.deserialize(value=incoming_data, hint=FullLogMessage))
+async def on_incoming_argos_log_message(
+    drone_id: int, inbound_queue: BoundedQueue[LogMessage], data: bytes, mailbox: Optional[DroneMailbox] = None
+) -> None:
+    log_message: Optional[LogMessage] = (
+        decode_argos_binary_frame(data, drone_id)
+        if data[0] == ARGOS_BINARY_FRAME_MAGIC
+        else LOG_MESSAGE_DECODERS[FullLogMessage].decode(json_loads(data), drone_id=drone_id)
+    )
+    if not log_message:
+        return
+
+    if mailbox:
+        mailbox.post(log_message)
+    await inbound_queue.put(log_message)
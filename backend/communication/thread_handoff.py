@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+from typing import Generic, Optional, TypeVar
+
+from backend.statistics import HandoffStatistics
+
+T = TypeVar("T")
+
+
+class ThreadHandoff(Generic[T]):
+    """Hand items pushed by foreign threads over to the event loop in batches. Only the first item pushed after a batch
+    is taken wakes the loop up, the items pushed until the loop runs join the same batch."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.lock = threading.Lock()
+        # Every item with the time it was pushed at
+        self.items: list[tuple[float, T]] = []
+        self.wakeup_scheduled = False
+        self.waiter: Optional[asyncio.Future[None]] = None
+        self.statistics = HandoffStatistics()
+
+    def push(self, item: T) -> None:
+        """Called from any thread"""
+        with self.lock:
+            self.items.append((time.perf_counter(), item))
+            if self.wakeup_scheduled:
+                return
+            self.wakeup_scheduled = True
+        self.loop.call_soon_threadsafe(self._wake_up)
+
+    def _wake_up(self) -> None:
+        if self.waiter and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def take_batch(self) -> list[T]:
+        """Wait for items and take all of them, in the order they were pushed"""
+        while True:
+            with self.lock:
+                if self.items:
+                    items, self.items = self.items, []
+                    self.wakeup_scheduled = False
+                    break
+            # The wakeup runs on the loop, it can not be missed between checking the items and awaiting the waiter
+            self.waiter = self.loop.create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+
+        self.statistics.record_batch(len(items), time.perf_counter() - items[0][0])
+        return [item for _, item in items]
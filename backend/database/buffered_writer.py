@@ -0,0 +1,86 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Final, Optional
+
+from coveo_settings import FloatSetting, IntSetting
+from fastapi.logger import logger
+
+from backend.communication.log_message import LogMessage
+from backend.database.statements import create_drone_metrics_batch, generate_drone_metrics_row
+from backend.models.statistics import BatchWriterStatistics
+from backend.registered_drone import RegisteredDrone
+
+DRONE_METRICS_BATCH_SIZE: Final = IntSetting("database.metrics_batch_size", fallback=250)
+DRONE_METRICS_FLUSH_INTERVAL_SECOND: Final = FloatSetting("database.metrics_flush_interval_second", fallback=1.0)
+
+
+@dataclass
+class BatchStatistics:
+    flush_count: int = 0
+    failed_flush_count: int = 0
+    written_rows: int = 0
+    last_batch_size: int = 0
+    largest_batch_size: int = 0
+    last_flush_latency: float = 0.0
+    total_flush_latency: float = 0.0
+
+    def record_flush(self, batch_size: int, latency: float) -> None:
+        self.flush_count += 1
+        self.written_rows += batch_size
+        self.last_batch_size = batch_size
+        self.largest_batch_size = max(self.largest_batch_size, batch_size)
+        self.last_flush_latency = latency
+        self.total_flush_latency += latency
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.written_rows / self.flush_count if self.flush_count else 0.0
+
+    @property
+    def average_flush_latency(self) -> float:
+        return self.total_flush_latency / self.flush_count if self.flush_count else 0.0
+
+    def to_model(self) -> BatchWriterStatistics:
+        return BatchWriterStatistics(
+            flush_count=self.flush_count,
+            failed_flush_count=self.failed_flush_count,
+            written_rows=self.written_rows,
+            last_batch_size=self.last_batch_size,
+            largest_batch_size=self.largest_batch_size,
+            average_batch_size=self.average_batch_size,
+            last_flush_latency=self.last_flush_latency,
+            average_flush_latency=self.average_flush_latency,
+        )
+
+
+@dataclass
+class DroneMetricsWriter:
+    """Buffer the drone metrics so they are written with a single transaction once the batch is full or when the
+    FlushDroneMetricsTask wakes up, instead of one transaction per telemetry sample"""
+
+    max_batch_size: int = field(default_factory=lambda: int(DRONE_METRICS_BATCH_SIZE))
+    flush_interval: float = field(default_factory=lambda: float(DRONE_METRICS_FLUSH_INTERVAL_SECOND))
+    statistics: BatchStatistics = field(default_factory=BatchStatistics)
+    pending_rows: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.pending_rows) >= self.max_batch_size
+
+    def add(self, drone: RegisteredDrone, mission_id: int, log_message: Optional[LogMessage] = None) -> None:
+        self.pending_rows.append(generate_drone_metrics_row(drone, mission_id, log_message))
+
+    async def flush(self) -> None:
+        if not self.pending_rows:
+            return
+
+        # Swapping the buffer before awaiting lets the producers keep adding rows while the batch is being written
+        rows, self.pending_rows = self.pending_rows, []
+        start = time.perf_counter()
+        try:
+            await create_drone_metrics_batch(rows)
+        except Exception as e:
+            self.statistics.failed_flush_count += 1
+            logger.error(f"Unable to write a batch of {len(rows)} drone metrics: {e}")
+        else:
+            self.statistics.record_flush(len(rows), time.perf_counter() - start)
@@ -0,0 +1,160 @@
+import base64
+import zlib
+from typing import Callable, Final, Optional
+
+from fastapi.logger import logger
+from sqlalchemy import Column, Integer, MetaData, Table, delete, insert, inspect, select, text
+from sqlalchemy.engine import Connection
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from backend.database.database import (
+    DATABASE_CONNECTION_ATTEMPTS,
+    DATABASE_CONNECTION_MINIMUM_WAIT_SECOND,
+    Base,
+    engine,
+)
+from backend.exceptions.database import UnknownSchemaVersionException
+
+Migration = Callable[[Connection], None]
+
+# Every relation named after the metrics table is renamed so the partitioned table can take its place
+UNPARTITIONED_METRICS_RENAMES: Final = (
+    "ALTER TABLE metrics RENAME TO metrics_unpartitioned",
+    "ALTER INDEX metrics_pkey RENAME TO metrics_unpartitioned_pkey",
+    "ALTER INDEX ix_metrics_mission_id_drone_id_id RENAME TO ix_metrics_unpartitioned_mission_id_drone_id_id",
+    "ALTER SEQUENCE metrics_id_seq RENAME TO metrics_unpartitioned_id_seq",
+)
+# The partitioned metrics table as of version 2, the migration must not follow the later changes of the models
+PARTITIONED_METRICS_CREATIONS: Final = (
+    """CREATE TABLE metrics (
+        id SERIAL NOT NULL,
+        x FLOAT,
+        y FLOAT,
+        z FLOAT,
+        yaw FLOAT,
+        front FLOAT,
+        back FLOAT,
+        up FLOAT,
+        "left" FLOAT,
+        "right" FLOAT,
+        bottom FLOAT,
+        drone_id INTEGER,
+        mission_id INTEGER NOT NULL,
+        drone_timestamp BIGINT,
+        received_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id, mission_id),
+        FOREIGN KEY (drone_id, mission_id) REFERENCES drone_mission_association (drone_id, mission_id)
+    ) PARTITION BY LIST (mission_id)""",
+    "CREATE INDEX ix_metrics_mission_id_drone_id_id ON metrics (mission_id, drone_id, id)",
+    "CREATE TABLE IF NOT EXISTS metrics_default PARTITION OF metrics DEFAULT",
+)
+# Compression level and encoding flag of the maps as of version 3
+MAP_BASE64_ENCODED_COLUMN_CREATION: Final = "ALTER TABLE map ADD COLUMN base64_encoded BOOLEAN NOT NULL DEFAULT true"
+LEGACY_MAP_COMPRESSION_LEVEL: Final = 6
+METRICS_COPIED_COLUMNS: Final = 'id, x, y, z, yaw, front, back, up, "left", "right", bottom, drone_id, mission_id'
+
+
+def partition_metrics_by_mission(connection: Connection) -> None:
+    """A table can not be partitioned in place, the metrics are copied to a new partitioned table. The metrics saved
+    before this version have no timestamps."""
+    for statement in (*UNPARTITIONED_METRICS_RENAMES, *PARTITIONED_METRICS_CREATIONS):
+        connection.execute(text(statement))
+
+    for mission_id in connection.execute(text("SELECT id FROM mission")).scalars():
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS metrics_mission_{int(mission_id)} "
+                f"PARTITION OF metrics FOR VALUES IN ({int(mission_id)})"
+            )
+        )
+
+    connection.execute(
+        text(
+            f"INSERT INTO metrics ({METRICS_COPIED_COLUMNS}) "
+            f"SELECT {METRICS_COPIED_COLUMNS} FROM metrics_unpartitioned"
+        )
+    )
+    connection.execute(text("SELECT setval('metrics_id_seq', (SELECT COALESCE(MAX(id), 0) + 1 FROM metrics), false)"))
+    connection.execute(text("DROP TABLE metrics_unpartitioned"))
+
+
+def compress_saved_maps(connection: Connection) -> None:
+    """The maps used to be stored as the ASCII of the posted string. Only the canonical base64 maps are decoded, the
+    others are compressed as they are and flagged so they are still returned as they were posted."""
+    connection.execute(text(MAP_BASE64_ENCODED_COLUMN_CREATION))
+    for mission_id, stored_map in connection.execute(text("SELECT mission_id, map FROM map")).all():
+        stored_map = bytes(stored_map)
+        try:
+            raw_map = base64.b64decode(stored_map, validate=True)
+            base64_encoded = base64.b64encode(raw_map) == stored_map
+        except ValueError:
+            base64_encoded = False
+        if not base64_encoded:
+            logger.warning(f"The map of mission {mission_id} is not canonical base64, it is compressed as it is")
+            raw_map = stored_map
+        connection.execute(
+            text("UPDATE map SET map = :map, base64_encoded = :base64_encoded WHERE mission_id = :mission_id"),
+            {
+                "map": zlib.compress(raw_map, LEGACY_MAP_COMPRESSION_LEVEL),
+                "base64_encoded": base64_encoded,
+                "mission_id": mission_id,
+            },
+        )
+
+
+# The first version of the schema is created straight from the models, so the models always describe the latest version.
+# MIGRATIONS[0] upgrades a database from version 1 to version 2, MIGRATIONS[1] from version 2 to version 3 and so on.
+MIGRATIONS: Final[list[Migration]] = [partition_metrics_by_mission, compress_saved_maps]
+
+schema_version_metadata = MetaData()
+schema_version_table = Table("schema_version", schema_version_metadata, Column("version", Integer, nullable=False))
+
+
+def get_latest_schema_version() -> int:
+    return 1 + len(MIGRATIONS)
+
+
+def get_schema_version(connection: Connection) -> Optional[int]:
+    if not inspect(connection).has_table(schema_version_table.name):
+        return None
+
+    version: Optional[int] = connection.execute(select(schema_version_table.c.version)).scalar_one_or_none()
+    return version
+
+
+def set_schema_version(connection: Connection, version: int) -> None:
+    connection.execute(delete(schema_version_table))
+    connection.execute(insert(schema_version_table).values(version=version))
+
+
+def upgrade_schema(connection: Connection) -> None:
+    """Only apply the migrations the database is missing, the data is kept across restarts"""
+    latest_version = get_latest_schema_version()
+    version = get_schema_version(connection)
+    if version is None:
+        # Databases created before the schema was versioned were recreated on every startup, they hold no history
+        logger.info(f"Creating the database schema at version {latest_version}")
+        Base.metadata.drop_all(connection)
+        Base.metadata.create_all(connection)
+        schema_version_metadata.create_all(connection)
+        set_schema_version(connection, latest_version)
+        return
+
+    if version > latest_version:
+        raise UnknownSchemaVersionException(version, latest_version)
+
+    for next_version in range(version + 1, latest_version + 1):
+        logger.info(f"Upgrading the database schema to version {next_version}")
+        MIGRATIONS[next_version - 2](connection)
+        set_schema_version(connection, next_version)
+
+
+@retry(
+    retry=retry_if_exception_type(ConnectionError),
+    stop=stop_after_attempt(DATABASE_CONNECTION_ATTEMPTS),
+    wait=wait_exponential(min=DATABASE_CONNECTION_MINIMUM_WAIT_SECOND),
+    reraise=True,
+)
+async def setup_tables() -> None:  # pragma: no cover as it would need to start a database just to test that
+    async with engine.begin() as connection:
+        await connection.run_sync(upgrade_schema)
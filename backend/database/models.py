@@ -1,12 +1,19 @@
+from __future__ import annotations
+
 import base64
-from typing import Final
+import hashlib
+import zlib
+from typing import Any, Final
 
 import sqlalchemy
-from sqlalchemy import Column, ForeignKey, ForeignKeyConstraint
+from sqlalchemy import DDL, Column, ForeignKey, ForeignKeyConstraint, Index, event
 
 from backend.database.database import Base
 from backend.models.drone import DroneType
-from backend.models.mission import Map, Mission, MissionState
+from backend.models.mission import Log, Map, Mission, MissionState
+
+
+MAP_COMPRESSION_LEVEL: Final = 6
 
 
 class SavedDroneMetrics(Base):
@@ -15,6 +22,11 @@ class SavedDroneMetrics(Base):
         ForeignKeyConstraint(
             ("drone_id", "mission_id"), ("drone_mission_association.drone_id", "drone_mission_association.mission_id")
         ),
+        # Backs the queries on the metrics of a mission, which are ordered by drone and by id
+        Index("ix_metrics_mission_id_drone_id_id", "mission_id", "drone_id", "id"),
+        # Every mission has its own partition, created with the mission, so the queries of a mission only read its
+        # partition and the metrics of a mission can be dropped without touching the others
+        {"postgresql_partition_by": "LIST (mission_id)"},
     )
 
     id = Column(sqlalchemy.Integer, autoincrement=True, primary_key=True)
@@ -29,7 +41,33 @@ class SavedDroneMetrics(Base):
     right = Column(sqlalchemy.Float)
     bottom = Column(sqlalchemy.Float)
     drone_id = Column(sqlalchemy.Integer)
-    mission_id = Column(sqlalchemy.Integer)
+    # The partition key has to be part of the primary key
+    mission_id = Column(sqlalchemy.Integer, primary_key=True)
+    # Tick of the drone when the log message was sent and time at which the backend received it
+    drone_timestamp = Column(sqlalchemy.BigInteger, nullable=True)
+    received_at = Column(sqlalchemy.DateTime, nullable=True)
+
+
+def get_metrics_partition_name(mission_id: int) -> str:
+    return f"{SavedDroneMetrics.__tablename__}_mission_{mission_id}"
+
+
+def generate_create_metrics_partition_statement(mission_id: int) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {get_metrics_partition_name(mission_id)} "
+        f"PARTITION OF {SavedDroneMetrics.__tablename__} FOR VALUES IN ({int(mission_id)})"
+    )
+
+
+# Metrics of a mission without a partition still have somewhere to go
+event.listen(
+    SavedDroneMetrics.__table__,
+    "after_create",
+    DDL(
+        f"CREATE TABLE IF NOT EXISTS {SavedDroneMetrics.__tablename__}_default "
+        f"PARTITION OF {SavedDroneMetrics.__tablename__} DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
 
 
 class SavedDrone(Base):
@@ -48,6 +86,7 @@ class SavedMission(Base):
     starting_time = Column(sqlalchemy.DateTime)
     total_distance = Column(sqlalchemy.Float)
     ending_time = Column(sqlalchemy.DateTime, nullable=True)
+    telemetry_log_sampling = Column(sqlalchemy.Integer, default=1)
 
     def to_model(self) -> Mission:
         return Mission(
@@ -57,6 +96,7 @@ class SavedMission(Base):
             total_distance=self.total_distance,
             starting_time=self.starting_time,
             ending_time=self.ending_time,
+            telemetry_log_sampling=self.telemetry_log_sampling,
         )
 
 
@@ -64,10 +104,40 @@ class SavedMap(Base):
     __tablename__: Final = "map"
 
     mission_id = Column(sqlalchemy.Integer, ForeignKey("mission.id"), primary_key=True, index=True)
+    # Raw bytes of the map image compressed with zlib, which is also the deflate content encoding of HTTP
     map = Column(sqlalchemy.LargeBinary)
+    # Maps posted as something else than canonical base64, like data URLs, are stored as the UTF-8 of the posted string
+    base64_encoded = Column(sqlalchemy.Boolean, nullable=False, default=True, server_default=sqlalchemy.true())
+
+    @classmethod
+    def from_raw_map(cls, mission_id: int, raw_map: bytes, base64_encoded: bool = True) -> SavedMap:
+        return cls(
+            mission_id=mission_id, map=zlib.compress(raw_map, MAP_COMPRESSION_LEVEL), base64_encoded=base64_encoded
+        )
+
+    @classmethod
+    def from_model(cls, map_to_save: Map) -> SavedMap:
+        """Only canonical base64 is decoded, any other map is kept as it is so the map is returned unchanged"""
+        try:
+            raw_map = base64.b64decode(map_to_save.map, validate=True)
+        except ValueError:
+            return cls.from_raw_map(map_to_save.mission_id, map_to_save.map.encode("utf-8"), base64_encoded=False)
+        if base64.b64encode(raw_map).decode("ascii") != map_to_save.map:
+            return cls.from_raw_map(map_to_save.mission_id, map_to_save.map.encode("utf-8"), base64_encoded=False)
+        return cls.from_raw_map(map_to_save.mission_id, raw_map)
+
+    @property
+    def raw_map(self) -> bytes:
+        return zlib.decompress(self.map)
+
+    @property
+    def etag(self) -> str:
+        return f'"{hashlib.blake2b(self.map, digest_size=8).hexdigest()}"'
 
     def to_model(self) -> Map:
-        return Map(mission_id=self.mission_id, map=base64.decodebytes(self.map))
+        raw_map = self.raw_map
+        encoded_map = base64.b64encode(raw_map).decode("ascii") if self.base64_encoded else raw_map.decode("utf-8")
+        return Map(mission_id=self.mission_id, map=encoded_map)
 
 
 class DroneMissionAssociation(Base):
@@ -79,8 +149,25 @@ class DroneMissionAssociation(Base):
 
 class SavedLog(Base):
     __tablename__: Final = "log"
+    # Backs the keyset pagination of the logs of a mission
+    __table_args__: Final = (Index("ix_log_mission_id_id", "mission_id", "id"),)
 
     id = Column(sqlalchemy.Integer, autoincrement=True, primary_key=True, index=True)
     mission_id = Column(sqlalchemy.Integer, sqlalchemy.ForeignKey("mission.id"))
     timestamp = Column(sqlalchemy.DateTime)
-    message = Column(sqlalchemy.String)
+    message = Column(sqlalchemy.String, nullable=True)
+    # Telemetry entries only keep the fields of the log message, they are formatted when the logs are read. The JSON
+    # type keeps the order of the fields, which JSONB would not.
+    payload = Column(sqlalchemy.JSON, nullable=True)
+
+    def to_model(self) -> Log:
+        return Log(
+            id=self.id,
+            mission_id=self.mission_id,
+            timestamp=self.timestamp,
+            message=format_telemetry_payload(self.payload) if self.payload is not None else self.message,
+        )
+
+
+def format_telemetry_payload(payload: dict[str, Any]) -> str:
+    return "Message received: " + ",".join(f"'{key}': {value}" for key, value in payload.items())
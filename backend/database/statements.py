@@ -1,10 +1,19 @@
+from array import array
 from collections import defaultdict
 from datetime import datetime
-from typing import Final, Iterable
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, AsyncGenerator, Final, Iterable, Optional, Sequence
 
+import numpy as np
 from fastapi.logger import logger
-from sqlalchemy import select, update
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+from tenacity import retry, stop_after_attempt, wait_exponential
 
+from backend.columnar_export import COLUMNAR_COLUMNS, create_columns
+from backend.communication.log_message import BatteryAndPositionLogMessage, LogMessage, RangeLogMessage
 from backend.database.database import async_session
 from backend.database.models import (
     DroneMissionAssociation,
@@ -13,16 +22,23 @@ from backend.database.models import (
     SavedLog,
     SavedMap,
     SavedMission,
+    generate_create_metrics_partition_statement,
 )
+from backend.downsampling import DownsamplingMethod, largest_triangle_three_buckets
 from backend.models.drone import DroneOrientation, DronePositionOrientationRange, DroneRange, DroneType, DroneVec3
 from backend.models.mission import Log, Map, Mission, MissionState
 from backend.registered_drone import RegisteredDrone
 
 
 INITIAL_DISTANCE: Final = 0
+LOG_INSERTION_ATTEMPTS: Final = 3
+LOG_INSERTION_MINIMUM_WAIT_SECOND: Final = 0.1
+METRICS_STREAM_BATCH_SIZE: Final = 1000
+# One new id of the log sequence per row
+LOG_IDS_STATEMENT: Final = text(f"SELECT nextval('{SavedLog.__tablename__}_id_seq') FROM generate_series(1, :count)")
 
 
-async def create_new_mission(drone_type: DroneType) -> Mission:
+async def create_new_mission(drone_type: DroneType, telemetry_log_sampling: int = 1) -> Mission:
     async with async_session() as session:
         mission = SavedMission(
             drone_type=drone_type,
@@ -30,8 +46,11 @@ async def create_new_mission(drone_type: DroneType) -> Mission:
             total_distance=INITIAL_DISTANCE,
             starting_time=datetime.utcnow(),
             ending_time=None,
+            telemetry_log_sampling=telemetry_log_sampling,
         )
         session.add(mission)
+        await session.flush()
+        await session.execute(text(generate_create_metrics_partition_statement(mission.id)))
         await session.commit()
         await session.refresh(mission)
 
@@ -41,19 +60,12 @@ async def create_new_mission(drone_type: DroneType) -> Mission:
 async def get_mission(mission_id: int) -> Mission:
     async with async_session() as session:
         result = await session.execute(select(SavedMission).where(SavedMission.id == mission_id))
-        saved_mission = result.scalars().first()
+        saved_mission: Optional[SavedMission] = result.scalars().first()
 
     if saved_mission is None:
         raise RuntimeError("Mission doesn't exist")
 
-    return Mission(
-        id=saved_mission.id,
-        drone_type=saved_mission.drone_type,
-        state=saved_mission.state,
-        total_distance=saved_mission.total_distance,
-        starting_time=saved_mission.starting_time,
-        ending_time=saved_mission.ending_time,
-    )
+    return saved_mission.to_model()
 
 
 async def get_all_missions() -> list[Mission]:
@@ -61,17 +73,7 @@ async def get_all_missions() -> list[Mission]:
         result = await session.execute(select(SavedMission))
         saved_missions = result.scalars().all()
 
-    return [
-        Mission(
-            id=saved_mission.id,
-            drone_type=saved_mission.drone_type,
-            state=saved_mission.state,
-            total_distance=saved_mission.total_distance,
-            starting_time=saved_mission.starting_time,
-            ending_time=saved_mission.ending_time,
-        )
-        for saved_mission in saved_missions
-    ]
+    return [saved_mission.to_model() for saved_mission in saved_missions]
 
 
 async def update_mission_state(mission_id: int, mission_state: MissionState) -> Mission:
@@ -105,15 +107,47 @@ async def insert_log_in_database(log_message: SavedLog) -> None:
             logger.error(e)
 
 
-async def get_log_message(mission_id: int, starting_id: int) -> list[Log]:
+@retry(
+    stop=stop_after_attempt(LOG_INSERTION_ATTEMPTS),
+    wait=wait_exponential(min=LOG_INSERTION_MINIMUM_WAIT_SECOND),
+    reraise=True,
+)
+async def insert_logs_in_database(logs: list[SavedLog]) -> list[int]:
+    """Insert all the logs with a single multi-row INSERT statement and return their ids, in the same order. Postgres
+    does not guarantee the order of the rows returned by INSERT ... RETURNING, so the ids are taken from the sequence
+    beforehand and given to the logs in increasing order. The whole batch is retried on failure."""
     async with async_session() as session:
-        statement = select(SavedLog).filter(SavedLog.mission_id == mission_id, SavedLog.id >= starting_id)
+        result = await session.execute(LOG_IDS_STATEMENT, {"count": len(logs)})
+        log_ids: list[int] = sorted(result.scalars().all())
+        await session.execute(
+            insert(SavedLog).values(
+                [
+                    {
+                        "id": log_id,
+                        "mission_id": log.mission_id,
+                        "timestamp": log.timestamp,
+                        "message": log.message,
+                        "payload": log.payload,
+                    }
+                    for log, log_id in zip(logs, log_ids)
+                ]
+            )
+        )
+        await session.commit()
+        return log_ids
+
+
+async def get_log_message(mission_id: int, starting_id: int, limit: Optional[int] = None) -> list[Log]:
+    async with async_session() as session:
+        statement = (
+            select(SavedLog)
+            .filter(SavedLog.mission_id == mission_id, SavedLog.id >= starting_id)
+            .order_by(SavedLog.id)
+            .limit(limit)
+        )
         rows = await session.execute(statement)
 
-        return [
-            Log(id=row.id, mission_id=row.mission_id, timestamp=row.timestamp, message=row.message)
-            for row in rows.scalars()
-        ]
+        return [row.to_model() for row in rows.scalars()]
 
 
 async def create_drone(drone: RegisteredDrone) -> None:
@@ -123,23 +157,49 @@ async def create_drone(drone: RegisteredDrone) -> None:
         await session.commit()
 
 
-async def create_drone_metrics(drone: RegisteredDrone, mission_id: int) -> None:
-    async with async_session() as session:
-        metric = SavedDroneMetrics(
-            x=drone.position.x,
-            y=drone.position.y,
-            z=drone.position.z,
-            yaw=drone.orientation.yaw,
-            front=drone.range.front,
-            back=drone.range.back,
-            up=drone.range.up,
-            left=drone.range.left,
-            right=drone.range.right,
-            bottom=drone.range.bottom,
-            drone_id=drone.id,
-            mission_id=mission_id,
-        )
-        session.add(metric)
+def generate_drone_metrics_row(
+    drone: RegisteredDrone, mission_id: int, log_message: Optional[LogMessage] = None
+) -> dict[str, Any]:
+    """The values carried by the log message take precedence over the drone state, which may already be newer when the
+    live state is coalesced"""
+    row = {
+        "x": drone.x,
+        "y": drone.y,
+        "z": drone.z,
+        "yaw": drone.yaw,
+        "front": drone.range_front,
+        "back": drone.range_back,
+        "up": drone.range_up,
+        "left": drone.range_left,
+        "right": drone.range_right,
+        "bottom": drone.range_bottom,
+        "drone_id": drone.id,
+        "mission_id": mission_id,
+        "drone_timestamp": log_message.timestamp if log_message else None,
+        "received_at": datetime.utcnow(),
+    }
+
+    if isinstance(log_message, BatteryAndPositionLogMessage):
+        row["x"] = log_message.kalman_state_x
+        row["y"] = log_message.kalman_state_y
+        row["z"] = log_message.kalman_state_z
+        row["yaw"] = log_message.state_estimate_yaw
+
+    if isinstance(log_message, RangeLogMessage):
+        row["front"] = log_message.range_front
+        row["back"] = log_message.range_back
+        row["up"] = log_message.range_up
+        row["left"] = log_message.range_left
+        row["right"] = log_message.range_right
+        row["bottom"] = log_message.range_zrange
+
+    return row
+
+
+async def create_drone_metrics_batch(rows: list[dict[str, Any]]) -> None:
+    """Insert all the rows with a single multi-row INSERT statement"""
+    async with async_session() as session:
+        await session.execute(insert(SavedDroneMetrics).values(rows))
         await session.commit()
 
 
@@ -151,13 +211,86 @@ async def create_drones_mission_association(drones: Iterable[RegisteredDrone], m
         await session.commit()
 
 
-async def get_drones_metadata(mission_id: int) -> dict[int, list[DronePositionOrientationRange]]:
+DRONE_METRICS_COLUMNS: Final = (
+    SavedDroneMetrics.drone_id,
+    *(getattr(SavedDroneMetrics, column) for column in COLUMNAR_COLUMNS),
+)
+
+
+def select_drone_metrics(mission_id: int, max_points: Optional[int], method: DownsamplingMethod) -> Select:
+    """Select the metrics of every drone of the mission ordered by drone, keeping at most max_points per drone when the
+    reduction can be done by the database. LTTB needs the whole path, it is applied once the rows are fetched."""
+    if not max_points or method == DownsamplingMethod.LTTB:
+        return (
+            select(*DRONE_METRICS_COLUMNS)
+            .filter(SavedDroneMetrics.mission_id == mission_id)
+            .order_by(SavedDroneMetrics.drone_id, SavedDroneMetrics.id)
+        )
+
+    if method == DownsamplingMethod.BUCKET_AVERAGE:
+        bucketed = (
+            select(
+                *DRONE_METRICS_COLUMNS,
+                func.ntile(max_points)
+                .over(partition_by=SavedDroneMetrics.drone_id, order_by=SavedDroneMetrics.id)
+                .label("bucket"),
+            )
+            .filter(SavedDroneMetrics.mission_id == mission_id)
+            .subquery()
+        )
+        return (
+            select(bucketed.c.drone_id, *(func.avg(bucketed.c[column]).label(column) for column in COLUMNAR_COLUMNS))
+            .group_by(bucketed.c.drone_id, bucketed.c.bucket)
+            .order_by(bucketed.c.drone_id, bucketed.c.bucket)
+        )
+
+    numbered = (
+        select(
+            *DRONE_METRICS_COLUMNS,
+            func.row_number()
+            .over(partition_by=SavedDroneMetrics.drone_id, order_by=SavedDroneMetrics.id)
+            .label("position"),
+            func.count().over(partition_by=SavedDroneMetrics.drone_id).label("sample_count"),
+        )
+        .filter(SavedDroneMetrics.mission_id == mission_id)
+        .subquery()
+    )
+    stride = (numbered.c.sample_count + max_points - 1) / max_points
+    return (
+        select(numbered.c.drone_id, *(numbered.c[column] for column in COLUMNAR_COLUMNS))
+        .filter((numbered.c.position - 1) % stride == 0)
+        .order_by(numbered.c.drone_id, numbered.c.position)
+    )
+
+
+def downsample_with_lttb(rows: Sequence[Row], max_points: int) -> list[Row]:
+    """The rows are ordered by drone, the path of every drone is simplified on its own"""
+    kept_rows: list[Row] = []
+    for _, drone_rows_iterator in groupby(rows, key=attrgetter("drone_id")):
+        drone_rows = list(drone_rows_iterator)
+        points = np.array([(row.x, row.y) for row in drone_rows], dtype=np.float64)
+        kept_rows.extend(drone_rows[index] for index in largest_triangle_three_buckets(points, max_points))
+
+    return kept_rows
+
+
+async def get_drone_metrics_rows(
+    mission_id: int, max_points: Optional[int] = None, method: DownsamplingMethod = DownsamplingMethod.STRIDE
+) -> Sequence[Row]:
     async with async_session() as session:
-        statement = select(SavedDroneMetrics).filter(SavedDroneMetrics.mission_id == mission_id)
-        rows = await session.execute(statement)
+        result = await session.execute(select_drone_metrics(mission_id, max_points, method))
+        rows: list[Row] = result.all()
+
+    if max_points and method == DownsamplingMethod.LTTB:
+        return downsample_with_lttb(rows, max_points)
+    return rows
+
 
+async def get_drones_metadata(
+    mission_id: int, max_points: Optional[int] = None, method: DownsamplingMethod = DownsamplingMethod.STRIDE
+) -> dict[int, list[DronePositionOrientationRange]]:
     metrics = defaultdict(list)
-    for row in rows.scalars():
+    for row in await get_drone_metrics_rows(mission_id, max_points, method):
         metrics[row.drone_id].append(
             DronePositionOrientationRange(
                 position=DroneVec3(x=row.x, y=row.y, z=row.z),
@@ -171,17 +304,63 @@ async def get_drones_metadata(mission_id: int) -> dict[int, list[DronePositionOr
     return metrics
 
 
+async def get_drones_metadata_columns(
+    mission_id: int, max_points: Optional[int] = None, method: DownsamplingMethod = DownsamplingMethod.STRIDE
+) -> dict[int, list[array]]:
+    """Same data as get_drones_metadata, but as one float32 array per column for every drone, appended straight from
+    the query results"""
+    metrics: dict[int, list[array]] = {}
+    for drone_id, *values in await get_drone_metrics_rows(mission_id, max_points, method):
+        if (columns := metrics.get(drone_id)) is None:
+            columns = metrics[drone_id] = create_columns()
+        for column, value in zip(columns, values):
+            column.append(value)
+
+    return metrics
+
+
+async def stream_drones_metadata(mission_id: int) -> AsyncGenerator[list[Row], None]:
+    """Read the metrics of the mission with a server-side cursor, one batch at a time, so the memory used does not grow
+    with the length of the mission. Only the columns are selected to skip building the ORM objects."""
+    async with async_session() as session:
+        statement = (
+            select(*DRONE_METRICS_COLUMNS)
+            .filter(SavedDroneMetrics.mission_id == mission_id)
+            .order_by(SavedDroneMetrics.id)
+            .execution_options(yield_per=METRICS_STREAM_BATCH_SIZE)
+        )
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            yield rows
+
+
 async def create_saved_map(map_to_save: Map) -> None:
     async with async_session() as session:
-        saved_map = SavedMap(mission_id=map_to_save.mission_id, map=map_to_save.map.encode("ascii"))
-        session.add(saved_map)
+        session.add(SavedMap.from_model(map_to_save))
+        await session.commit()
+
+
+async def create_saved_raw_map(mission_id: int, raw_map: bytes) -> None:
+    async with async_session() as session:
+        session.add(SavedMap.from_raw_map(mission_id, raw_map))
         await session.commit()
 
 
-async def get_saved_map(mission_id: int) -> Map:
+async def create_saved_compressed_map(mission_id: int, compressed_map: bytes) -> None:
+    async with async_session() as session:
+        session.add(SavedMap(mission_id=mission_id, map=compressed_map))
+        await session.commit()
+
+
+async def get_saved_map_model(mission_id: int) -> Optional[SavedMap]:
     async with async_session() as session:
         statement = select(SavedMap).filter(SavedMap.mission_id == mission_id)
         results = await session.execute(statement)
-        saved_map = results.scalars().first()
+        saved_map: Optional[SavedMap] = results.scalars().first()
+
+    return saved_map
+
 
-    return Map(mission_id=saved_map.mission_id, map=saved_map.map.decode("ascii"))
+async def get_saved_map(mission_id: int) -> Optional[Map]:
+    saved_map = await get_saved_map_model(mission_id)
+    return saved_map.to_model() if saved_map else None
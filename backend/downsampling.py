@@ -0,0 +1,39 @@
+from enum import Enum
+
+import numpy as np
+import numpy.typing as npt
+
+
+class DownsamplingMethod(str, Enum):
+    STRIDE = "stride"
+    BUCKET_AVERAGE = "bucket_average"
+    LTTB = "lttb"
+
+
+def largest_triangle_three_buckets(points: npt.NDArray[np.float64], max_points: int) -> npt.NDArray[np.intp]:
+    """Select the indices of the points that keep the shape of the path. The first and last points are always kept,
+    every bucket in between keeps the point forming the largest triangle with the point kept in the previous bucket and
+    the average of the next one."""
+    point_count = len(points)
+    if max_points >= point_count:
+        return np.arange(point_count)
+    if max_points < 3:
+        return np.array([0, point_count - 1][:max_points], dtype=np.intp)
+
+    # The first and last points are buckets of their own
+    bounds = np.linspace(1, point_count - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0], selected[-1] = 0, point_count - 1
+    for bucket in range(max_points - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        next_end = bounds[bucket + 2] if bucket + 2 < len(bounds) else point_count
+        next_average = points[end:next_end].mean(axis=0)
+        previous = points[selected[bucket]]
+        candidates = points[start:end]
+        areas = np.abs(
+            (previous[0] - next_average[0]) * (candidates[:, 1] - previous[1])
+            - (previous[0] - candidates[:, 0]) * (next_average[1] - previous[1])
+        )
+        selected[bucket + 1] = start + int(np.argmax(areas))
+
+    return selected
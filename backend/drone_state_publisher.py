@@ -0,0 +1,91 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Final, Generator, Optional
+
+from coveo_settings import FloatSetting
+
+from backend.registered_drone import RegisteredDrone
+
+DRONE_STATE_PUSH_INTERVAL_SECOND: Final = FloatSetting("push.drone_state_interval_second", fallback=0.1)
+
+
+@dataclass
+class DroneStatePublisher:
+    """Build the frames pushed to the /ws/drones subscribers. Every frame is serialized once and shared by all the
+    subscribers: the delta holds the fields that changed since the previous frame and the snapshot holds every drone,
+    for the subscribers that missed the previous frame."""
+
+    interval: float = field(default_factory=lambda: float(DRONE_STATE_PUSH_INTERVAL_SECOND))
+    version: int = 0
+    subscriber_count: int = 0
+    # Every drone as it is in the latest frame
+    states: dict[int, dict[str, Any]] = field(default_factory=dict)
+    changed_drone_ids: set[int] = field(default_factory=set)
+    delta: str = ""
+    _snapshot: Optional[str] = None
+    _new_frame: Optional[asyncio.Event] = None
+
+    def mark_changed(self, drone_id: int) -> None:
+        self.changed_drone_ids.add(drone_id)
+
+    def publish(self, drones: dict[int, RegisteredDrone]) -> None:
+        """Without subscribers the changed drones are kept for later, so no drone is serialized for nobody"""
+        if not self.subscriber_count or not self.changed_drone_ids:
+            return
+
+        changed_fields: dict[int, dict[str, Any]] = {}
+        removed_drone_ids: list[int] = []
+        for drone_id in self.changed_drone_ids:
+            if not (drone := drones.get(drone_id)):
+                if self.states.pop(drone_id, None) is not None:
+                    removed_drone_ids.append(drone_id)
+                continue
+
+            state = drone.to_model().dict()
+            previous_state = self.states.get(drone_id, {})
+            if fields := {key: value for key, value in state.items() if previous_state.get(key) != value}:
+                changed_fields[drone_id] = fields
+                self.states[drone_id] = state
+        self.changed_drone_ids = set()
+
+        if not changed_fields and not removed_drone_ids:
+            return
+
+        self.version += 1
+        self.delta = json.dumps(
+            {"version": self.version, "snapshot": False, "drones": changed_fields, "removed": removed_drone_ids}
+        )
+        self._snapshot = None
+        if self._new_frame:
+            self._new_frame.set()
+            self._new_frame = None
+
+    def get_frame(self, last_version: Optional[int]) -> str:
+        if last_version == self.version - 1:
+            return self.delta
+
+        if self._snapshot is None:
+            self._snapshot = json.dumps(
+                {"version": self.version, "snapshot": True, "drones": self.states, "removed": []}
+            )
+        return self._snapshot
+
+    async def wait_for_frame(self, last_version: Optional[int]) -> tuple[str, int]:
+        """The first frame of a subscriber is a snapshot of the latest version, the next ones wait for a new version"""
+        while last_version is not None and last_version >= self.version:
+            # The event is created lazily so it belongs to the running event loop
+            if not self._new_frame:
+                self._new_frame = asyncio.Event()
+            await self._new_frame.wait()
+
+        return self.get_frame(last_version), self.version
+
+    @contextmanager
+    def subscribe(self) -> Generator[None, None, None]:
+        self.subscriber_count += 1
+        try:
+            yield
+        finally:
+            self.subscriber_count -= 1
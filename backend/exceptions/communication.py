@@ -10,6 +10,11 @@ class ArgosCommunicationException(CommunicationException):
         super().__init__(f"Unable to connect to Argos drone on port {port}")
 
 
+class ArgosMultiplexedCommunicationException(CommunicationException):
+    def __init__(self, drone_tag: int) -> None:
+        super().__init__(f"Multiplexed connection to Argos is closed, unable to reach drone with tag {drone_tag}")
+
+
 class CrazyflieCommunicationException(CommunicationException):
     def __init__(self, uri: str) -> None:
         super().__init__(f"Unable to connect to Crazyflie drone with URI {uri}")
@@ -0,0 +1,10 @@
+from backend.exceptions.exception import BackendException
+
+
+class DatabaseException(BackendException):
+    pass
+
+
+class UnknownSchemaVersionException(DatabaseException):
+    def __init__(self, version: int, latest_version: int) -> None:
+        super().__init__(f"Database schema version {version} is newer than the latest known version {latest_version}")
@@ -88,3 +88,60 @@ class MissionIsAlreadyActiveException(ResponseException):
     @classmethod
     def description(cls) -> str:
         return "A mission for that drone type is already existing"
+
+
+class MapNotFoundException(ResponseException):
+    def __init__(self, mission_id: int) -> None:
+        super().__init__(status_code=self.http_status_code(), detail=f"No map was saved for mission {mission_id}")
+
+    @classmethod
+    def http_status_code(cls) -> int:
+        return int(HTTPStatus.NOT_FOUND)
+
+    @classmethod
+    def description(cls) -> str:
+        return "No map was saved for that mission"
+
+
+class MapTooLargeException(ResponseException):
+    def __init__(self, maximum_size: int) -> None:
+        super().__init__(
+            status_code=self.http_status_code(), detail=f"The map is larger than the maximum of {maximum_size} bytes"
+        )
+
+    @classmethod
+    def http_status_code(cls) -> int:
+        return int(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+    @classmethod
+    def description(cls) -> str:
+        return "Map is larger than the maximum size"
+
+
+class UnsupportedContentEncodingException(ResponseException):
+    def __init__(self, content_encoding: str) -> None:
+        super().__init__(
+            status_code=self.http_status_code(),
+            detail=f"Content encoding {content_encoding} is not supported, use deflate or identity",
+        )
+
+    @classmethod
+    def http_status_code(cls) -> int:
+        return int(HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+
+    @classmethod
+    def description(cls) -> str:
+        return "Content encoding is not supported or the content does not match it"
+
+
+class TileNotFoundException(ResponseException):
+    def __init__(self, row: int, column: int) -> None:
+        super().__init__(status_code=self.http_status_code(), detail=f"Tile ({row}, {column}) is outside of the map")
+
+    @classmethod
+    def http_status_code(cls) -> int:
+        return int(HTTPStatus.NOT_FOUND)
+
+    @classmethod
+    def description(cls) -> str:
+        return "Tile is outside of the map"
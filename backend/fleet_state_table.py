@@ -0,0 +1,190 @@
+from dataclasses import dataclass, field
+from typing import Any, Final, Iterable, Optional
+
+import numpy as np
+import numpy.typing as npt
+from coveo_settings import BoolSetting, IntSetting
+
+from backend.models.drone import DroneState, DroneType
+from backend.registered_drone import GROUNDED_STATES, RegisteredDrone
+
+FLEET_TABLE_ENABLED: Final = BoolSetting("fleet_table.enabled", fallback=False)
+FLEET_TABLE_INITIAL_CAPACITY: Final = IntSetting("fleet_table.initial_capacity", fallback=1024)
+
+DRONE_STATES: Final = list(DroneState)
+STATE_CODES: Final = {state: code for code, state in enumerate(DRONE_STATES)}
+FLYING_STATE_CODES: Final = np.array([STATE_CODES[state] for state in DroneState if state not in GROUNDED_STATES])
+DRONE_TYPES: Final = list(DroneType)
+TYPE_CODES: Final = {drone_type: code for code, drone_type in enumerate(DRONE_TYPES)}
+RANGE_FIELDS: Final = ("front", "back", "up", "left", "right", "bottom")
+COLUMNS: Final = (
+    "drone_ids",
+    "active",
+    "drone_types",
+    "state_codes",
+    "charge_percentages",
+    "positions",
+    "yaws",
+    "ranges",
+    "total_distances",
+)
+
+
+@dataclass
+class FleetStateTable:
+    """Live state of every drone as a struct of arrays, one row per drone slot, so the fleet-wide questions are
+    answered with vectorized operations instead of loops over the drones. The rows of the unregistered drones are
+    reused and the arrays double in size when they are full."""
+
+    capacity: int = field(default_factory=lambda: int(FLEET_TABLE_INITIAL_CAPACITY))
+    slots: dict[int, int] = field(default_factory=dict)
+    free_slots: list[int] = field(default_factory=list)
+    # Rows past the size were never used
+    size: int = 0
+    drone_ids: npt.NDArray[np.int64] = field(init=False)
+    active: npt.NDArray[np.bool_] = field(init=False)
+    drone_types: npt.NDArray[np.int8] = field(init=False)
+    state_codes: npt.NDArray[np.int8] = field(init=False)
+    charge_percentages: npt.NDArray[np.int32] = field(init=False)
+    positions: npt.NDArray[np.float64] = field(init=False)
+    yaws: npt.NDArray[np.float64] = field(init=False)
+    ranges: npt.NDArray[np.int64] = field(init=False)
+    total_distances: npt.NDArray[np.float64] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.capacity = max(self.capacity, 1)
+        self.drone_ids = np.zeros(self.capacity, dtype=np.int64)
+        self.active = np.zeros(self.capacity, dtype=np.bool_)
+        self.drone_types = np.zeros(self.capacity, dtype=np.int8)
+        self.state_codes = np.zeros(self.capacity, dtype=np.int8)
+        self.charge_percentages = np.zeros(self.capacity, dtype=np.int32)
+        self.positions = np.zeros((self.capacity, 3), dtype=np.float64)
+        self.yaws = np.zeros(self.capacity, dtype=np.float64)
+        self.ranges = np.zeros((self.capacity, len(RANGE_FIELDS)), dtype=np.int64)
+        self.total_distances = np.zeros(self.capacity, dtype=np.float64)
+
+    @classmethod
+    def from_drones(cls, drones: Iterable[RegisteredDrone]) -> "FleetStateTable":
+        drones = list(drones)
+        table = cls(capacity=len(drones))
+        for drone in drones:
+            table.add(drone)
+        return table
+
+    def grow(self) -> None:
+        self.capacity *= 2
+        for column in COLUMNS:
+            values = getattr(self, column)
+            grown_values = np.zeros((self.capacity,) + values.shape[1:], dtype=values.dtype)
+            grown_values[: len(values)] = values
+            setattr(self, column, grown_values)
+
+    def add(self, drone: RegisteredDrone) -> None:
+        if (slot := self.slots.get(drone.id)) is None:
+            if self.free_slots:
+                slot = self.free_slots.pop()
+            else:
+                if self.size == self.capacity:
+                    self.grow()
+                slot, self.size = self.size, self.size + 1
+            self.slots[drone.id] = slot
+
+        self.drone_ids[slot] = drone.id
+        self.active[slot] = True
+        self.drone_types[slot] = TYPE_CODES[drone.drone_type]
+        self.update(drone)
+
+    def remove(self, drone_id: int) -> None:
+        if (slot := self.slots.pop(drone_id, None)) is not None:
+            self.active[slot] = False
+            self.free_slots.append(slot)
+
+    def update(self, drone: RegisteredDrone) -> None:
+        """Copy the live state of the drone in its row, the drones that were not added are ignored"""
+        if (slot := self.slots.get(drone.id)) is None:
+            return
+
+        self.state_codes[slot] = STATE_CODES[drone.state]
+        self.charge_percentages[slot] = drone.charge_percentage
+        self.positions[slot] = (drone.x, drone.y, drone.z)
+        self.yaws[slot] = drone.yaw
+        self.ranges[slot] = (
+            drone.range_front,
+            drone.range_back,
+            drone.range_up,
+            drone.range_left,
+            drone.range_right,
+            drone.range_bottom,
+        )
+        self.total_distances[slot] = drone.total_distance
+
+    def select(self, drone_type: Optional[DroneType]) -> npt.NDArray[np.bool_]:
+        """Mask of the rows of the registered drones of the type, or of every type"""
+        selected = self.active[: self.size]
+        if drone_type:
+            selected = selected & (self.drone_types[: self.size] == TYPE_CODES[drone_type])
+        return selected
+
+    def count_drones(self, drone_type: Optional[DroneType]) -> int:
+        return int(np.count_nonzero(self.select(drone_type)))
+
+    def count_flying_drones(self, drone_type: Optional[DroneType]) -> int:
+        state_codes = self.state_codes[: self.size][self.select(drone_type)]
+        return int(np.count_nonzero(np.isin(state_codes, FLYING_STATE_CODES)))
+
+    def get_total_distance(self, drone_type: Optional[DroneType]) -> float:
+        return float(self.total_distances[: self.size][self.select(drone_type)].sum())
+
+    def get_bounding_box(self, drone_type: Optional[DroneType]) -> Optional[tuple[list[float], list[float]]]:
+        """Minimum and maximum corners of the box holding the drones, None without drones"""
+        positions = self.positions[: self.size][self.select(drone_type)]
+        if not len(positions):
+            return None
+        return positions.min(axis=0).tolist(), positions.max(axis=0).tolist()
+
+    def get_close_pairs(self, min_separation: float, drone_type: Optional[DroneType]) -> list[tuple[int, int]]:
+        """Pairs of drones closer than the separation, each pair once with the lowest row first. The squared distances
+        are accumulated one axis at a time, so only one matrix of the size of the fleet squared is allocated."""
+        selected = self.select(drone_type)
+        positions, drone_ids = self.positions[: self.size][selected], self.drone_ids[: self.size][selected]
+        squared_distances = np.zeros((len(positions), len(positions)), dtype=np.float64)
+        for axis in range(positions.shape[1]):
+            squared_distances += np.subtract.outer(positions[:, axis], positions[:, axis]) ** 2
+
+        first, second = np.nonzero(np.triu(squared_distances < min_separation * min_separation, k=1))
+        return list(zip(drone_ids[first].tolist(), drone_ids[second].tolist()))
+
+    def to_drone_dicts(self, drone_type: Optional[DroneType]) -> list[dict[str, Any]]:
+        """The drones, shaped like the Drone model and in the order they were added, like the drones of the registry,
+        whichever rows they reuse. The columns are converted to Python numbers in bulk instead of one value at a
+        time."""
+        rows = np.fromiter(self.slots.values(), dtype=np.intp, count=len(self.slots))
+        if drone_type:
+            rows = rows[self.drone_types[rows] == TYPE_CODES[drone_type]]
+        columns = zip(
+            self.drone_ids[rows].tolist(),
+            self.state_codes[rows].tolist(),
+            self.drone_types[rows].tolist(),
+            self.charge_percentages[rows].tolist(),
+            self.positions[rows].tolist(),
+            self.yaws[rows].tolist(),
+            self.ranges[rows].tolist(),
+            self.total_distances[rows].tolist(),
+        )
+        return [
+            {
+                "id": drone_id,
+                "state": DRONE_STATES[state_code].value,
+                "type": DRONE_TYPES[type_code].value,
+                "battery": {"charge_percentage": charge},
+                "position": {"x": position[0], "y": position[1], "z": position[2]},
+                "orientation": {"yaw": yaw},
+                "range": dict(zip(RANGE_FIELDS, drone_range)),
+                "total_distance": total_distance,
+            }
+            for drone_id, state_code, type_code, charge, position, yaw, drone_range, total_distance in columns
+        ]
+
+
+def create_fleet_state_table() -> Optional[FleetStateTable]:
+    return FleetStateTable() if bool(FLEET_TABLE_ENABLED) else None
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Final, Generator
+
+from coveo_settings import IntSetting
+
+from backend.bounded_queue import BoundedQueue, QueuePolicy
+from backend.database.models import SavedLog
+from backend.models.mission import Log
+
+LOG_STREAM_QUEUE_SIZE: Final = IntSetting("push.log_stream_queue_size", fallback=100)
+
+
+@dataclass
+class LogStreamChunk:
+    """Server-sent events of a batch of logs of a mission, encoded once for all the subscribers of the mission"""
+
+    first_id: int
+    last_id: int
+    # The event of every log, by id, for the subscribers that already sent the first logs of the batch
+    events: list[tuple[int, str]]
+    text: str
+
+
+def encode_log_event(log: Log) -> str:
+    return f"id: {log.id}\nevent: log\ndata: {log.json()}\n\n"
+
+
+def create_log_stream_chunk(logs: list[Log]) -> LogStreamChunk:
+    events = [(log.id, encode_log_event(log)) for log in logs]
+    return LogStreamChunk(
+        first_id=logs[0].id, last_id=logs[-1].id, events=events, text="".join(event for _, event in events)
+    )
+
+
+@dataclass(eq=False)
+class LogSubscriber:
+    queue: BoundedQueue[LogStreamChunk]
+    # Set when a chunk did not fit in the queue, the subscriber then catches up from the database
+    lagging: bool = False
+
+    def send(self, chunk: LogStreamChunk) -> None:
+        if not self.queue.offer(chunk):
+            self.lagging = True
+
+    def reset(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.lagging = False
+
+
+@dataclass
+class LogPublisher:
+    """Fan the logs out to the subscribers of their mission once they are written"""
+
+    subscribers: dict[int, set[LogSubscriber]] = field(default_factory=dict)
+
+    def publish(self, logs: list[SavedLog]) -> None:
+        """Only the logs of the missions with subscribers are formatted"""
+        logs_by_mission: dict[int, list[Log]] = {}
+        for log in logs:
+            if log.mission_id in self.subscribers:
+                logs_by_mission.setdefault(log.mission_id, []).append(log.to_model())
+
+        for mission_id, mission_logs in logs_by_mission.items():
+            chunk = create_log_stream_chunk(mission_logs)
+            for subscriber in self.subscribers[mission_id]:
+                subscriber.send(chunk)
+
+    @contextmanager
+    def subscribe(self, mission_id: int) -> Generator[LogSubscriber, None, None]:
+        subscriber = LogSubscriber(BoundedQueue(int(LOG_STREAM_QUEUE_SIZE), QueuePolicy.BLOCK))
+        self.subscribers.setdefault(mission_id, set()).add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self.subscribers[mission_id].discard(subscriber)
+            if not self.subscribers[mission_id]:
+                del self.subscribers[mission_id]
@@ -0,0 +1,29 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class LruCache(Generic[K, V]):
+    """Keep the most recently used values, unlike functools.lru_cache the entries can be invalidated one by one"""
+
+    maxsize: int
+    entries: OrderedDict[K, V] = field(default_factory=OrderedDict)
+
+    def get(self, key: K) -> Optional[V]:
+        if (value := self.entries.get(key)) is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        if key in self.entries:
+            del self.entries[key]
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -62,3 +63,14 @@ class DronePositionOrientationRange(BaseModel):
     position: DroneVec3
     orientation: DroneOrientation
     range: DroneRange
+
+
+class FleetSummary(BaseModel):
+    drone_count: int
+    flying_drone_count: int
+    total_distance: float
+    # Corners of the box holding the drones, None without drones
+    minimum_position: Optional[DroneVec3]
+    maximum_position: Optional[DroneVec3]
+    # Ids of the pairs of drones closer than the requested separation
+    close_pairs: list[tuple[int, int]]
@@ -22,6 +22,7 @@ class Mission(BaseModel):
     total_distance: float
     starting_time: datetime.datetime
     ending_time: Optional[datetime.datetime] = None
+    telemetry_log_sampling: int = 1
 
 
 class Log(BaseModel):
@@ -34,3 +35,11 @@ class Log(BaseModel):
 class Map(BaseModel):
     mission_id: int
     map: str
+
+
+class OccupancyTiles(BaseModel):
+    mission_id: int
+    tile_size: int
+    tiles_per_side: int
+    # Version of every tile, row by row starting with the north
+    versions: list[list[int]]
@@ -0,0 +1,46 @@
+from pydantic import BaseModel
+
+
+class BatchWriterStatistics(BaseModel):
+    flush_count: int
+    failed_flush_count: int
+    written_rows: int
+    last_batch_size: int
+    largest_batch_size: int
+    average_batch_size: float
+    last_flush_latency: float
+    average_flush_latency: float
+
+
+class InboundShardStatistics(BaseModel):
+    shard: int
+    queue_depth: int
+    processed_messages: int
+    processing_rate: float
+
+
+class QueueStatistics(BaseModel):
+    size: int
+    maxsize: int
+    policy: str
+    dropped: int
+
+
+class ThreadHandoffStatistics(BaseModel):
+    batch_count: int
+    handed_off: int
+    last_batch_size: int
+    largest_batch_size: int
+    average_batch_size: float
+    last_latency: float
+    max_latency: float
+    average_latency: float
+
+
+class Statistics(BaseModel):
+    drone_metrics_writer: BatchWriterStatistics
+    log_writer: BatchWriterStatistics
+    inbound_shards: list[InboundShardStatistics]
+    queues: dict[str, QueueStatistics]
+    # Handoff of the log messages of every Crazyflie drone from the cflib threads to the event loop, by drone id
+    crazyflie_log_handoffs: dict[int, ThreadHandoffStatistics]
@@ -0,0 +1,163 @@
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Final
+
+import numpy as np
+import numpy.typing as npt
+from coveo_settings import BoolSetting, FloatSetting, IntSetting
+
+from backend.communication.log_message import RangeLogMessage
+
+MAPPING_ENABLED: Final = BoolSetting("mapping.enabled", fallback=False)
+OCCUPANCY_GRID_RESOLUTION: Final = FloatSetting("mapping.resolution_meter", fallback=0.05)
+OCCUPANCY_GRID_SIZE: Final = IntSetting("mapping.grid_size", fallback=400)
+OCCUPANCY_GRID_BATCH_SIZE: Final = IntSetting("mapping.batch_size", fallback=64)
+OCCUPANCY_GRID_TILE_SIZE: Final = IntSetting("mapping.tile_size", fallback=64)
+
+# The ranges are in millimeters and the yaw in degrees, like the Crazyflie multi-ranger deck and state estimate
+RANGE_TO_METER: Final = 0.001
+MAXIMUM_RANGE_METER: Final = 4.0
+LOG_ODDS_OCCUPIED: Final = 0.85
+LOG_ODDS_FREE: Final = -0.4
+LOG_ODDS_LIMIT: Final = 5.0
+# Angle of the front, left, back and right sensors relative to the yaw of the drone
+RANGE_SENSOR_ANGLES: Final = np.radians([0.0, 90.0, 180.0, 270.0])
+
+PNG_SIGNATURE: Final = b"\x89PNG\r\n\x1a\n"
+PNG_GRAYSCALE_HEADER: Final = struct.Struct(">IIBBBBB")
+
+
+@dataclass
+class OccupancyGrid:
+    """Log-odds occupancy grid centered on the origin, updated with the free cells along every range ray and the
+    occupied cell at its end. The samples are applied in batches so the rays of many samples are traced at once."""
+
+    size: int = field(default_factory=lambda: int(OCCUPANCY_GRID_SIZE))
+    resolution: float = field(default_factory=lambda: float(OCCUPANCY_GRID_RESOLUTION))
+    batch_size: int = field(default_factory=lambda: int(OCCUPANCY_GRID_BATCH_SIZE))
+    tile_size: int = field(default_factory=lambda: int(OCCUPANCY_GRID_TILE_SIZE))
+    log_odds: npt.NDArray[np.float32] = field(init=False)
+    # Incremented every time a batch touches a tile, the tiles are indexed like the pixels, the first row is the north
+    tile_versions: npt.NDArray[np.int64] = field(init=False)
+    pending_samples: list[tuple[float, ...]] = field(default_factory=list)
+    update_count: int = 0
+
+    def __post_init__(self) -> None:
+        self.log_odds = np.zeros((self.size, self.size), dtype=np.float32)
+        self.tile_versions = np.zeros((self.tiles_per_side, self.tiles_per_side), dtype=np.int64)
+
+    @property
+    def tiles_per_side(self) -> int:
+        return -(-self.size // self.tile_size)
+
+    def update(self, x: float, y: float, yaw: float, log_message: RangeLogMessage) -> None:
+        self.pending_samples.append(
+            (
+                x,
+                y,
+                yaw,
+                log_message.range_front,
+                log_message.range_left,
+                log_message.range_back,
+                log_message.range_right,
+            )
+        )
+        if len(self.pending_samples) >= self.batch_size:
+            self.apply_pending_samples()
+
+    def apply_pending_samples(self) -> None:
+        if not self.pending_samples:
+            return
+
+        samples = np.array(self.pending_samples, dtype=np.float64)
+        self.pending_samples = []
+        sample_count = len(samples)
+        origins = samples[:, np.newaxis, 0:2]
+        angles = np.radians(samples[:, 2:3]) + RANGE_SENSOR_ANGLES
+        directions = np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+        distances = samples[:, 3:] * RANGE_TO_METER
+        hits = distances < MAXIMUM_RANGE_METER
+        # Every sample, ray and step along the ray, indexed by [sample, ray, step]
+        sample_indices = np.broadcast_to(np.arange(sample_count)[:, np.newaxis, np.newaxis], (sample_count, 4, 1))
+
+        # The rays are sampled once per cell and stop one cell before the obstacle so it is not cleared
+        steps = np.arange(0.0, MAXIMUM_RANGE_METER, self.resolution)
+        along_ray = steps < (np.minimum(distances, MAXIMUM_RANGE_METER) - self.resolution)[..., np.newaxis]
+        ray_points = origins[:, :, np.newaxis, :] + directions[:, :, np.newaxis, :] * steps[:, np.newaxis]
+        free_cells = self.to_flat_cells(
+            ray_points[along_ray], np.broadcast_to(sample_indices, along_ray.shape)[along_ray]
+        )
+        hit_points = origins + directions * distances[..., np.newaxis]
+        occupied_cells = self.to_flat_cells(hit_points[hits], sample_indices[..., 0][hits])
+
+        # Counting the updates of every cell is much cheaper than np.add.at, and scanning the whole grid once per batch
+        # is cheap next to tracing the rays
+        cell_count = self.size * self.size
+        updates = np.bincount(free_cells, minlength=cell_count) * LOG_ODDS_FREE
+        updates += np.bincount(occupied_cells, minlength=cell_count) * LOG_ODDS_OCCUPIED
+        self.log_odds += updates.reshape(self.log_odds.shape).astype(np.float32)
+        np.clip(self.log_odds, -LOG_ODDS_LIMIT, LOG_ODDS_LIMIT, out=self.log_odds)
+        self.update_count += sample_count
+
+        touched_cells = np.concatenate((free_cells, occupied_cells))
+        pixel_rows, pixel_columns = self.size - 1 - touched_cells // self.size, touched_cells % self.size
+        touched_tiles = (pixel_rows // self.tile_size) * self.tiles_per_side + pixel_columns // self.tile_size
+        self.tile_versions.reshape(-1)[np.unique(touched_tiles)] += 1
+
+    def to_flat_cells(
+        self, points: npt.NDArray[np.float64], sample_indices: npt.NDArray[np.int_]
+    ) -> npt.NDArray[np.intp]:
+        """Flat indices of the cells containing the points, once per sample. The points outside of the grid are
+        dropped."""
+        cells = np.floor(points / self.resolution).astype(np.intp) + self.size // 2
+        inside = np.all((cells >= 0) & (cells < self.size), axis=1)
+        cell_count = self.size * self.size
+        keys = sample_indices[inside] * cell_count + cells[inside, 1] * self.size + cells[inside, 0]
+        flat_cells: npt.NDArray[np.intp] = np.unique(keys) % cell_count
+        return flat_cells
+
+    def to_pixels(self) -> npt.NDArray[np.uint8]:
+        """Free cells are white, occupied cells are black and unknown cells are gray. The first row is the north."""
+        self.apply_pending_samples()
+        return convert_log_odds_to_pixels(np.flipud(self.log_odds))
+
+    def to_png(self) -> bytes:
+        return encode_grayscale_png(self.to_pixels())
+
+    def get_tile_version(self, row: int, column: int) -> int:
+        self.apply_pending_samples()
+        return int(self.tile_versions[row, column])
+
+    def tile_to_png(self, row: int, column: int) -> bytes:
+        """Tiles on the south and east borders are smaller when the size of the grid is not a multiple of the tiles"""
+        self.apply_pending_samples()
+        first_row, first_column = row * self.tile_size, column * self.tile_size
+        last_row, last_column = first_row + self.tile_size, first_column + self.tile_size
+        return encode_grayscale_png(
+            convert_log_odds_to_pixels(np.flipud(self.log_odds)[first_row:last_row, first_column:last_column])
+        )
+
+
+def convert_log_odds_to_pixels(log_odds: npt.NDArray[np.float32]) -> npt.NDArray[np.uint8]:
+    occupancy = 1 / (1 + np.exp(-log_odds))
+    pixels: npt.NDArray[np.uint8] = ((1 - occupancy) * 255).astype(np.uint8)
+    return pixels
+
+
+def encode_png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def encode_grayscale_png(pixels: npt.NDArray[np.uint8]) -> bytes:
+    height, width = pixels.shape
+    # Every scanline starts with its filter type, 0 for none
+    scanlines = np.hstack((np.zeros((height, 1), dtype=np.uint8), pixels))
+    return b"".join(
+        (
+            PNG_SIGNATURE,
+            encode_png_chunk(b"IHDR", PNG_GRAYSCALE_HEADER.pack(width, height, 8, 0, 0, 0, 0)),
+            encode_png_chunk(b"IDAT", zlib.compress(scanlines.tobytes())),
+            encode_png_chunk(b"IEND", b""),
+        )
+    )
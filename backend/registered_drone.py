@@ -1,11 +1,12 @@
-from dataclasses import dataclass
 from functools import singledispatchmethod
-from math import sqrt
-from typing import Optional
+from math import dist
+from typing import Final, Optional
 
 from backend.communication.argos_drone_link import ArgosDroneLink
+from backend.communication.argos_multiplexed_drone_link import ArgosMultiplexedDroneLink
 from backend.communication.command import Command
 from backend.communication.drone_link import DroneLink
+from backend.communication.drone_mailbox import DroneMailbox
 from backend.communication.log_message import (
     BatteryAndPositionLogMessage,
     FullLogMessage,
@@ -24,37 +25,132 @@ from backend.models.drone import (
     DroneVec3,
 )
 
+GROUNDED_STATES: Final = (DroneState.NOT_READY, DroneState.READY, DroneState.CRASHED)
+
+
+def get_drone_type(link: DroneLink) -> DroneType:
+    return DroneType.ARGOS if isinstance(link, (ArgosDroneLink, ArgosMultiplexedDroneLink)) else DroneType.CRAZYFLIE
+
 
-@dataclass
 class RegisteredDrone:
-    id: int
-    link: DroneLink
-    state: DroneState = DroneState.NOT_READY
-    battery: DroneBattery = DroneBattery(charge_percentage=0, voltage=0.0)
-    position: DroneVec3 = DroneVec3(x=0.0, y=0.0, z=0.0)
-    orientation: DroneOrientation = DroneOrientation(yaw=0.0)
-    range: DroneRange = DroneRange(front=0.0, back=0.0, up=0.0, left=0.0, right=0.0, bottom=0.0)
-    active_mission_id: Optional[int] = None
-    total_distance: float = 0.0
+    """The live state is kept as plain numbers in slots, so applying a telemetry sample builds no object. The numbers
+    are coerced to the types of the models when they are stored, like pydantic would, so the models are built without
+    validation when they are read."""
+
+    __slots__ = (
+        "id",
+        "link",
+        "drone_type",
+        "state",
+        "charge_percentage",
+        "x",
+        "y",
+        "z",
+        "yaw",
+        "range_front",
+        "range_back",
+        "range_up",
+        "range_left",
+        "range_right",
+        "range_bottom",
+        "active_mission_id",
+        "total_distance",
+        "mailbox",
+        "telemetry_log_sampling",
+        "telemetry_log_count",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        link: DroneLink,
+        state: DroneState = DroneState.NOT_READY,
+        battery: DroneBattery = DroneBattery(charge_percentage=0),
+        position: DroneVec3 = DroneVec3(x=0.0, y=0.0, z=0.0),
+        orientation: DroneOrientation = DroneOrientation(yaw=0.0),
+        range: DroneRange = DroneRange(front=0, back=0, up=0, left=0, right=0, bottom=0),
+        active_mission_id: Optional[int] = None,
+        total_distance: float = 0.0,
+        mailbox: Optional[DroneMailbox] = None,
+        telemetry_log_sampling: int = 1,
+        telemetry_log_count: int = 0,
+    ) -> None:
+        self.id = id
+        self.link = link
+        # The link of a drone never changes, so neither does its type
+        self.drone_type = get_drone_type(link)
+        self.state = state
+        self.battery = battery
+        self.position = position
+        self.orientation = orientation
+        self.range = range
+        self.active_mission_id = active_mission_id
+        self.total_distance = total_distance
+        self.mailbox = mailbox
+        self.telemetry_log_sampling = telemetry_log_sampling
+        self.telemetry_log_count = telemetry_log_count
+
+    def __repr__(self) -> str:
+        return f"RegisteredDrone(id={self.id}, state={self.state}, active_mission_id={self.active_mission_id})"
+
+    @property
+    def battery(self) -> DroneBattery:
+        return DroneBattery.construct(charge_percentage=self.charge_percentage)
+
+    @battery.setter
+    def battery(self, battery: DroneBattery) -> None:
+        self.charge_percentage = int(battery.charge_percentage)
+
+    @property
+    def position(self) -> DroneVec3:
+        return DroneVec3.construct(x=self.x, y=self.y, z=self.z)
+
+    @position.setter
+    def position(self, position: DroneVec3) -> None:
+        self.x, self.y, self.z = float(position.x), float(position.y), float(position.z)
+
+    @property
+    def orientation(self) -> DroneOrientation:
+        return DroneOrientation.construct(yaw=self.yaw)
+
+    @orientation.setter
+    def orientation(self, orientation: DroneOrientation) -> None:
+        self.yaw = float(orientation.yaw)
+
+    @property
+    def range(self) -> DroneRange:
+        return DroneRange.construct(
+            front=self.range_front,
+            back=self.range_back,
+            up=self.range_up,
+            left=self.range_left,
+            right=self.range_right,
+            bottom=self.range_bottom,
+        )
+
+    @range.setter
+    def range(self, drone_range: DroneRange) -> None:
+        self.range_front, self.range_back, self.range_up = (
+            int(drone_range.front),
+            int(drone_range.back),
+            int(drone_range.up),
+        )
+        self.range_left, self.range_right, self.range_bottom = (
+            int(drone_range.left),
+            int(drone_range.right),
+            int(drone_range.bottom),
+        )
 
     def get_active_mission_id_or_raise(self) -> int:
         assert self.active_mission_id
         return self.active_mission_id
 
-    def get_distance_relative_to_current_position(self, new_position: DroneVec3) -> float:
-        return sqrt(
-            (new_position.x - self.position.x) ** 2
-            + (new_position.y - self.position.y) ** 2
-            + (new_position.z - self.position.z) ** 2
-        )
-
-    @property
-    def drone_type(self) -> DroneType:
-        return DroneType.ARGOS if isinstance(self.link, ArgosDroneLink) else DroneType.CRAZYFLIE
+    def get_distance_relative_to_current_position(self, x: float, y: float, z: float) -> float:
+        return dist((self.x, self.y, self.z), (x, y, z))
 
     @property
     def is_flying(self) -> bool:
-        return self.state not in (DroneState.NOT_READY, DroneState.READY, DroneState.CRASHED)
+        return self.state not in GROUNDED_STATES
 
     @singledispatchmethod
     def update_from_log_message(self, log_message: LogMessage) -> None:
@@ -62,24 +158,33 @@ class RegisteredDrone:
 
     @update_from_log_message.register
     def _update_battery_and_position(self, log_message: BatteryAndPositionLogMessage) -> None:
-        self.battery = DroneBattery(charge_percentage=log_message.drone_battery_level)
-        new_position = DroneVec3(
-            x=log_message.kalman_state_x, y=log_message.kalman_state_y, z=log_message.kalman_state_z
+        self.total_distance += self.get_distance_relative_to_current_position(
+            log_message.kalman_state_x, log_message.kalman_state_y, log_message.kalman_state_z
         )
-        self.total_distance += self.get_distance_relative_to_current_position(new_position)
-        self.position = new_position
-        self.orientation = DroneOrientation(yaw=log_message.state_estimate_yaw)
+        self._set_battery_and_position(log_message)
+
+    def _set_battery_and_position(self, log_message: BatteryAndPositionLogMessage) -> None:
+        # The decoders do not coerce the values, Argos sends them as JSON numbers of any type
+        self.charge_percentage = int(log_message.drone_battery_level)
+        self.x, self.y, self.z = (
+            float(log_message.kalman_state_x),
+            float(log_message.kalman_state_y),
+            float(log_message.kalman_state_z),
+        )
+        self.yaw = float(log_message.state_estimate_yaw)
         self.state = STATES[log_message.drone_state]
 
     @update_from_log_message.register
     def _update_range(self, log_message: RangeLogMessage) -> None:
-        self.range = DroneRange(
-            front=log_message.range_front,
-            back=log_message.range_back,
-            up=log_message.range_up,
-            left=log_message.range_left,
-            right=log_message.range_right,
-            bottom=log_message.range_zrange,
+        self.range_front, self.range_back, self.range_up = (
+            int(log_message.range_front),
+            int(log_message.range_back),
+            int(log_message.range_up),
+        )
+        self.range_left, self.range_right, self.range_bottom = (
+            int(log_message.range_left),
+            int(log_message.range_right),
+            int(log_message.range_zrange),
         )
 
     @update_from_log_message.register
@@ -87,11 +192,38 @@ class RegisteredDrone:
         self._update_battery_and_position(log_message)
         self._update_range(log_message)
 
+    def apply_mailbox(self) -> None:
+        """When live state is coalesced, only the newest messages are applied, however long the inbound queue is"""
+        if not self.mailbox:
+            return
+
+        position_message, range_message, distance = self.mailbox.take()
+        self.total_distance += distance
+        if position_message:
+            self._set_battery_and_position(position_message)
+        if range_message:
+            self._update_range(range_message)
+
+    def should_log_telemetry(self) -> bool:
+        """Only every Nth telemetry message is logged, starting with the first one, none when the sampling is 0"""
+        if not self.telemetry_log_sampling:
+            return False
+
+        should_log = self.telemetry_log_count % self.telemetry_log_sampling == 0
+        self.telemetry_log_count += 1
+        return should_log
+
+    def reset_total_distance(self) -> None:
+        self.apply_mailbox()
+        self.total_distance = 0.0
+
     async def set_position(self, new_position: DronePositionOrientation) -> None:
         await self.link.send_command_with_payload(Command.SET_POSITION, new_position.json().encode("utf-8"))
 
     def to_model(self) -> Drone:
-        return Drone(
+        """The numbers were coerced when they were stored, validating them again would only copy them. The mailbox is left
+        to the registry, which marks the drone as changed when it is applied."""
+        return Drone.construct(
             id=self.id,
             state=self.state,
             type=self.drone_type,
@@ -1,70 +1,254 @@
-from asyncio import Queue
+import json
 from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Generator, Optional
+from typing import Any, Final, Generator, Optional
 
+from coveo_settings import IntSetting, StringSetting
+
+from backend.bounded_queue import BoundedQueue, QueuePolicy
 from backend.communication.log_message import CrazyflieDebugMessage, LogMessage
+from backend.database.buffered_writer import BatchStatistics, DroneMetricsWriter
 from backend.database.models import SavedLog
+from backend.drone_state_publisher import DroneStatePublisher
+from backend.fleet_state_table import FleetStateTable, create_fleet_state_table
+from backend.log_publisher import LogPublisher
+from backend.lru_cache import LruCache
 from backend.models.drone import DroneType
+from backend.models.mission import Map
+from backend.models.statistics import InboundShardStatistics, QueueStatistics
+from backend.occupancy_grid import OccupancyGrid
 from backend.registered_drone import RegisteredDrone
+from backend.statistics import ThroughputStatistics
 from backend.tasks.backend_task import BackendTask
 
+INBOUND_LOG_SHARD_COUNT: Final = IntSetting("inbound.shard_count", fallback=4)
+SAVED_MAP_CACHE_SIZE: Final = IntSetting("cache.saved_maps", fallback=32)
+OCCUPANCY_TILE_CACHE_SIZE: Final = IntSetting("cache.occupancy_tiles", fallback=1024)
+
+
+@dataclass
+class QueueConfiguration:
+    maxsize: IntSetting
+    policy: StringSetting
+
+    def create_queue(self) -> BoundedQueue[Any]:
+        return BoundedQueue(int(self.maxsize), QueuePolicy(str(self.policy)))
+
+
+# The inbound log maximum size applies to every shard
+QUEUE_CONFIGURATIONS: Final = {
+    "inbound_log": QueueConfiguration(
+        IntSetting("queues.inbound_log.maxsize", fallback=10000),
+        StringSetting("queues.inbound_log.policy", fallback=QueuePolicy.DROP_OLDEST.value),
+    ),
+    "logging": QueueConfiguration(
+        IntSetting("queues.logging.maxsize", fallback=10000),
+        StringSetting("queues.logging.policy", fallback=QueuePolicy.DROP_OLDEST.value),
+    ),
+    "crazyflie_debug": QueueConfiguration(
+        IntSetting("queues.crazyflie_debug.maxsize", fallback=1000),
+        StringSetting("queues.crazyflie_debug.policy", fallback=QueuePolicy.DROP_OLDEST.value),
+    ),
+    "mission_termination": QueueConfiguration(
+        IntSetting("queues.mission_termination.maxsize", fallback=100),
+        StringSetting("queues.mission_termination.policy", fallback=QueuePolicy.DROP_NEWEST.value),
+    ),
+}
+
 
 @dataclass
 class Registry:
     drones: dict[int, RegisteredDrone] = field(default_factory=dict)
+    # The same drones indexed by type, kept up to date by register_drone and unregister_drone
+    drones_by_type: dict[DroneType, dict[int, RegisteredDrone]] = field(
+        default_factory=lambda: {drone_type: {} for drone_type in DroneType}
+    )
+    # Ids of the drones whose live state is coalesced in a mailbox, which can be newer than their last processed message
+    mailbox_drone_ids: set[int] = field(default_factory=set)
+    # Ids of the drones that were flying when their latest message was processed, by type
+    flying_drone_ids: dict[DroneType, set[int]] = field(
+        default_factory=lambda: {drone_type: set() for drone_type in DroneType}
+    )
     backend_tasks: list[BackendTask] = field(default_factory=list)
+    drone_metrics_writer: DroneMetricsWriter = field(default_factory=DroneMetricsWriter)
+    log_writer_statistics: BatchStatistics = field(default_factory=BatchStatistics)
+    log_publisher: LogPublisher = field(default_factory=LogPublisher)
+    # Optional copy of the live state of the drones as arrays, kept up to date by mark_drone_changed
+    fleet_state_table: Optional[FleetStateTable] = field(default_factory=create_fleet_state_table)
+    # Bumped whenever the state of a drone changes, or when a drone is registered or unregistered
+    drones_version: int = 0
+    drone_state_publisher: DroneStatePublisher = field(default_factory=DroneStatePublisher)
+    occupancy_grids: dict[int, OccupancyGrid] = field(default_factory=dict)
+    # ETag and model of the saved maps, by mission id
+    saved_map_cache: LruCache[int, tuple[str, Map]] = field(default_factory=lambda: LruCache(int(SAVED_MAP_CACHE_SIZE)))
+    # PNG of the occupancy tiles, by mission id, row, column and version
+    occupancy_tile_cache: LruCache[tuple[int, int, int, int], bytes] = field(
+        default_factory=lambda: LruCache(int(OCCUPANCY_TILE_CACHE_SIZE))
+    )
 
     active_argos_mission_id: Optional[int] = None
     active_crazyflie_mission_id: Optional[int] = None
 
-    _crazyflie_debug_queue: Optional[Queue[CrazyflieDebugMessage]] = None
-    _inbound_log_message_queue: Optional[Queue[LogMessage]] = None
-    _logging_queue: Optional[Queue[SavedLog]] = None
-    _mission_termination_queue: Optional[Queue[DroneType]] = None
+    _crazyflie_debug_queue: Optional[BoundedQueue[CrazyflieDebugMessage]] = None
+    _inbound_log_message_queues: list[BoundedQueue[LogMessage]] = field(default_factory=list)
+    inbound_shard_statistics: list[ThroughputStatistics] = field(default_factory=list)
+    _logging_queue: Optional[BoundedQueue[SavedLog]] = None
+    _mission_termination_queue: Optional[BoundedQueue[DroneType]] = None
+    # Version and JSON body of the drones, by drone type filter
+    _drones_json_cache: dict[Optional[DroneType], tuple[int, bytes]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for drone in self.drones.values():
+            self.drones_by_type[drone.drone_type][drone.id] = drone
+            if drone.mailbox:
+                self.mailbox_drone_ids.add(drone.id)
+            if self.fleet_state_table:
+                self.fleet_state_table.add(drone)
+
+    def get_occupancy_grid(self, mission_id: int) -> OccupancyGrid:
+        if (occupancy_grid := self.occupancy_grids.get(mission_id)) is None:
+            occupancy_grid = self.occupancy_grids[mission_id] = OccupancyGrid()
+        return occupancy_grid
 
     def get_drone(self, drone_id: int) -> Optional[RegisteredDrone]:
         return self.drones.get(drone_id)
 
     def get_drones(self, drone_type: Optional[DroneType]) -> Generator[RegisteredDrone, None, None]:
-        if drone_type:
-            yield from self.argos_drones if drone_type == DroneType.ARGOS else self.crazyflie_drones
+        yield from (self.drones_by_type[drone_type] if drone_type else self.drones).values()
+
+    def count_drones(self, drone_type: DroneType) -> int:
+        return len(self.drones_by_type[drone_type])
+
+    def record_flying_state(self, drone: RegisteredDrone) -> bool:
+        """Keep track of the flying drones as their messages are processed, so no drone is scanned to know whether a
+        type still has drones flying. Return whether the drone is flying."""
+        flying_drone_ids = self.flying_drone_ids[drone.drone_type]
+        if is_flying := drone.is_flying:
+            flying_drone_ids.add(drone.id)
         else:
-            yield from self.drones.values()
+            flying_drone_ids.discard(drone.id)
+        return is_flying
+
+    def has_flying_drones(self, drone_type: DroneType) -> bool:
+        return bool(self.flying_drone_ids[drone_type])
 
     @property
-    def crazyflie_debug_queue(self) -> Queue[CrazyflieDebugMessage]:
+    def crazyflie_debug_queue(self) -> BoundedQueue[CrazyflieDebugMessage]:
         assert self._crazyflie_debug_queue
         return self._crazyflie_debug_queue
 
     @property
-    def inbound_log_queue(self) -> Queue[LogMessage]:
-        assert self._inbound_log_message_queue
-        return self._inbound_log_message_queue
+    def inbound_log_queues(self) -> list[BoundedQueue[LogMessage]]:
+        assert self._inbound_log_message_queues
+        return self._inbound_log_message_queues
+
+    def get_inbound_log_queue(self, drone_id: int) -> BoundedQueue[LogMessage]:
+        """Messages are partitioned by drone so each drone is always processed, in order, by the same shard"""
+        return self.inbound_log_queues[hash(drone_id) % len(self.inbound_log_queues)]
+
+    def get_inbound_shard_statistics(self) -> list[InboundShardStatistics]:
+        return [
+            InboundShardStatistics(
+                shard=shard,
+                queue_depth=queue.qsize(),
+                processed_messages=statistics.processed,
+                processing_rate=statistics.current_rate,
+            )
+            for shard, (queue, statistics) in enumerate(
+                zip(self._inbound_log_message_queues, self.inbound_shard_statistics)
+            )
+        ]
+
+    def get_queue_statistics(self) -> dict[str, QueueStatistics]:
+        queues: dict[str, Optional[BoundedQueue[Any]]] = {
+            "logging": self._logging_queue,
+            "crazyflie_debug": self._crazyflie_debug_queue,
+            "mission_termination": self._mission_termination_queue,
+        }
+        queues |= {f"inbound_log_{shard}": queue for shard, queue in enumerate(self._inbound_log_message_queues)}
+        return {name: queue.to_model() for name, queue in queues.items() if queue}
 
     @property
-    def logging_queue(self) -> Queue[SavedLog]:
+    def logging_queue(self) -> BoundedQueue[SavedLog]:
         assert self._logging_queue
         return self._logging_queue
 
     @property
-    def mission_termination_queue(self) -> Queue[DroneType]:
+    def mission_termination_queue(self) -> BoundedQueue[DroneType]:
         assert self._mission_termination_queue
         return self._mission_termination_queue
 
     async def initialize_queues(self) -> None:
         """The lazy initialization is needed to map the Queue to the correct event loop"""
-        self._inbound_log_message_queue = Queue()
-        self._logging_queue = Queue()
-        self._crazyflie_debug_queue = Queue()
-        self._mission_termination_queue = Queue()
+        shard_count = max(int(INBOUND_LOG_SHARD_COUNT), 1)
+        self._inbound_log_message_queues = [
+            QUEUE_CONFIGURATIONS["inbound_log"].create_queue() for _ in range(shard_count)
+        ]
+        self.inbound_shard_statistics = [ThroughputStatistics() for _ in range(shard_count)]
+        self._logging_queue = QUEUE_CONFIGURATIONS["logging"].create_queue()
+        self._crazyflie_debug_queue = QUEUE_CONFIGURATIONS["crazyflie_debug"].create_queue()
+        self._mission_termination_queue = QUEUE_CONFIGURATIONS["mission_termination"].create_queue()
 
     def register_drone(self, drone: RegisteredDrone) -> None:
+        if replaced_drone := self.drones.get(drone.id):
+            self.unregister_drone(replaced_drone)
         self.drones[drone.id] = drone
+        self.drones_by_type[drone.drone_type][drone.id] = drone
+        if drone.mailbox:
+            self.mailbox_drone_ids.add(drone.id)
+        if self.fleet_state_table:
+            self.fleet_state_table.add(drone)
+        self.mark_drone_changed(drone.id)
 
     def unregister_drone(self, drone: RegisteredDrone) -> None:
         if self.drones.get(drone.id):
             del self.drones[drone.id]
+            self.drones_by_type[drone.drone_type].pop(drone.id, None)
+            self.flying_drone_ids[drone.drone_type].discard(drone.id)
+            self.mailbox_drone_ids.discard(drone.id)
+            if self.fleet_state_table:
+                self.fleet_state_table.remove(drone.id)
+            self.mark_drone_changed(drone.id)
+
+    def mark_drone_changed(self, drone_id: int) -> None:
+        self.drones_version += 1
+        self.drone_state_publisher.mark_changed(drone_id)
+        if self.fleet_state_table and (drone := self.drones.get(drone_id)):
+            self.fleet_state_table.update(drone)
+
+    def get_fleet_state_table(self) -> FleetStateTable:
+        """Without the live table, a table is built from the drones for the query"""
+        return self.fleet_state_table or FleetStateTable.from_drones(self.drones.values())
+
+    def get_total_distance(self, drone_type: DroneType) -> float:
+        if self.fleet_state_table:
+            return self.fleet_state_table.get_total_distance(drone_type)
+        return sum(drone.total_distance for drone in self.get_drones(drone_type))
+
+    def apply_pending_mailboxes(self) -> None:
+        """The mailboxes are posted to as soon as a message is received, before the consumer of the shard processes it,
+        so the live view does not lag behind a stalled consumer"""
+        for drone_id in self.mailbox_drone_ids:
+            self.apply_pending_mailbox(self.drones[drone_id])
+
+    def apply_pending_mailbox(self, drone: RegisteredDrone) -> None:
+        if drone.mailbox and drone.mailbox.has_pending:
+            drone.apply_mailbox()
+            self.mark_drone_changed(drone.id)
+
+    def get_drones_json(self, drone_type: Optional[DroneType]) -> bytes:
+        """The drones are serialized once per version and filter, the polls in between only look the body up"""
+        self.apply_pending_mailboxes()
+        version, body = self._drones_json_cache.get(drone_type, (-1, b""))
+        if version != self.drones_version:
+            drones = (
+                self.fleet_state_table.to_drone_dicts(drone_type)
+                if self.fleet_state_table
+                else [drone.to_model().dict() for drone in self.get_drones(drone_type)]
+            )
+            body = json.dumps(drones, separators=(",", ":")).encode("utf-8")
+            self._drones_json_cache[drone_type] = (self.drones_version, body)
+        return body
 
     def register_task(self, task: BackendTask) -> None:
         self.backend_tasks.append(task)
@@ -82,6 +266,10 @@ class Registry:
             self.active_crazyflie_mission_id = mission_id
 
     def clear_active_mission_id(self, drone_type: DroneType) -> None:
+        """The occupancy grid of a mission is only kept while it is active, so the grids do not pile up. It is saved as
+        the map of the mission before the mission is cleared."""
+        if (mission_id := self.get_active_mission_id(drone_type)) is not None:
+            self.occupancy_grids.pop(mission_id, None)
         if drone_type == DroneType.ARGOS:
             self.active_argos_mission_id = None
         else:
@@ -89,11 +277,11 @@ class Registry:
 
     @property
     def argos_drones(self) -> Generator[RegisteredDrone, None, None]:
-        return (drone for drone in self.drones.values() if drone.drone_type == DroneType.ARGOS)
+        return (drone for drone in self.drones_by_type[DroneType.ARGOS].values())
 
     @property
     def crazyflie_drones(self) -> Generator[RegisteredDrone, None, None]:
-        return (drone for drone in self.drones.values() if drone.drone_type == DroneType.CRAZYFLIE)
+        return (drone for drone in self.drones_by_type[DroneType.CRAZYFLIE].values())
 
 
 @lru_cache(maxsize=None)
@@ -1,47 +1,182 @@
-from typing import Optional
+import asyncio
+import json
+import zlib
+from http import HTTPStatus
+from typing import AsyncGenerator, Final, Optional, Union
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.engine import Row
 
+from backend.columnar_export import COLUMNAR_MEDIA_TYPE, encode_columnar_metrics
 from backend.communication.command import Command
 from backend.communication.communication import send_command_to_all_drones
+from backend.communication.crazyflie_drone_link import CrazyflieDroneLink
+from backend.database.models import SavedMap
 from backend.database.statements import (
     create_drones_mission_association,
     create_new_mission,
+    create_saved_compressed_map,
     create_saved_map,
     get_all_missions,
     get_drones_metadata,
+    get_drones_metadata_columns,
     get_log_message,
     get_mission,
-    get_saved_map,
+    get_saved_map_model,
+    stream_drones_metadata,
     update_mission_state,
 )
+from backend.downsampling import DownsamplingMethod
+from backend.drone_state_publisher import DroneStatePublisher
 from backend.exceptions.response import (
     DroneNotFoundException,
     InvalidMissionStateException,
+    MapNotFoundException,
+    MapTooLargeException,
     MissionIsAlreadyActiveException,
+    TileNotFoundException,
+    UnsupportedContentEncodingException,
 )
-from backend.models.drone import Drone, DronePositionOrientation, DronePositionOrientationRange, DroneType
-from backend.models.mission import Log, Map, Mission, MissionState
+from backend.log_publisher import encode_log_event
+from backend.models.drone import (
+    Drone,
+    DronePositionOrientation,
+    DronePositionOrientationRange,
+    DroneType,
+    DroneVec3,
+    FleetSummary,
+)
+from backend.models.mission import Log, Map, Mission, MissionState, OccupancyTiles
+from backend.models.statistics import Statistics
+from backend.occupancy_grid import OccupancyGrid
 from backend.registry import get_registry
-from backend.routers.utils import generate_responses_documentation
+from backend.routers.utils import generate_responses_documentation, matches_etag
+
+LOGS_MAXIMUM_LIMIT: Final = 10000
+NEXT_STARTING_ID_HEADER: Final = "X-Next-Starting-Id"
+JSON_MEDIA_TYPE: Final = "application/json"
+MAP_MEDIA_TYPE: Final = "application/octet-stream"
+MAP_CONTENT_ENCODING: Final = "deflate"
+MAP_MAXIMUM_SIZE_BYTE: Final = 64 * 1024 * 1024
+OCCUPANCY_MAP_MEDIA_TYPE: Final = "image/png"
+DRONE_STATE_CLIENT_INTERVAL_SECOND: Final = 0.25
+LOG_STREAM_MEDIA_TYPE: Final = "text/event-stream"
+# Keeps the proxies from closing a stream of a mission without new logs
+LOG_STREAM_KEEPALIVE_SECOND: Final = 15.0
 
 router = APIRouter(tags=["common"])
 
 
 @router.get("/drones", operation_id="get_drones", response_model=list[Drone])
-async def drones(drone_type: Optional[DroneType] = None) -> list[Drone]:
+async def drones(drone_type: Optional[DroneType] = None) -> Response:
     """Retrieve all the currently registered drones. You can also filter which type of drone you want."""
-    return list(map(lambda drone: drone.to_model(), get_registry().get_drones(drone_type)))
+    return Response(get_registry().get_drones_json(drone_type), media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/drones/fleet", operation_id="get_fleet_summary", response_model=FleetSummary)
+async def fleet_summary(
+    drone_type: Optional[DroneType] = None, min_separation: float = Query(0.5, gt=0.0)
+) -> FleetSummary:
+    """Summarize the fleet: the drones flying, the distance travelled, the box holding the drones and the pairs of
+    drones closer than min_separation meters"""
+    fleet_state_table = get_registry().get_fleet_state_table()
+    minimum_position: Optional[DroneVec3] = None
+    maximum_position: Optional[DroneVec3] = None
+    if bounding_box := fleet_state_table.get_bounding_box(drone_type):
+        minimum_position, maximum_position = (DroneVec3(x=x, y=y, z=z) for x, y, z in bounding_box)
+    return FleetSummary(
+        drone_count=fleet_state_table.count_drones(drone_type),
+        flying_drone_count=fleet_state_table.count_flying_drones(drone_type),
+        total_distance=fleet_state_table.get_total_distance(drone_type),
+        minimum_position=minimum_position,
+        maximum_position=maximum_position,
+        close_pairs=fleet_state_table.get_close_pairs(min_separation, drone_type),
+    )
+
+
+@router.websocket("/ws/drones")
+async def push_drones(
+    websocket: WebSocket, interval: float = Query(DRONE_STATE_CLIENT_INTERVAL_SECOND, ge=0.0)
+) -> None:
+    """Push the registered drones, first as a snapshot of every drone and then as the fields that changed, at most once
+    every interval. A subscriber that missed a frame gets a new snapshot instead of the deltas."""
+    await websocket.accept()
+    publisher = get_registry().drone_state_publisher
+    with publisher.subscribe():
+        sender = asyncio.create_task(send_drone_state_frames(websocket, publisher, interval))
+        try:
+            # The messages of the subscribers are ignored, receiving them is only needed to notice the disconnection
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+
+
+async def send_drone_state_frames(websocket: WebSocket, publisher: DroneStatePublisher, interval: float) -> None:
+    version: Optional[int] = None
+    while True:
+        frame, version = await publisher.wait_for_frame(version)
+        await websocket.send_text(frame)
+        await asyncio.sleep(interval)
 
 
 @router.get(
     "/drones/metadata",
     operation_id="get_drones_metadata",
     response_model=dict[int, list[DronePositionOrientationRange]],
+    responses={200: {"content": {COLUMNAR_MEDIA_TYPE: {}}}},
 )
-async def drones_metadata(mission_id: int) -> dict[int, list[DronePositionOrientationRange]]:
-    """Retrieve all the currently registered drones. You can also filter which type of drone you want."""
-    return await get_drones_metadata(mission_id)
+async def drones_metadata(
+    mission_id: int,
+    max_points: Optional[int] = Query(None, ge=2),
+    method: DownsamplingMethod = DownsamplingMethod.STRIDE,
+    accept: Optional[str] = Header(None),
+) -> Union[dict[int, list[DronePositionOrientationRange]], Response]:
+    """Retrieve the metrics of every drone of the mission. Send an Accept header of
+    application/vnd.argos.metrics.columnar to get them as little-endian float32 columns for every drone instead.
+    With max_points, every drone keeps at most that many samples: one every N samples with stride, the average of
+    consecutive samples with bucket_average, or the samples that best keep the shape of the path with lttb."""
+    if accept and COLUMNAR_MEDIA_TYPE in accept:
+        metrics = await get_drones_metadata_columns(mission_id, max_points, method)
+        return Response(encode_columnar_metrics(metrics), media_type=COLUMNAR_MEDIA_TYPE)
+
+    return await get_drones_metadata(mission_id, max_points, method)
+
+
+def format_drone_metadata_line(row: Row) -> str:
+    metadata = {
+        "drone_id": row.drone_id,
+        "position": {"x": row.x, "y": row.y, "z": row.z},
+        "orientation": {"yaw": row.yaw},
+        "range": {
+            "front": row.front,
+            "back": row.back,
+            "up": row.up,
+            "left": row.left,
+            "right": row.right,
+            "bottom": row.bottom,
+        },
+    }
+    return json.dumps(metadata, separators=(",", ":")) + "\n"
+
+
+async def generate_drones_metadata_lines(mission_id: int) -> AsyncGenerator[str, None]:
+    async for rows in stream_drones_metadata(mission_id):
+        yield "".join(map(format_drone_metadata_line, rows))
+
+
+@router.get(
+    "/drones/metadata/stream",
+    operation_id="stream_drones_metadata",
+    response_class=StreamingResponse,
+)
+async def drones_metadata_stream(mission_id: int) -> StreamingResponse:
+    """Stream the metrics of every drone of the mission as newline delimited JSON, one line per metric in the order they
+    were saved. Unlike /drones/metadata, the memory used does not grow with the length of the mission."""
+    return StreamingResponse(generate_drones_metadata_lines(mission_id), media_type="application/x-ndjson")
 
 
 @router.post(
@@ -51,30 +186,250 @@ async def drones_metadata(mission_id: int) -> dict[int, list[DronePositionOrient
     responses=generate_responses_documentation(DroneNotFoundException),
 )
 async def set_drone_position(drone_id: int, new_position: DronePositionOrientation) -> Drone:
-    drone = get_registry().get_drone(drone_id)
+    registry = get_registry()
+    drone = registry.get_drone(drone_id)
     if not drone:
         raise DroneNotFoundException(drone_id)
 
     await drone.set_position(new_position)
+    registry.apply_pending_mailbox(drone)
     return drone.to_model()
 
 
 @router.get("/logs", operation_id="get_logs", response_model=list[Log])
-async def get_logs(mission_id: int, starting_id: int = 0) -> list[Log]:
-    return await get_log_message(mission_id, starting_id)
+async def get_logs(
+    response: Response,
+    mission_id: int,
+    starting_id: int = 0,
+    limit: Optional[int] = Query(None, ge=1, le=LOGS_MAXIMUM_LIMIT),
+) -> list[Log]:
+    """Retrieve the logs of the mission starting with starting_id, at most limit of them when it is given. The next
+    poll should start with the id returned in the X-Next-Starting-Id header."""
+    logs = await get_log_message(mission_id, starting_id, limit)
+    response.headers[NEXT_STARTING_ID_HEADER] = str(logs[-1].id + 1 if logs else starting_id)
+    return logs
+
+
+@router.get(
+    "/logs/stream",
+    operation_id="stream_logs",
+    response_class=StreamingResponse,
+    responses={200: {"content": {LOG_STREAM_MEDIA_TYPE: {}}}},
+)
+async def stream_logs(
+    mission_id: int, starting_id: int = 0, last_event_id: Optional[int] = Header(None)
+) -> StreamingResponse:
+    """Follow the logs of the mission as server-sent events, starting with starting_id. The logs already written are
+    read from the database, then the new logs are pushed as they are written. A client that reconnects with a
+    Last-Event-ID header resumes after that log."""
+    if last_event_id is not None:
+        starting_id = last_event_id + 1
+
+    return StreamingResponse(
+        generate_log_events(mission_id, starting_id),
+        media_type=LOG_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def generate_log_events(mission_id: int, starting_id: int) -> AsyncGenerator[str, None]:
+    """The stream subscribes before catching up, so the logs written meanwhile are queued. The logs sent by both are
+    skipped the second time."""
+    with get_registry().log_publisher.subscribe(mission_id) as subscriber:
+        next_id = starting_id
+        catching_up = True
+        while True:
+            if catching_up or subscriber.lagging:
+                subscriber.reset()
+                while logs := await get_log_message(mission_id, next_id, LOGS_MAXIMUM_LIMIT):
+                    yield "".join(encode_log_event(log) for log in logs)
+                    next_id = logs[-1].id + 1
+                    if len(logs) < LOGS_MAXIMUM_LIMIT:
+                        break
+                catching_up = False
+                continue
+
+            try:
+                chunk = await asyncio.wait_for(subscriber.queue.get(), LOG_STREAM_KEEPALIVE_SECOND)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if chunk.last_id < next_id:
+                continue
+            yield chunk.text if chunk.first_id >= next_id else "".join(
+                event for log_id, event in chunk.events if log_id >= next_id
+            )
+            next_id = chunk.last_id + 1
 
 
-@router.get("/map", operation_id="get_map", response_model=Map)
-async def get_map(mission_id: int) -> Map:
-    return await get_saved_map(mission_id)
+@router.get(
+    "/map",
+    operation_id="get_map",
+    response_model=Map,
+    responses=generate_responses_documentation(MapNotFoundException),
+)
+async def get_map(
+    response: Response, mission_id: int, if_none_match: Optional[str] = Header(None)
+) -> Union[Map, Response]:
+    """Retrieve the saved map of the mission with its ETag. Saved maps are kept in memory, so a request for a map the
+    client already has is answered with 304 without touching the database."""
+    registry = get_registry()
+    if not (cached_map := registry.saved_map_cache.get(mission_id)):
+        if not (saved_map := await get_saved_map_model(mission_id)):
+            raise MapNotFoundException(mission_id)
+        cached_map = (saved_map.etag, saved_map.to_model())
+        registry.saved_map_cache.put(mission_id, cached_map)
 
+    etag, map_model = cached_map
+    if matches_etag(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
 
-@router.post("/map", operation_id="create_map", response_model=int)
+    response.headers["ETag"] = etag
+    return map_model
+
+
+@router.get(
+    "/map/raw",
+    operation_id="get_raw_map",
+    response_class=Response,
+    responses={
+        200: {"content": {MAP_MEDIA_TYPE: {}}},
+        **generate_responses_documentation(MapNotFoundException),
+    },
+)
+async def get_raw_map(mission_id: int, accept_encoding: Optional[str] = Header(None)) -> Response:
+    """Retrieve the bytes of the map image. Clients accepting the deflate encoding get the map as it is stored."""
+    if not (saved_map := await get_saved_map_model(mission_id)):
+        raise MapNotFoundException(mission_id)
+
+    if accept_encoding and MAP_CONTENT_ENCODING in accept_encoding:
+        return Response(saved_map.map, media_type=MAP_MEDIA_TYPE, headers={"Content-Encoding": MAP_CONTENT_ENCODING})
+    return Response(saved_map.raw_map, media_type=MAP_MEDIA_TYPE)
+
+
+@router.post(
+    "/map",
+    operation_id="create_map",
+    response_model=int,
+)
 async def create_map(map_to_save: Map) -> int:
     await create_saved_map(map_to_save)
+    get_registry().saved_map_cache.invalidate(map_to_save.mission_id)
     return map_to_save.mission_id
 
 
+@router.get(
+    "/map/occupancy",
+    operation_id="get_occupancy_map",
+    response_class=Response,
+    responses={
+        200: {"content": {OCCUPANCY_MAP_MEDIA_TYPE: {}}},
+        **generate_responses_documentation(MapNotFoundException),
+    },
+)
+async def get_occupancy_map(mission_id: int) -> Response:
+    """Retrieve the occupancy grid built by the backend from the range sensors of the drones while the mission is
+    active, as a PNG where free cells are white, occupied cells are black and unknown cells are gray. The grids are only
+    built when mapping.enabled is set."""
+    return Response(get_occupancy_grid(mission_id).to_png(), media_type=OCCUPANCY_MAP_MEDIA_TYPE)
+
+
+@router.get(
+    "/map/occupancy/tiles",
+    operation_id="get_occupancy_map_tiles",
+    response_model=OccupancyTiles,
+    responses=generate_responses_documentation(MapNotFoundException),
+)
+async def get_occupancy_map_tiles(mission_id: int) -> OccupancyTiles:
+    """Retrieve the version of every tile of the occupancy grid, a tile only needs to be fetched again when its version
+    changed"""
+    occupancy_grid = get_occupancy_grid(mission_id)
+    occupancy_grid.apply_pending_samples()
+    return OccupancyTiles(
+        mission_id=mission_id,
+        tile_size=occupancy_grid.tile_size,
+        tiles_per_side=occupancy_grid.tiles_per_side,
+        versions=occupancy_grid.tile_versions.tolist(),
+    )
+
+
+@router.get(
+    "/map/occupancy/tiles/{row}/{column}",
+    operation_id="get_occupancy_map_tile",
+    response_class=Response,
+    responses={
+        200: {"content": {OCCUPANCY_MAP_MEDIA_TYPE: {}}},
+        **generate_responses_documentation(MapNotFoundException, TileNotFoundException),
+    },
+)
+async def get_occupancy_map_tile(
+    mission_id: int, row: int, column: int, if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """Retrieve a tile of the occupancy grid as a PNG, the first row is the north. The ETag changes with the version of
+    the tile."""
+    occupancy_grid = get_occupancy_grid(mission_id)
+    if not (0 <= row < occupancy_grid.tiles_per_side and 0 <= column < occupancy_grid.tiles_per_side):
+        raise TileNotFoundException(row, column)
+
+    version = occupancy_grid.get_tile_version(row, column)
+    etag = f'"{mission_id}-{row}-{column}-{version}"'
+    if matches_etag(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+
+    tile_cache = get_registry().occupancy_tile_cache
+    if (tile := tile_cache.get((mission_id, row, column, version))) is None:
+        tile = occupancy_grid.tile_to_png(row, column)
+        tile_cache.put((mission_id, row, column, version), tile)
+
+    return Response(tile, media_type=OCCUPANCY_MAP_MEDIA_TYPE, headers={"ETag": etag})
+
+
+def check_deflated_map(body: bytes) -> None:
+    """The map is only decompressed up to its maximum size, a larger map is rejected without being inflated"""
+    decompressor = zlib.decompressobj()
+    try:
+        raw_map = decompressor.decompress(body, MAP_MAXIMUM_SIZE_BYTE)
+    except zlib.error:
+        raise UnsupportedContentEncodingException(MAP_CONTENT_ENCODING)
+    if not decompressor.eof and (decompressor.unconsumed_tail or len(raw_map) == MAP_MAXIMUM_SIZE_BYTE):
+        raise MapTooLargeException(MAP_MAXIMUM_SIZE_BYTE)
+    # A truncated stream or data after the end of the stream would not be returned as it was posted
+    if not decompressor.eof or decompressor.unused_data:
+        raise UnsupportedContentEncodingException(MAP_CONTENT_ENCODING)
+
+
+def get_occupancy_grid(mission_id: int) -> OccupancyGrid:
+    if not (occupancy_grid := get_registry().occupancy_grids.get(mission_id)):
+        raise MapNotFoundException(mission_id)
+    return occupancy_grid
+
+
+@router.post(
+    "/map/raw",
+    operation_id="create_raw_map",
+    response_model=int,
+    responses=generate_responses_documentation(MapTooLargeException, UnsupportedContentEncodingException),
+)
+async def create_raw_map(mission_id: int, request: Request, content_encoding: Optional[str] = Header(None)) -> int:
+    """Save the bytes of the map image, sent as application/octet-stream. A body with the deflate content encoding is
+    stored without being compressed again."""
+    body = await request.body()
+    if not content_encoding or content_encoding == "identity":
+        if len(body) > MAP_MAXIMUM_SIZE_BYTE:
+            raise MapTooLargeException(MAP_MAXIMUM_SIZE_BYTE)
+        saved_map = SavedMap.from_raw_map(mission_id, body)
+    elif content_encoding == MAP_CONTENT_ENCODING:
+        check_deflated_map(body)
+        saved_map = SavedMap(mission_id=mission_id, map=body)
+    else:
+        raise UnsupportedContentEncodingException(content_encoding)
+
+    await create_saved_compressed_map(mission_id, saved_map.map)
+    get_registry().saved_map_cache.invalidate(mission_id)
+    return mission_id
+
+
 @router.get("/mission", operation_id="get_active_mission", response_model=Mission)
 async def get_active_mission(drone_type: DroneType) -> Optional[Mission]:
     """Return the current active mission for a drone type, if it exists"""
@@ -91,9 +446,10 @@ async def get_missions() -> list[Mission]:
 
 
 @router.post("/mission", operation_id="create_mission", response_model=Mission)
-async def create_mission(drone_type: DroneType) -> Mission:
-    """Create a new mission"""
-    mission = await create_new_mission(drone_type)
+async def create_mission(drone_type: DroneType, telemetry_log_sampling: int = Query(1, ge=0)) -> Mission:
+    """Create a new mission. Only every Nth telemetry message of a drone is logged, none when telemetry_log_sampling
+    is 0."""
+    mission = await create_new_mission(drone_type, telemetry_log_sampling)
     return mission
 
 
@@ -127,7 +483,10 @@ async def start_mission(mission_id: int) -> list[Drone]:
     await create_drones_mission_association(selected_drones, mission_id)
     for drone in selected_drones:
         drone.active_mission_id = mission_id
-        drone.total_distance = 0.0
+        drone.reset_total_distance()
+        registry.mark_drone_changed(drone.id)
+        drone.telemetry_log_sampling = mission.telemetry_log_sampling
+        drone.telemetry_log_count = 0
 
     return await send_command_to_all_drones(Command.START_EXPLORATION, selected_drones, mission_id)
 
@@ -168,6 +527,23 @@ async def return_to_base(mission_id: int) -> list[Drone]:
     return await process_mission_termination(mission_id, MissionState.RETURNED_TO_BASE, Command.RETURN_TO_BASE)
 
 
+@router.get("/statistics", operation_id="get_statistics", response_model=Statistics)
+async def get_statistics() -> Statistics:
+    """Return the internal counters of the backend, mostly useful to diagnose the ingestion pipeline"""
+    registry = get_registry()
+    return Statistics(
+        drone_metrics_writer=registry.drone_metrics_writer.statistics.to_model(),
+        log_writer=registry.log_writer_statistics.to_model(),
+        inbound_shards=registry.get_inbound_shard_statistics(),
+        queues=registry.get_queue_statistics(),
+        crazyflie_log_handoffs={
+            drone.id: drone.link.log_handoff.statistics.to_model()
+            for drone in registry.crazyflie_drones
+            if isinstance(drone.link, CrazyflieDroneLink) and drone.link.log_handoff
+        },
+    )
+
+
 # Related to https://github.com/OpenAPITools/openapi-generator/issues/6804
 @router.get("/openapi-generator-workaround", response_model=DronePositionOrientationRange, deprecated=True)
 async def openapi_generator_workaround() -> DronePositionOrientationRange:
@@ -19,13 +19,15 @@ router = APIRouter(prefix="/crazyflie", tags=["crazyflie"])
 )
 async def identify(drone_id: int) -> Drone:
     """Identify a specific Crazyflie drone. The LEDs of that drone will flash for a couple of seconds."""
-    if not (drone := get_registry().get_drone(drone_id)):
+    registry = get_registry()
+    if not (drone := registry.get_drone(drone_id)):
         raise DroneNotFoundException(drone_id)
 
     if drone.drone_type != DroneType.CRAZYFLIE:
         raise WrongDroneTypeException(drone.drone_type)
 
     await drone.link.send_command(Command.IDENTIFY)
+    registry.apply_pending_mailbox(drone)
     return drone.to_model()
 
 
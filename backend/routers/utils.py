@@ -1,7 +1,13 @@
-from typing import Any, Type, Union
+from typing import Any, Optional, Type, Union
 
 from backend.exceptions.response import ResponseException
 
 
 def generate_responses_documentation(*args: Type[ResponseException]) -> dict[Union[int, str], dict[str, Any]]:
     return {exception.http_status_code(): {"description": exception.description()} for exception in args}
+
+
+def matches_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (candidate.strip() for candidate in if_none_match.split(","))
@@ -0,0 +1,75 @@
+import time
+from dataclasses import dataclass, field
+from typing import Final
+
+from backend.models.statistics import ThreadHandoffStatistics
+
+THROUGHPUT_WINDOW_SECOND: Final = 1.0
+
+
+@dataclass
+class ThroughputStatistics:
+    """Count processed items and keep the rate measured over the last completed window"""
+
+    processed: int = 0
+    rate: float = 0.0
+    window_start: float = field(default_factory=time.monotonic)
+    window_count: int = 0
+
+    def record(self, count: int = 1) -> None:
+        self.processed += count
+        self.window_count += count
+        now = time.monotonic()
+        if (elapsed := now - self.window_start) >= THROUGHPUT_WINDOW_SECOND:
+            self.rate = self.window_count / elapsed
+            self.window_start = now
+            self.window_count = 0
+
+    @property
+    def current_rate(self) -> float:
+        # Nothing was processed for a whole window, the last measured rate is stale
+        if time.monotonic() - self.window_start >= 2 * THROUGHPUT_WINDOW_SECOND:
+            return 0.0
+        return self.rate
+
+
+@dataclass
+class HandoffStatistics:
+    """The latency of a batch is how long its oldest item waited for the event loop"""
+
+    batch_count: int = 0
+    handed_off: int = 0
+    last_batch_size: int = 0
+    largest_batch_size: int = 0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    def record_batch(self, batch_size: int, latency: float) -> None:
+        self.batch_count += 1
+        self.handed_off += batch_size
+        self.last_batch_size = batch_size
+        self.largest_batch_size = max(self.largest_batch_size, batch_size)
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.handed_off / self.batch_count if self.batch_count else 0.0
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.batch_count if self.batch_count else 0.0
+
+    def to_model(self) -> ThreadHandoffStatistics:
+        return ThreadHandoffStatistics(
+            batch_count=self.batch_count,
+            handed_off=self.handed_off,
+            last_batch_size=self.last_batch_size,
+            largest_batch_size=self.largest_batch_size,
+            average_batch_size=self.average_batch_size,
+            last_latency=self.last_latency,
+            max_latency=self.max_latency,
+            average_latency=self.average_latency,
+        )
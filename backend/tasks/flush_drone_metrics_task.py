@@ -0,0 +1,23 @@
+import asyncio
+import logging
+
+from backend.registry import get_registry
+from backend.tasks.backend_task import BackendTask
+
+
+class FlushDroneMetricsTask(BackendTask):
+    async def run(self) -> None:
+        try:
+            writer = get_registry().drone_metrics_writer
+            while True:
+                await asyncio.sleep(writer.flush_interval)
+                await writer.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logging.error(e)
+
+    async def terminate(self) -> None:
+        await super().terminate()
+        # The remaining metrics would otherwise be lost on shutdown
+        await get_registry().drone_metrics_writer.flush()
@@ -1,40 +1,56 @@
 import asyncio
-import dataclasses
 import datetime
 import logging
 
 from fastapi.logger import logger
 
+from backend.communication.log_message import RangeLogMessage
 from backend.database.models import SavedLog
-from backend.database.statements import create_drone_metrics
+from backend.occupancy_grid import MAPPING_ENABLED
 from backend.registry import get_registry
 from backend.tasks.backend_task import BackendTask
 
 
 class InboundLogProcessingTask(BackendTask):
     async def run(self) -> None:
+        """Every shard has its own consumer so a slow message only stalls the drones of its shard"""
+        await asyncio.gather(*(self.process_shard(shard) for shard in range(len(get_registry().inbound_log_queues))))
+
+    async def process_shard(self, shard: int) -> None:
         try:
             registry = get_registry()
-            while log_message := await registry.inbound_log_queue.get():
+            inbound_log_queue = registry.inbound_log_queues[shard]
+            statistics = registry.inbound_shard_statistics[shard]
+            mapping_enabled = bool(MAPPING_ENABLED)
+            while log_message := await inbound_log_queue.get():
+                statistics.record()
                 if not (drone := registry.get_drone(log_message.drone_id)):
                     logger.error(
                         f"Received message for drone with id {log_message.drone_id}, but the drone is unregistered"
                     )
                     continue
 
-                drone.update_from_log_message(log_message)
+                if drone.mailbox:
+                    drone.apply_mailbox()
+                else:
+                    drone.update_from_log_message(log_message)
+                registry.mark_drone_changed(log_message.drone_id)
+
                 if mission_id := registry.get_active_mission_id(drone.drone_type):
-                    await create_drone_metrics(drone, mission_id)
+                    registry.drone_metrics_writer.add(drone, mission_id, log_message)
+                    if registry.drone_metrics_writer.is_full:
+                        await registry.drone_metrics_writer.flush()
+                    if mapping_enabled and isinstance(log_message, RangeLogMessage):
+                        registry.get_occupancy_grid(mission_id).update(drone.x, drone.y, drone.yaw, log_message)
 
-                if not drone.is_flying:
+                if not registry.record_flying_state(drone):
                     await registry.mission_termination_queue.put(drone.drone_type)
 
-                if mission_id := drone.active_mission_id:
-                    message = "Message received: " + ",".join(
-                        f"'{key}': {value}" for key, value in dataclasses.asdict(log_message).items()
-                    )
+                if (mission_id := drone.active_mission_id) and drone.should_log_telemetry():
+                    # The log messages are flat and never mutated, so their fields are stored as is and only formatted
+                    # when the logs are read
                     await registry.logging_queue.put(
-                        SavedLog(mission_id=mission_id, timestamp=datetime.datetime.utcnow(), message=message)
+                        SavedLog(mission_id=mission_id, timestamp=datetime.datetime.utcnow(), payload=vars(log_message))
                     )
         except asyncio.CancelledError:
             pass
@@ -1,18 +1,60 @@
 import asyncio
 import logging
+import time
+from typing import Final
 
-from backend.database.statements import insert_log_in_database
+from coveo_settings import IntSetting
+from fastapi.logger import logger
+
+from backend.database.models import SavedLog
+from backend.database.statements import insert_logs_in_database
 from backend.registry import get_registry
 from backend.tasks.backend_task import BackendTask
 
+LOG_BATCH_SIZE: Final = IntSetting("database.log_batch_size", fallback=500)
+
+
+def drain_logging_queue(first_log: SavedLog, max_batch_size: int) -> list[SavedLog]:
+    """Greedily take what is already waiting in the queue, without waiting for more logs to come"""
+    logging_queue = get_registry().logging_queue
+    logs = [first_log]
+    while len(logs) < max_batch_size and not logging_queue.empty():
+        logs.append(logging_queue.get_nowait())
+    return logs
+
+
+async def write_logs(logs: list[SavedLog]) -> None:
+    registry = get_registry()
+    statistics = registry.log_writer_statistics
+    start = time.perf_counter()
+    try:
+        log_ids = await insert_logs_in_database(logs)
+    except Exception as e:
+        statistics.failed_flush_count += 1
+        logger.error(f"Unable to write a batch of {len(logs)} logs: {e}")
+    else:
+        statistics.record_flush(len(logs), time.perf_counter() - start)
+        # The logs are only pushed to the streams once they are written, so a stream never sends a log it could not
+        # find again in the database when it catches up
+        for log, log_id in zip(logs, log_ids):
+            log.id = log_id
+        registry.log_publisher.publish(logs)
+
 
 class InsertLogTask(BackendTask):
     async def run(self) -> None:
         try:
             registry = get_registry()
+            max_batch_size = int(LOG_BATCH_SIZE)
             while log_to_commit := await registry.logging_queue.get():
-                await insert_log_in_database(log_to_commit)
+                await write_logs(drain_logging_queue(log_to_commit, max_batch_size))
         except asyncio.CancelledError:
             pass
         except Exception as e:
             logging.error(e)
+
+    async def terminate(self) -> None:
+        await super().terminate()
+        logging_queue = get_registry().logging_queue
+        if not logging_queue.empty():
+            await write_logs(drain_logging_queue(logging_queue.get_nowait(), logging_queue.qsize() + 1))
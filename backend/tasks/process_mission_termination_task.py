@@ -1,15 +1,28 @@
 import asyncio
 import logging
 
-from backend.database.statements import end_mission, get_mission
+from backend.database.statements import create_saved_raw_map, end_mission, get_mission, get_saved_map_model
 from backend.models.mission import Mission, MissionState
 from backend.registry import get_registry
 from backend.tasks.backend_task import BackendTask
 
 
+async def save_occupancy_grid(mission_id: int) -> None:
+    """The occupancy grid is released with the active mission, its PNG is kept as the saved map of the mission unless a
+    map was already posted for it"""
+    registry = get_registry()
+    if (occupancy_grid := registry.occupancy_grids.get(mission_id)) is None:
+        return
+    if await get_saved_map_model(mission_id) is not None:
+        return
+
+    await create_saved_raw_map(mission_id, occupancy_grid.to_png())
+    registry.saved_map_cache.invalidate(mission_id)
+
+
 async def process_end_mission(mission: Mission) -> None:
-    total_distance = sum((drone.total_distance for drone in get_registry().get_drones(mission.drone_type)))
-    await end_mission(mission.id, total_distance)
+    await end_mission(mission.id, get_registry().get_total_distance(mission.drone_type))
+    await save_occupancy_grid(mission.id)
 
 
 class ProcessMissionTerminationTask(BackendTask):
@@ -21,7 +34,7 @@ class ProcessMissionTerminationTask(BackendTask):
                 if not active_mission:
                     continue
 
-                if any((drone.is_flying for drone in registry.get_drones(drone_type))):
+                if registry.has_flying_drones(drone_type):
                     continue
 
                 mission = await get_mission(active_mission)
@@ -0,0 +1,20 @@
+import asyncio
+import logging
+
+from backend.registry import get_registry
+from backend.tasks.backend_task import BackendTask
+
+
+class PublishDroneStateTask(BackendTask):
+    async def run(self) -> None:
+        try:
+            registry = get_registry()
+            publisher = registry.drone_state_publisher
+            while True:
+                await asyncio.sleep(publisher.interval)
+                registry.apply_pending_mailboxes()
+                publisher.publish(registry.drones)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logging.error(e)
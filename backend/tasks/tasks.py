@@ -1,16 +1,20 @@
 from typing import Final
 
 from backend.registry import get_registry
+from backend.tasks.flush_drone_metrics_task import FlushDroneMetricsTask
 from backend.tasks.inbound_debug_crazyflie_message_task import InboundDebugCrazyflieMessageTask
 from backend.tasks.inbound_log_processing_task import InboundLogProcessingTask
 from backend.tasks.insert_log_task import InsertLogTask
 from backend.tasks.process_mission_termination_task import ProcessMissionTerminationTask
+from backend.tasks.publish_drone_state_task import PublishDroneStateTask
 
 TASKS_TO_INITIALIZE: Final = [
     InboundLogProcessingTask,
     InboundDebugCrazyflieMessageTask,
     InsertLogTask,
     ProcessMissionTerminationTask,
+    FlushDroneMetricsTask,
+    PublishDroneStateTask,
 ]
 
 
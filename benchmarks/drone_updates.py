@@ -0,0 +1,67 @@
+"""Measure how many telemetry messages per second the registered drones apply, for a fleet of 1000 drones receiving
+alternately their position and their ranges, and how long building the models of the whole fleet takes.
+
+    python -m benchmarks.drone_updates
+"""
+import time
+from typing import Final
+from unittest.mock import MagicMock
+
+from backend.communication.argos_drone_link import ArgosDroneLink
+from backend.communication.log_message import BatteryAndPositionLogMessage, LogMessage, RangeLogMessage
+from backend.registered_drone import RegisteredDrone
+
+NUMBER_OF_DRONES: Final = 1000
+MESSAGES_PER_DRONE: Final = 100
+
+
+def generate_messages(drone_id: int) -> list[LogMessage]:
+    messages: list[LogMessage] = []
+    for index in range(MESSAGES_PER_DRONE // 2):
+        messages.append(
+            BatteryAndPositionLogMessage(
+                drone_id=drone_id,
+                timestamp=index,
+                kalman_state_x=index * 0.01,
+                kalman_state_y=drone_id * 0.01,
+                kalman_state_z=0.5,
+                state_estimate_yaw=index % 360,
+                drone_state=5,
+                drone_battery_level=90,
+            )
+        )
+        messages.append(
+            RangeLogMessage(
+                drone_id=drone_id,
+                timestamp=index,
+                range_front=1200 + index,
+                range_back=400,
+                range_up=2000,
+                range_zrange=300,
+                range_left=90,
+                range_right=1100,
+            )
+        )
+    return messages
+
+
+def main() -> None:
+    drones = [RegisteredDrone(drone_id, MagicMock(spec=ArgosDroneLink)) for drone_id in range(NUMBER_OF_DRONES)]
+    # The messages of the drones are interleaved like they are on the inbound queues
+    messages = [message for batch in zip(*(generate_messages(drone.id) for drone in drones)) for message in batch]
+
+    start = time.perf_counter()
+    for message in messages:
+        drones[message.drone_id].update_from_log_message(message)
+    elapsed = time.perf_counter() - start
+    print(f"{len(messages)} updates of {NUMBER_OF_DRONES} drones: {len(messages) / elapsed:10.0f} updates/s")
+
+    start = time.perf_counter()
+    for drone in drones:
+        drone.to_model()
+    elapsed = time.perf_counter() - start
+    print(f"Models of {NUMBER_OF_DRONES} drones: {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
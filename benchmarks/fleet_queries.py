@@ -0,0 +1,76 @@
+"""Compare answering fleet-wide questions by looping over the registered drones against the fleet state table, for a
+fleet of 1000 drones.
+
+    python -m benchmarks.fleet_queries
+"""
+import itertools
+import json
+import math
+import random
+import timeit
+from typing import Callable, Final
+from unittest.mock import MagicMock
+
+from backend.communication.argos_drone_link import ArgosDroneLink
+from backend.fleet_state_table import FleetStateTable
+from backend.models.drone import DroneState, DroneType, DroneVec3
+from backend.registered_drone import RegisteredDrone
+
+NUMBER_OF_DRONES: Final = 1000
+NUMBER_OF_QUERIES: Final = 20
+MIN_SEPARATION: Final = 0.5
+
+
+def generate_drones() -> list[RegisteredDrone]:
+    random.seed(0)
+    return [
+        RegisteredDrone(
+            drone_id,
+            MagicMock(spec=ArgosDroneLink),
+            random.choice(list(DroneState)),
+            position=DroneVec3(x=random.uniform(-50, 50), y=random.uniform(-50, 50), z=random.uniform(0, 3)),
+            total_distance=random.uniform(0, 100),
+        )
+        for drone_id in range(NUMBER_OF_DRONES)
+    ]
+
+
+def main() -> None:
+    drones = generate_drones()
+    table = FleetStateTable.from_drones(drones)
+
+    def get_close_pairs_with_loops() -> list[tuple[int, int]]:
+        return [
+            (first.id, second.id)
+            for first, second in itertools.combinations(drones, 2)
+            if math.dist((first.x, first.y, first.z), (second.x, second.y, second.z)) < MIN_SEPARATION
+        ]
+
+    queries: dict[str, tuple[Callable[[], object], Callable[[], object]]] = {
+        "total distance": (
+            lambda: sum(drone.total_distance for drone in drones),
+            lambda: table.get_total_distance(DroneType.ARGOS),
+        ),
+        "flying": (
+            lambda: sum(drone.is_flying for drone in drones),
+            lambda: table.count_flying_drones(None),
+        ),
+        "bounding box": (
+            lambda: [(min(values), max(values)) for values in zip(*((drone.x, drone.y, drone.z) for drone in drones))],
+            lambda: table.get_bounding_box(None),
+        ),
+        "close pairs": (get_close_pairs_with_loops, lambda: table.get_close_pairs(MIN_SEPARATION, None)),
+        "serialization": (
+            lambda: json.dumps([drone.to_model().dict() for drone in drones]),
+            lambda: json.dumps(table.to_drone_dicts(None)),
+        ),
+    }
+
+    for name, (with_loops, with_table) in queries.items():
+        loops_elapsed = timeit.timeit(with_loops, number=NUMBER_OF_QUERIES) / NUMBER_OF_QUERIES
+        table_elapsed = timeit.timeit(with_table, number=NUMBER_OF_QUERIES) / NUMBER_OF_QUERIES
+        print(f"{name:>15}: loops {loops_elapsed * 1000:8.2f} ms, table {table_elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
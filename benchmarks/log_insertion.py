@@ -0,0 +1,57 @@
+"""Compare the log insertion throughput of the per-row path against the batched path used by InsertLogTask.
+
+Needs a running database, configured with the same settings as the backend (see docker-compose.yml):
+    python -m benchmarks.log_insertion
+"""
+import asyncio
+import datetime
+import time
+from typing import Awaitable, Callable, Final
+
+from backend.database.database import Base, engine
+from backend.database.models import SavedLog
+from backend.database.statements import create_new_mission, insert_log_in_database, insert_logs_in_database
+from backend.models.drone import DroneType
+from backend.tasks.insert_log_task import LOG_BATCH_SIZE
+
+NUMBER_OF_LOGS: Final = 5000
+
+
+def generate_logs(mission_id: int) -> list[SavedLog]:
+    return [
+        SavedLog(mission_id=mission_id, timestamp=datetime.datetime.utcnow(), message=f"Message received: {index}")
+        for index in range(NUMBER_OF_LOGS)
+    ]
+
+
+async def insert_per_row(logs: list[SavedLog]) -> None:
+    for log in logs:
+        await insert_log_in_database(log)
+
+
+async def insert_batched(logs: list[SavedLog]) -> None:
+    batch_size = int(LOG_BATCH_SIZE)
+    for start in range(0, len(logs), batch_size):
+        end = start + batch_size
+        await insert_logs_in_database(logs[start:end])
+
+
+async def measure(name: str, insert: Callable[[list[SavedLog]], Awaitable[None]], mission_id: int) -> None:
+    logs = generate_logs(mission_id)
+    start = time.perf_counter()
+    await insert(logs)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {NUMBER_OF_LOGS / elapsed:10.0f} rows/s ({elapsed:.2f} s)")
+
+
+async def main() -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    mission = await create_new_mission(DroneType.ARGOS)
+
+    await measure("per row", insert_per_row, mission.id)
+    await measure("batched", insert_batched, mission.id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""Compare decoding an Argos telemetry line with the precompiled decoders against the former flex based path, and
+against the binary wire format.
+
+    python -m benchmarks.log_message_decoding
+"""
+import dataclasses
+import json
+import math
+import timeit
+from typing import Final, Optional, cast
+
+from coveo_functools import flex
+
+from backend.communication.log_message import (
+    LOG_MESSAGE_DECODERS,
+    FullLogMessage,
+    LogMessage,
+    decode_argos_binary_frame,
+    encode_argos_binary_frame,
+    json_loads,
+)
+
+NUMBER_OF_MESSAGES: Final = 20000
+ARGOS_MESSAGE: Final = json.dumps(
+    {
+        "timestamp": 123,
+        "drone.state": 5,
+        "drone.batteryLevel": 87,
+        "kalman.stateX": 1.25,
+        "kalman.stateY": -3.5,
+        "kalman.stateZ": 0.3,
+        "stateEstimate.yaw": 42.0,
+        "range.front": 1200,
+        "range.back": 400,
+        "range.up": 2000,
+        "range.zrange": 300,
+        "range.left": 90,
+        "range.right": 1100,
+    }
+).encode("utf-8")
+
+
+def decode_with_flex() -> LogMessage:
+    return flex.deserialize(value=json.loads(ARGOS_MESSAGE) | {"drone_id": 1}, hint=FullLogMessage)
+
+
+def decode_with_decoder() -> LogMessage:
+    return LOG_MESSAGE_DECODERS[FullLogMessage].decode(json_loads(ARGOS_MESSAGE), drone_id=1)
+
+
+ARGOS_FRAME: Final = encode_argos_binary_frame(cast(FullLogMessage, decode_with_decoder()))
+
+
+def decode_binary_frame() -> Optional[LogMessage]:
+    return decode_argos_binary_frame(ARGOS_FRAME, drone_id=1)
+
+
+def main() -> None:
+    assert decode_with_flex() == decode_with_decoder()
+    binary_decoded_message = decode_binary_frame()
+    assert binary_decoded_message
+    # The binary frames truncate the positions and the yaw to float32
+    assert all(
+        math.isclose(decoded, binary_decoded, rel_tol=1e-6)
+        for decoded, binary_decoded in zip(
+            dataclasses.astuple(decode_with_decoder()), dataclasses.astuple(binary_decoded_message)
+        )
+    )
+    print(f"JSON line: {len(ARGOS_MESSAGE)} bytes, binary frame: {len(ARGOS_FRAME)} bytes")
+    for name, decode in (("flex", decode_with_flex), ("decoder", decode_with_decoder), ("binary", decode_binary_frame)):
+        elapsed = min(timeit.repeat(decode, number=NUMBER_OF_MESSAGES, repeat=3))
+        microseconds_per_message = elapsed / NUMBER_OF_MESSAGES * 1e6
+        print(f"{name:>10}: {NUMBER_OF_MESSAGES / elapsed:10.0f} messages/s ({microseconds_per_message:.1f} µs)")
+
+
+if __name__ == "__main__":
+    main()
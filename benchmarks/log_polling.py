@@ -0,0 +1,67 @@
+"""Measure the latency of a /logs poll as the log table grows, with the keyset pagination on (mission_id, id).
+
+Needs a running database, configured with the same settings as the backend (see docker-compose.yml):
+    python -m benchmarks.log_polling
+"""
+import asyncio
+import statistics
+import time
+from typing import Final
+
+from sqlalchemy import func, insert, literal, select
+
+from backend.database.database import Base, async_session, engine
+from backend.database.models import SavedLog
+from backend.database.statements import create_new_mission, get_log_message
+from backend.models.drone import DroneType
+from backend.routers.common import LOGS_MAXIMUM_LIMIT
+
+TABLE_SIZES: Final = (10_000, 100_000, 1_000_000, 3_000_000)
+NUMBER_OF_POLLS: Final = 50
+LOGS_PER_POLL: Final = 20
+
+
+async def fill_log_table(mission_id: int, size: int) -> None:
+    """Other missions fill the table, the polled mission only has its recent logs"""
+    async with async_session() as session:
+        current_size = (await session.execute(select(func.count()).select_from(SavedLog))).scalar_one()
+        series = func.generate_series(1, size - current_size).table_valued("index")
+        await session.execute(
+            insert(SavedLog).from_select(
+                ["mission_id", "timestamp", "message"],
+                select(literal(mission_id), func.now(), literal("Message received")).select_from(series),
+            )
+        )
+        await session.commit()
+
+
+async def measure_polls(mission_id: int) -> list[float]:
+    async with async_session() as session:
+        last_id = (await session.execute(select(func.max(SavedLog.id)))).scalar_one()
+
+    latencies = []
+    for _ in range(NUMBER_OF_POLLS):
+        start = time.perf_counter()
+        await get_log_message(mission_id, last_id - LOGS_PER_POLL, LOGS_MAXIMUM_LIMIT)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main() -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    filling_mission = await create_new_mission(DroneType.ARGOS)
+    polled_mission = await create_new_mission(DroneType.ARGOS)
+
+    for size in TABLE_SIZES:
+        await fill_log_table(filling_mission.id, size)
+        await fill_log_table(polled_mission.id, size + LOGS_PER_POLL)
+        latencies = await measure_polls(polled_mission.id)
+        print(
+            f"{size:>10} rows: median {statistics.median(latencies) * 1000:6.2f} ms,"
+            f" max {max(latencies) * 1000:6.2f} ms per poll"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""Measure how many range samples per second the occupancy grid absorbs, and how long rendering it as a PNG takes.
+
+    python -m benchmarks.occupancy_grid
+"""
+import random
+import timeit
+from typing import Final
+
+from backend.communication.log_message import RangeLogMessage
+from backend.occupancy_grid import OccupancyGrid
+
+NUMBER_OF_UPDATES: Final = 5000
+NUMBER_OF_RENDERS: Final = 20
+
+
+def generate_samples() -> list[tuple[float, float, float, RangeLogMessage]]:
+    random.seed(0)
+    return [
+        (
+            random.uniform(-5, 5),
+            random.uniform(-5, 5),
+            random.uniform(-180, 180),
+            RangeLogMessage(
+                drone_id=1,
+                timestamp=index,
+                range_front=random.randint(100, 5000),
+                range_back=random.randint(100, 5000),
+                range_up=2000,
+                range_zrange=500,
+                range_left=random.randint(100, 5000),
+                range_right=random.randint(100, 5000),
+            ),
+        )
+        for index in range(NUMBER_OF_UPDATES)
+    ]
+
+
+def main() -> None:
+    occupancy_grid = OccupancyGrid()
+    samples = generate_samples()
+
+    def update_all() -> None:
+        for x, y, yaw, log_message in samples:
+            occupancy_grid.update(x, y, yaw, log_message)
+
+    elapsed = timeit.timeit(update_all, number=1)
+    print(f"{'updates':>8}: {NUMBER_OF_UPDATES / elapsed:10.0f} samples/s ({occupancy_grid.size}² cells)")
+
+    elapsed = timeit.timeit(occupancy_grid.to_png, number=NUMBER_OF_RENDERS)
+    print(f"{'png':>8}: {elapsed / NUMBER_OF_RENDERS * 1000:10.2f} ms/render ({len(occupancy_grid.to_png())} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
+import datetime
+import json
+import zlib
 from dataclasses import dataclass
 from http import HTTPStatus
-from typing import Any, Final, Generator
-from unittest.mock import patch
+from typing import Any, AsyncGenerator, Final, Generator
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from starlette.testclient import TestClient
 
+from backend.columnar_export import COLUMNAR_MEDIA_TYPE, encode_columnar_metrics
 from backend.communication.command import Command
+from backend.communication.thread_handoff import ThreadHandoff
+from backend.database.models import SavedLog, SavedMap, SavedMission
+from backend.models.drone import DroneType
+from backend.models.mission import Log, Map, MissionState
+from backend.occupancy_grid import PNG_SIGNATURE, OccupancyGrid
 from backend.registry import Registry
+from backend.routers.common import (
+    LOGS_MAXIMUM_LIMIT,
+    NEXT_STARTING_ID_HEADER,
+    generate_log_events,
+    stream_logs,
+)
+from backend.statistics import HandoffStatistics
 from tests.functional.conftest import ARGOS_ID, CRAZYFLIE_ID
 
 
@@ -61,7 +77,388 @@ def test_get_all_drones(get_registry_mock: Registry, test_case: GetDronesTestCas
     assert response.json() == test_case.expected_response
 
 
+def test_get_fleet_summary(get_registry_mock: Registry, test_client: TestClient) -> None:
+    response = test_client.get("/drones/fleet?min_separation=5000")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        "drone_count": 2,
+        "flying_drone_count": 0,
+        "total_distance": 0.0,
+        "minimum_position": {"x": 1.2, "y": 3.6, "z": 2.53},
+        "maximum_position": {"x": 99.1, "y": 1919.2, "z": 3.2},
+        "close_pairs": [[ARGOS_ID, CRAZYFLIE_ID]],
+    }
+
+
 @dataclass()
 class UpdateDroneTestCase:
     endpoint: str
     command: Command
+
+
+def test_get_statistics(get_registry_mock: Registry, mocked_crazyflie_link: MagicMock, test_client: TestClient) -> None:
+    mocked_crazyflie_link.log_handoff = MagicMock(spec=ThreadHandoff)
+    mocked_crazyflie_link.log_handoff.statistics = HandoffStatistics()
+    mocked_crazyflie_link.log_handoff.statistics.record_batch(3, 0.5)
+
+    response = test_client.get("/statistics")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["drone_metrics_writer"]["flush_count"] == 0
+    assert response.json()["crazyflie_log_handoffs"][str(CRAZYFLIE_ID)]["average_batch_size"] == 3
+
+
+@patch("backend.routers.common.stream_drones_metadata")
+def test_stream_drones_metadata(stream_drones_metadata_mock: MagicMock, test_client: TestClient) -> None:
+    row = MagicMock(
+        drone_id=1, x=1.0, y=2.0, z=3.0, yaw=4.0, front=5.0, back=6.0, up=7.0, left=8.0, right=9.0, bottom=10.0
+    )
+
+    async def stream_drones_metadata(mission_id: int) -> AsyncGenerator[list[MagicMock], None]:
+        yield [row, row]
+        yield [row]
+
+    stream_drones_metadata_mock.side_effect = stream_drones_metadata
+
+    response = test_client.get("/drones/metadata/stream?mission_id=1")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert lines[0] == {
+        "drone_id": 1,
+        "position": {"x": 1.0, "y": 2.0, "z": 3.0},
+        "orientation": {"yaw": 4.0},
+        "range": {"front": 5.0, "back": 6.0, "up": 7.0, "left": 8.0, "right": 9.0, "bottom": 10.0},
+    }
+
+
+@patch("backend.routers.common.get_drones_metadata_columns")
+def test_get_drones_metadata_columnar(get_drones_metadata_columns_mock: MagicMock, test_client: TestClient) -> None:
+    get_drones_metadata_columns_mock.return_value = {}
+
+    response = test_client.get("/drones/metadata?mission_id=1", headers={"Accept": COLUMNAR_MEDIA_TYPE})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+    assert response.content == encode_columnar_metrics({})
+
+
+@patch("backend.routers.common.get_log_message")
+def test_get_logs_returns_the_next_starting_id(get_log_message_mock: MagicMock, test_client: TestClient) -> None:
+    get_log_message_mock.return_value = [
+        Log(id=log_id, mission_id=1, timestamp=datetime.datetime.utcnow(), message="log") for log_id in (4, 5)
+    ]
+
+    response = test_client.get("/logs?mission_id=1&starting_id=4&limit=2")
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 2
+    assert response.headers[NEXT_STARTING_ID_HEADER] == "6"
+    get_log_message_mock.assert_called_with(1, 4, 2)
+
+
+@patch("backend.routers.common.get_log_message")
+def test_get_logs_without_new_logs_keeps_the_starting_id(
+    get_log_message_mock: MagicMock, test_client: TestClient
+) -> None:
+    get_log_message_mock.return_value = []
+
+    response = test_client.get("/logs?mission_id=1&starting_id=4")
+
+    assert response.headers[NEXT_STARTING_ID_HEADER] == "4"
+    get_log_message_mock.assert_called_with(1, 4, None)
+
+
+@patch("backend.routers.common.get_log_message")
+def test_next_starting_id_is_exposed_to_the_webui(get_log_message_mock: MagicMock, test_client: TestClient) -> None:
+    get_log_message_mock.return_value = []
+
+    response = test_client.get("/logs?mission_id=1", headers={"Origin": "http://localhost:8080"})
+
+    assert NEXT_STARTING_ID_HEADER in response.headers["access-control-expose-headers"]
+
+
+def test_get_logs_rejects_a_limit_above_the_maximum(test_client: TestClient) -> None:
+    response = test_client.get(f"/logs?mission_id=1&limit={LOGS_MAXIMUM_LIMIT + 1}")
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@patch("backend.routers.common.get_saved_map_model")
+def test_get_raw_map_is_served_deflated(get_saved_map_model_mock: MagicMock, test_client: TestClient) -> None:
+    get_saved_map_model_mock.return_value = SavedMap.from_raw_map(1, b"map")
+
+    response = test_client.get("/map/raw?mission_id=1", headers={"Accept-Encoding": "deflate"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-encoding"] == "deflate"
+    assert response.content == b"map"
+
+
+@patch("backend.routers.common.get_saved_map_model")
+def test_get_raw_map_without_deflate(get_saved_map_model_mock: MagicMock, test_client: TestClient) -> None:
+    get_saved_map_model_mock.return_value = SavedMap.from_raw_map(1, b"map")
+
+    response = test_client.get("/map/raw?mission_id=1", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == b"map"
+
+
+@patch("backend.routers.common.get_saved_map_model")
+def test_get_missing_map(
+    get_saved_map_model_mock: MagicMock, get_registry_mock: Registry, test_client: TestClient
+) -> None:
+    get_saved_map_model_mock.return_value = None
+
+    response = test_client.get("/map?mission_id=1")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@patch("backend.routers.common.get_saved_map_model")
+def test_get_map_sets_its_etag(
+    get_saved_map_model_mock: MagicMock, get_registry_mock: Registry, test_client: TestClient
+) -> None:
+    saved_map = SavedMap.from_raw_map(1, b"map")
+    get_saved_map_model_mock.return_value = saved_map
+
+    response = test_client.get("/map?mission_id=1")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["etag"] == saved_map.etag
+    assert response.json() == saved_map.to_model().dict()
+
+
+@patch("backend.routers.common.get_saved_map_model")
+def test_get_unchanged_map_does_not_query_the_database(
+    get_saved_map_model_mock: MagicMock, get_registry_mock: Registry, test_client: TestClient
+) -> None:
+    saved_map = SavedMap.from_raw_map(1, b"map")
+    get_saved_map_model_mock.return_value = saved_map
+    test_client.get("/map?mission_id=1")
+
+    response = test_client.get("/map?mission_id=1", headers={"If-None-Match": saved_map.etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b""
+    get_saved_map_model_mock.assert_called_once_with(1)
+
+
+@patch("backend.routers.common.create_saved_map")
+def test_create_map(create_saved_map_mock: MagicMock, get_registry_mock: Registry, test_client: TestClient) -> None:
+    response = test_client.post("/map", json={"mission_id": 1, "map": "YWJj"})
+
+    assert response.status_code == HTTPStatus.OK
+    create_saved_map_mock.assert_awaited_with(Map(mission_id=1, map="YWJj"))
+
+
+@pytest.mark.parametrize("encoded_map", ["data:image/png;base64,YWJj", "YWJ=", "YW Jj"])
+@patch("backend.routers.common.get_saved_map_model")
+@patch("backend.routers.common.create_saved_map")
+def test_create_map_returns_maps_that_are_not_canonical_base64_unchanged(
+    create_saved_map_mock: MagicMock,
+    get_saved_map_model_mock: MagicMock,
+    encoded_map: str,
+    get_registry_mock: Registry,
+    test_client: TestClient,
+) -> None:
+    response = test_client.post("/map", json={"mission_id": 1, "map": encoded_map})
+    get_saved_map_model_mock.return_value = SavedMap.from_model(create_saved_map_mock.call_args.args[0])
+
+    assert response.status_code == HTTPStatus.OK
+    assert test_client.get("/map?mission_id=1").json() == {"mission_id": 1, "map": encoded_map}
+
+
+@patch("backend.routers.common.create_saved_compressed_map")
+def test_create_raw_map_invalidates_the_cached_map(
+    create_saved_compressed_map_mock: MagicMock, get_registry_mock: Registry, test_client: TestClient
+) -> None:
+    get_registry_mock.saved_map_cache.put(1, ('"etag"', Map(mission_id=1, map="")))
+
+    test_client.post("/map/raw?mission_id=1", data=b"map", headers={"Content-Type": "application/octet-stream"})
+
+    assert get_registry_mock.saved_map_cache.get(1) is None
+
+
+@pytest.mark.parametrize("content_encoding, body", [("identity", b"map"), ("deflate", zlib.compress(b"map"))])
+@patch("backend.routers.common.create_saved_compressed_map")
+def test_create_raw_map(
+    create_saved_compressed_map_mock: MagicMock, content_encoding: str, body: bytes, test_client: TestClient
+) -> None:
+    response = test_client.post(
+        "/map/raw?mission_id=1",
+        data=body,
+        headers={"Content-Type": "application/octet-stream", "Content-Encoding": content_encoding},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    mission_id, compressed_map = create_saved_compressed_map_mock.call_args.args
+    assert mission_id == 1
+    assert zlib.decompress(compressed_map) == b"map"
+
+
+@pytest.mark.parametrize("content_encoding, body", [("identity", b"map"), ("deflate", zlib.compress(b"map"))])
+@patch("backend.routers.common.MAP_MAXIMUM_SIZE_BYTE", 2)
+@patch("backend.routers.common.create_saved_compressed_map")
+def test_create_raw_map_rejects_maps_above_the_maximum_size(
+    create_saved_compressed_map_mock: MagicMock, content_encoding: str, body: bytes, test_client: TestClient
+) -> None:
+    response = test_client.post("/map/raw?mission_id=1", data=body, headers={"Content-Encoding": content_encoding})
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    create_saved_compressed_map_mock.assert_not_awaited()
+
+
+@pytest.mark.parametrize(
+    "content_encoding, body",
+    [
+        ("gzip", b"map"),
+        ("deflate", b"not deflated"),
+        ("deflate", zlib.compress(b"map")[:-2]),
+        ("deflate", zlib.compress(b"map") + b"tail"),
+    ],
+)
+def test_create_raw_map_with_an_unsupported_encoding(
+    content_encoding: str, body: bytes, test_client: TestClient
+) -> None:
+    response = test_client.post("/map/raw?mission_id=1", data=body, headers={"Content-Encoding": content_encoding})
+
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+def test_get_occupancy_map(get_registry_mock: Registry, test_client: TestClient) -> None:
+    get_registry_mock.occupancy_grids = {1: OccupancyGrid(size=4)}
+
+    response = test_client.get("/map/occupancy?mission_id=1")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(PNG_SIGNATURE)
+
+
+def test_get_occupancy_map_of_an_unknown_mission(get_registry_mock: Registry, test_client: TestClient) -> None:
+    get_registry_mock.occupancy_grids = {}
+
+    response = test_client.get("/map/occupancy?mission_id=1")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_get_occupancy_map_tiles(get_registry_mock: Registry, test_client: TestClient) -> None:
+    get_registry_mock.occupancy_grids = {1: OccupancyGrid(size=4, tile_size=2)}
+
+    response = test_client.get("/map/occupancy/tiles?mission_id=1")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"mission_id": 1, "tile_size": 2, "tiles_per_side": 2, "versions": [[0, 0], [0, 0]]}
+
+
+def test_get_occupancy_map_tile(get_registry_mock: Registry, test_client: TestClient) -> None:
+    get_registry_mock.occupancy_grids = {1: OccupancyGrid(size=4, tile_size=2)}
+
+    response = test_client.get("/map/occupancy/tiles/1/0?mission_id=1")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == '"1-1-0-0"'
+    assert response.content.startswith(PNG_SIGNATURE)
+
+
+def test_get_unchanged_occupancy_map_tile(get_registry_mock: Registry, test_client: TestClient) -> None:
+    get_registry_mock.occupancy_grids = {1: OccupancyGrid(size=4, tile_size=2)}
+
+    response = test_client.get("/map/occupancy/tiles/1/0?mission_id=1", headers={"If-None-Match": '"1-1-0-0"'})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["etag"] == '"1-1-0-0"'
+
+
+@pytest.mark.parametrize("row, column", [(2, 0), (0, -1)])
+def test_get_occupancy_map_tile_outside_of_the_grid(
+    row: int, column: int, get_registry_mock: Registry, test_client: TestClient
+) -> None:
+    get_registry_mock.occupancy_grids = {1: OccupancyGrid(size=4, tile_size=2)}
+
+    response = test_client.get(f"/map/occupancy/tiles/{row}/{column}?mission_id=1")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_push_drones_starts_with_a_snapshot(get_registry_mock: Registry, test_client: TestClient) -> None:
+    publisher = get_registry_mock.drone_state_publisher
+    publisher.subscriber_count = 1
+    for drone_id in get_registry_mock.drones:
+        publisher.mark_changed(drone_id)
+    publisher.publish(get_registry_mock.drones)
+    publisher.subscriber_count = 0
+
+    with test_client.websocket_connect("/ws/drones") as websocket:
+        frame = websocket.receive_json()
+        assert publisher.subscriber_count == 1
+
+    assert frame["snapshot"]
+    assert frame["drones"][str(ARGOS_ID)]["position"] == ARGOS_DRONE_RESPONSE["position"]
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.common.get_log_message")
+async def test_log_stream_catches_up_then_follows_the_new_logs(
+    get_log_message_mock: MagicMock, get_registry_mock: Registry
+) -> None:
+    logs = [SavedLog(id=log_id, mission_id=1, timestamp=datetime.datetime.utcnow(), message="") for log_id in (4, 5, 6)]
+    get_log_message_mock.return_value = [log.to_model() for log in logs[:2]]
+    events = generate_log_events(1, 4)
+
+    catch_up = await events.__anext__()
+    # The log 5 was read from the database and written again while the stream was catching up
+    get_registry_mock.log_publisher.publish(logs[1:])
+    live = await events.__anext__()
+    await events.aclose()
+
+    assert [line for line in catch_up.splitlines() if line.startswith("id:")] == ["id: 4", "id: 5"]
+    assert [line for line in live.splitlines() if line.startswith("id:")] == ["id: 6"]
+    get_log_message_mock.assert_awaited_once_with(1, 4, LOGS_MAXIMUM_LIMIT)
+    assert get_registry_mock.log_publisher.subscribers == {}
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.common.generate_log_events")
+async def test_log_stream_resumes_after_the_last_event_id(generate_log_events_mock: MagicMock) -> None:
+    response = await stream_logs(mission_id=1, starting_id=0, last_event_id=41)
+
+    assert response.media_type == "text/event-stream"
+    generate_log_events_mock.assert_called_once_with(1, 42)
+
+
+@patch("backend.routers.common.send_command_to_all_drones", new_callable=AsyncMock)
+@patch("backend.routers.common.create_drones_mission_association", new_callable=AsyncMock)
+@patch("backend.database.statements.async_session")
+def test_start_mission_applies_the_stored_telemetry_log_sampling(
+    async_session_mock: MagicMock,
+    create_drones_mission_association_mock: AsyncMock,
+    send_command_to_all_drones_mock: AsyncMock,
+    get_registry_mock: Registry,
+    test_client: TestClient,
+) -> None:
+    session_mock = async_session_mock.return_value.__aenter__.return_value
+    session_mock.execute = AsyncMock(return_value=MagicMock())
+    session_mock.commit = AsyncMock()
+    session_mock.execute.return_value.scalars.return_value.first.return_value = SavedMission(
+        id=1,
+        drone_type=DroneType.CRAZYFLIE,
+        state=MissionState.CREATED,
+        total_distance=0,
+        starting_time=datetime.datetime.utcnow(),
+        telemetry_log_sampling=4,
+    )
+    send_command_to_all_drones_mock.return_value = []
+
+    response = test_client.post("/start_mission?mission_id=1")
+
+    assert response.status_code == HTTPStatus.OK
+    crazyflie_drone = get_registry_mock.get_drone(CRAZYFLIE_ID)
+    assert crazyflie_drone is not None
+    assert crazyflie_drone.telemetry_log_sampling == 4
@@ -1,3 +1,4 @@
+import asyncio
 import struct
 from asyncio import CancelledError, StreamReader, StreamWriter, Task
 from typing import Final, Generator
@@ -5,9 +6,10 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from backend.communication.argos_drone_link import ArgosDroneLink
+from backend.communication.argos_drone_link import ArgosDroneLink, ArgosWireFormat
 from backend.communication.command import Command
 from backend.communication.drone_link import InboundLogMessageCallable
+from backend.communication.log_message import ARGOS_BINARY_SCHEMA_VERSION, FullLogMessage, encode_argos_binary_frame
 from backend.exceptions.communication import ArgosCommunicationException
 
 # All test coroutines will be treated as marked
@@ -49,6 +51,18 @@ async def test_argos_drone_link_is_initiated(connection_mock: MagicMock, create_
     create_task_mock.assert_called()
 
 
+async def test_binary_wire_format_is_negotiated(connection_mock: MagicMock, create_task_mock: MagicMock) -> None:
+    with patch.object(ArgosDroneLink, "process_incoming_frames", return_value=AsyncMock()):
+        result = await ArgosDroneLink.create(
+            ARGOS_ENDPOINT, ARGOS_PORT, MagicMock(spec=InboundLogMessageCallable), ArgosWireFormat.BINARY
+        )
+
+    result.writer.write.assert_called_with(  # type: ignore[attr-defined]
+        struct.pack("I1sc", Command.SET_WIRE_FORMAT, bytes((ARGOS_BINARY_SCHEMA_VERSION,)), b"\n")
+    )
+    create_task_mock.assert_called()
+
+
 async def test_argos_drone_link_raise_on_connection_error(
     connection_mock: MagicMock, create_task_mock: MagicMock
 ) -> None:
@@ -100,6 +114,36 @@ async def test_incoming_messages_are_processed() -> None:
     on_incoming_message_callable.assert_awaited_with(data=expected_message)
 
 
+async def test_incoming_frames_accept_json_lines_and_binary_frames() -> None:
+    json_line = b'{"timestamp": 1}\n'
+    binary_frame = encode_argos_binary_frame(FullLogMessage(1, 2, 3, 4, 5, 6, 7, 8, 1.0, 2.0, 3.0, 4.0, 5, 6))
+    reader = asyncio.StreamReader()
+    reader.feed_data(json_line + binary_frame)
+    reader.feed_eof()
+    on_incoming_message_callable = AsyncMock(spec=InboundLogMessageCallable)
+
+    drone_link = ArgosDroneLink(
+        ARGOS_ENDPOINT, ARGOS_PORT, reader, MagicMock(spec=StreamWriter), on_incoming_message_callable, None
+    )
+
+    await drone_link.process_incoming_frames()
+    assert [call.kwargs["data"] for call in on_incoming_message_callable.await_args_list] == [json_line, binary_frame]
+
+
+@patch("backend.communication.argos_drone_link.logger.error")
+async def test_truncated_binary_frames_are_logged(logger_mock: MagicMock) -> None:
+    reader = asyncio.StreamReader()
+    reader.feed_data(encode_argos_binary_frame(FullLogMessage(1, 2, 3, 4, 5, 6, 7, 8, 1.0, 2.0, 3.0, 4.0, 5, 6))[:-1])
+    reader.feed_eof()
+
+    drone_link = ArgosDroneLink(
+        ARGOS_ENDPOINT, ARGOS_PORT, reader, MagicMock(spec=StreamWriter), AsyncMock(spec=InboundLogMessageCallable)
+    )
+
+    await drone_link.process_incoming_frames()
+    logger_mock.assert_called()
+
+
 @pytest.mark.parametrize("command", [command for command in Command])
 async def test_commands_are_properly_sent(command: Command) -> None:
     writer_mock = MagicMock(spec=StreamWriter)
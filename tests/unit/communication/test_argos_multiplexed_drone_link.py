@@ -0,0 +1,140 @@
+import asyncio
+import struct
+from asyncio import Transport
+from typing import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.communication.argos_drone_link import ArgosWireFormat
+from backend.communication.argos_multiplexed_drone_link import (
+    ARGOS_MULTIPLEXED_FRAME_HEADER,
+    ArgosMultiplexedDroneLink,
+    ArgosMultiplexedProtocol,
+    open_argos_multiplexed_connection,
+)
+from backend.communication.command import Command
+from backend.communication.drone_link import InboundLogMessageCallable
+from backend.communication.log_message import ARGOS_BINARY_SCHEMA_VERSION
+from backend.exceptions.communication import ArgosCommunicationException, ArgosMultiplexedCommunicationException
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+def generate_frame(drone_tag: int, body: bytes) -> bytes:
+    return ARGOS_MULTIPLEXED_FRAME_HEADER.pack(drone_tag, len(body)) + body
+
+
+@pytest.fixture()
+def protocol() -> Generator[ArgosMultiplexedProtocol, None, None]:
+    protocol = ArgosMultiplexedProtocol()
+    protocol.connection_made(MagicMock(spec=Transport))
+    yield protocol
+
+
+async def test_frames_are_demultiplexed_in_order(protocol: ArgosMultiplexedProtocol) -> None:
+    first_drone, second_drone = AsyncMock(spec=InboundLogMessageCallable), AsyncMock(spec=InboundLogMessageCallable)
+    protocol.subscribe(0, first_drone)
+    protocol.subscribe(1, second_drone)
+    data = generate_frame(0, b"first") + generate_frame(1, b"second") + generate_frame(0, b"third")
+
+    # Frames may be split anywhere by TCP
+    protocol.data_received(data[:3])
+    protocol.data_received(data[3:20])
+    protocol.data_received(data[20:])
+    assert protocol.dispatch_task
+    await protocol.dispatch_task
+
+    assert [call.kwargs["data"] for call in first_drone.await_args_list] == [b"first", b"third"]
+    second_drone.assert_awaited_once_with(data=b"second")
+    assert not protocol.buffer
+
+
+@patch("backend.communication.argos_multiplexed_drone_link.logger.error")
+async def test_frames_for_unknown_drones_are_logged(logger_mock: MagicMock, protocol: ArgosMultiplexedProtocol) -> None:
+    protocol.data_received(generate_frame(42, b"lost"))
+    assert protocol.dispatch_task
+    await protocol.dispatch_task
+
+    logger_mock.assert_called()
+
+
+@patch("backend.communication.argos_multiplexed_drone_link.ARGOS_MULTIPLEXED_PAUSE_READING_THRESHOLD", 1)
+@patch("backend.communication.argos_multiplexed_drone_link.logger.error")
+async def test_failing_frames_do_not_stop_the_dispatch(
+    logger_mock: MagicMock, protocol: ArgosMultiplexedProtocol
+) -> None:
+    on_inbound_message = AsyncMock(spec=InboundLogMessageCallable, side_effect=[ValueError("corrupted"), None])
+    protocol.subscribe(0, on_inbound_message)
+
+    protocol.data_received(generate_frame(0, b"corrupted") + generate_frame(0, b"valid"))
+    assert protocol.reading_paused
+    assert protocol.dispatch_task
+    await protocol.dispatch_task
+
+    on_inbound_message.assert_awaited_with(data=b"valid")
+    logger_mock.assert_called_once()
+    assert not protocol.reading_paused
+    protocol.transport.resume_reading.assert_called_once()  # type: ignore[union-attr]
+
+
+async def test_frames_are_sent_with_the_drone_tag(protocol: ArgosMultiplexedProtocol) -> None:
+    protocol.send(3, b"body")
+
+    protocol.transport.write.assert_called_with(generate_frame(3, b"body"))  # type: ignore[union-attr]
+
+
+async def test_send_raises_once_connection_is_lost(protocol: ArgosMultiplexedProtocol) -> None:
+    protocol.connection_lost(None)
+
+    with pytest.raises(ArgosMultiplexedCommunicationException):
+        protocol.send(3, b"body")
+
+
+async def test_open_connection_raises_on_connection_error() -> None:
+    with patch.object(asyncio.get_running_loop(), "create_connection", side_effect=OSError):
+        with pytest.raises(ArgosCommunicationException):
+            await open_argos_multiplexed_connection("argos", 6969)
+
+
+@pytest.mark.parametrize("wire_format", [wire_format for wire_format in ArgosWireFormat])
+async def test_link_subscribes_and_negotiates_wire_format(
+    protocol: ArgosMultiplexedProtocol, wire_format: ArgosWireFormat
+) -> None:
+    on_inbound_message = AsyncMock(spec=InboundLogMessageCallable)
+
+    await ArgosMultiplexedDroneLink.create(protocol, 2, on_inbound_message, wire_format)
+
+    assert protocol.subscribers[2] == on_inbound_message
+    if wire_format == ArgosWireFormat.BINARY:
+        protocol.transport.write.assert_called_with(  # type: ignore[union-attr]
+            generate_frame(
+                2, struct.pack("I1sc", Command.SET_WIRE_FORMAT, bytes((ARGOS_BINARY_SCHEMA_VERSION,)), b"\n")
+            )
+        )
+    else:
+        protocol.transport.write.assert_not_called()  # type: ignore[union-attr]
+
+
+@pytest.mark.parametrize("command", [command for command in Command])
+async def test_commands_are_sent_on_the_shared_connection(protocol: ArgosMultiplexedProtocol, command: Command) -> None:
+    link = ArgosMultiplexedDroneLink(protocol, 1, AsyncMock(spec=InboundLogMessageCallable))
+
+    await link.send_command(command)
+
+    protocol.transport.write.assert_called_with(  # type: ignore[union-attr]
+        generate_frame(1, struct.pack("Ic", command.value, b"\n"))
+    )
+
+
+async def test_connection_is_closed_with_the_last_link(protocol: ArgosMultiplexedProtocol) -> None:
+    first_link = await ArgosMultiplexedDroneLink.create(protocol, 0, AsyncMock(spec=InboundLogMessageCallable))
+    second_link = await ArgosMultiplexedDroneLink.create(protocol, 1, AsyncMock(spec=InboundLogMessageCallable))
+    transport_mock = protocol.transport
+
+    await first_link.terminate()
+    transport_mock.close.assert_not_called()  # type: ignore[union-attr]
+
+    await second_link.terminate()
+    transport_mock.close.assert_called()  # type: ignore[union-attr]
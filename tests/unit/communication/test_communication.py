@@ -6,12 +6,16 @@ from unittest.mock import MagicMock, call, patch
 import pytest
 from coveo_settings.mock import mock_config_value
 
-from backend.communication.argos_drone_link import ArgosDroneLink
+from backend.communication.argos_drone_link import ArgosDroneLink, ArgosWireFormat
+from backend.communication.argos_multiplexed_drone_link import ArgosMultiplexedDroneLink, ArgosMultiplexedProtocol
 from backend.communication.communication import (
     ARGOS_DRONES_STARTING_PORT,
+    ARGOS_LINK_MODE,
     ARGOS_NUMBER_OF_DRONES,
     CRAZYFLIE_ADDRESSES,
+    ArgosLinkMode,
     initiate_argos_drone_link,
+    initiate_argos_multiplexed_drone_links,
     initiate_crazyflie_drone_link,
     initiate_links,
     terminate_links,
@@ -68,10 +72,33 @@ async def test_initiate_argos_drone_link(
     assert isinstance(create_argos_drone_mock.call_args.args[0], str)
     assert create_argos_drone_mock.call_args.args[1] == DRONE_PORT
     assert callable(create_argos_drone_mock.call_args.args[2])
+    assert create_argos_drone_mock.call_args.args[3] == ArgosWireFormat.JSON
     assert_drone_is_registered(mocked_argos_drone_link, registry_mock)
     create_drone_bd_mock.assert_called()
 
 
+@patch.object(ArgosMultiplexedDroneLink, "create")
+@patch("backend.communication.communication.open_argos_multiplexed_connection")
+async def test_initiate_argos_multiplexed_drone_links(
+    open_connection_mock: MagicMock,
+    create_multiplexed_drone_mock: MagicMock,
+    registry_mock: MagicMock,
+    create_drone_bd_mock: MagicMock,
+) -> None:
+    protocol_mock = MagicMock(spec=ArgosMultiplexedProtocol)
+    open_connection_mock.return_value = protocol_mock
+    create_multiplexed_drone_mock.return_value = MagicMock(spec=ArgosMultiplexedDroneLink)
+
+    with mock_config_value(ARGOS_NUMBER_OF_DRONES, value=3):
+        await initiate_argos_multiplexed_drone_links()
+
+    open_connection_mock.assert_awaited_once()
+    assert [call.args[:2] for call in create_multiplexed_drone_mock.await_args_list] == [
+        (protocol_mock, drone_tag) for drone_tag in range(3)
+    ]
+    assert registry_mock.register_drone.call_count == 3
+
+
 @patch.object(CrazyflieDroneLink, "create")
 async def test_initiate_crazyflie_drone_link(
     create_crazyflie_drone_mock: MagicMock,
@@ -125,6 +152,22 @@ async def test_links_are_initiated(crtp_mock: MagicMock, registry_mock: MagicMoc
         logger_error_mock.assert_not_called()
 
 
+async def test_multiplexed_links_are_initiated(crtp_mock: MagicMock, registry_mock: MagicMock) -> None:
+    with patch(
+        "backend.communication.communication.initiate_argos_multiplexed_drone_links"
+    ) as initiate_multiplexed_links_mock, patch(
+        "backend.communication.communication.initiate_argos_drone_link"
+    ) as initiate_argos_drone_link_mock, patch(
+        "backend.communication.communication.initiate_crazyflie_drone_link"
+    ), mock_config_value(
+        ARGOS_LINK_MODE, value=ArgosLinkMode.MULTIPLEXED.value
+    ):
+        await initiate_links()
+
+        initiate_multiplexed_links_mock.assert_awaited()
+        initiate_argos_drone_link_mock.assert_not_called()
+
+
 async def test_initiate_links_logs_exceptions(crtp_mock: MagicMock, registry_mock: MagicMock) -> None:
     argos_starting_port = 3995
     argos_number_of_drones = 2
@@ -1,7 +1,8 @@
 import asyncio
 import struct
+import threading
 from asyncio import AbstractEventLoop, Event
-from typing import Any, AsyncGenerator, Final, Generator
+from typing import AsyncGenerator, Final, Generator
 from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
@@ -57,9 +58,16 @@ def crazyflie_mock() -> Generator[MagicMock, None, None]:
 async def crazyflie_link_mock(
     crazyflie_mock: MagicMock, wait_mock: MagicMock, log_config_mock: MagicMock
 ) -> AsyncGenerator[CrazyflieDroneLink, None]:
-    yield await CrazyflieDroneLink.create(
+    crazyflie_link = await CrazyflieDroneLink.create(
         CRAZYFLIE_URI, MagicMock(spec=InboundLogMessageCallable), MagicMock(spec=InboundLogMessageCallable)
     )
+    yield crazyflie_link
+    cancel_forwarding_tasks(crazyflie_link)
+
+
+def cancel_forwarding_tasks(crazyflie_link: CrazyflieDroneLink) -> None:
+    for task in crazyflie_link.forwarding_tasks:
+        task.cancel()
 
 
 async def test_crazyflie_drone_is_initiated(
@@ -79,6 +87,8 @@ async def test_crazyflie_drone_is_initiated(
     wait_mock.assert_awaited()
     crazyflie_link.crazyflie.log.add_config.assert_called_with(log_config_mock)
     log_config_mock.start.assert_called()
+    assert len(crazyflie_link.forwarding_tasks) == 2
+    cancel_forwarding_tasks(crazyflie_link)
 
 
 async def test_initiate_raise_on_connection_timeout(
@@ -86,11 +96,16 @@ async def test_initiate_raise_on_connection_timeout(
 ) -> None:
     wait_mock.side_effect = asyncio.TimeoutError
 
+    tasks = asyncio.all_tasks()
+
     with pytest.raises(CrazyflieCommunicationException):
         await CrazyflieDroneLink.create(
             CRAZYFLIE_URI, MagicMock(spec=InboundLogMessageCallable), MagicMock(spec=InboundLogMessageCallable)
         )
 
+    # No forwarding task is left waiting for a link that never connected
+    assert asyncio.all_tasks() == tasks
+
 
 @patch("shutil.rmtree")
 async def test_crazyflie_drone_is_terminated(
@@ -113,11 +128,16 @@ async def test_set_connection_when_connected(crazyflie_link_mock: CrazyflieDrone
 
 
 @patch("backend.communication.crazyflie_drone_link.logger.warning")
-@patch("asyncio.run_coroutine_threadsafe")
-async def test_log_on_received_char(logger_mock: MagicMock, _: Any, crazyflie_link_mock: CrazyflieDroneLink) -> None:
-    crazyflie_link_mock._on_received_char("text", loop=MagicMock(spec=AbstractEventLoop))
+async def test_received_char_is_logged_and_forwarded(
+    logger_mock: MagicMock, crazyflie_link_mock: CrazyflieDroneLink
+) -> None:
+    crazyflie_link_mock.on_debug_log_message = AsyncMock()
 
+    crazyflie_link_mock._on_received_char("text")
+
+    await asyncio.sleep(0.1)
     logger_mock.assert_called()
+    crazyflie_link_mock.on_debug_log_message.assert_awaited_with(message="text")
 
 
 async def test_clear_connection_when_connection_failed(crazyflie_link_mock: CrazyflieDroneLink) -> None:
@@ -157,10 +177,48 @@ async def test_incoming_message_callable_is_called_on_message(
     data = {"mayday": "the_drone_is_one_fire"}
     crazyflie_link_mock.on_inbound_log_message = AsyncMock()
 
-    crazyflie_link_mock._on_incoming_log_message(timestamp, data, log_config_mock, asyncio.get_running_loop())
+    crazyflie_link_mock._on_incoming_log_message(timestamp, data, log_config_mock)
 
     await asyncio.sleep(0.1)
-    crazyflie_link_mock.on_inbound_log_message.assert_awaited()
+    crazyflie_link_mock.on_inbound_log_message.assert_awaited_with(
+        timestamp=timestamp, data=data, log_config=log_config_mock
+    )
+
+
+async def test_messages_pushed_by_a_thread_are_forwarded_in_order(
+    crazyflie_link_mock: CrazyflieDroneLink, log_config_mock: MagicMock
+) -> None:
+    crazyflie_link_mock.on_inbound_log_message = AsyncMock(side_effect=[ValueError, None, None])
+
+    def push_messages() -> None:
+        for timestamp in range(3):
+            crazyflie_link_mock._on_incoming_log_message(timestamp, {}, log_config_mock)
+
+    pushing_thread = threading.Thread(target=push_messages)
+    pushing_thread.start()
+    pushing_thread.join()
+    await asyncio.sleep(0.1)
+
+    # The first message failed, the next ones are still forwarded
+    assert [call.kwargs["timestamp"] for call in crazyflie_link_mock.on_inbound_log_message.await_args_list] == [
+        0,
+        1,
+        2,
+    ]
+    assert crazyflie_link_mock.log_handoff
+    assert crazyflie_link_mock.log_handoff.statistics.handed_off == 3
+
+
+@patch("shutil.rmtree")
+async def test_forwarding_tasks_are_cancelled_on_termination(
+    _: MagicMock, crazyflie_link_mock: CrazyflieDroneLink
+) -> None:
+    forwarding_tasks = crazyflie_link_mock.forwarding_tasks
+
+    await crazyflie_link_mock.terminate()
+    await asyncio.sleep(0)
+
+    assert all(task.cancelled() for task in forwarding_tasks)
 
 
 @pytest.mark.parametrize("command", [command for command in Command])
@@ -0,0 +1,62 @@
+from backend.communication.drone_mailbox import DroneMailbox
+from backend.communication.log_message import FullLogMessage
+
+
+def create_full_log_message(x: float) -> FullLogMessage:
+    return FullLogMessage(
+        drone_id=1,
+        timestamp=2,
+        kalman_state_x=x,
+        kalman_state_y=0,
+        kalman_state_z=0,
+        state_estimate_yaw=40,
+        drone_state=0,
+        drone_battery_level=90,
+        range_front=110,
+        range_back=111,
+        range_up=112,
+        range_zrange=113,
+        range_left=114,
+        range_right=116,
+    )
+
+
+def test_post_keeps_the_newest_message() -> None:
+    mailbox = DroneMailbox()
+    newest_message = create_full_log_message(2)
+
+    mailbox.post(create_full_log_message(1))
+    mailbox.post(newest_message)
+
+    assert mailbox.position_message is newest_message
+    assert mailbox.range_message is newest_message
+
+
+def test_post_accumulates_the_distance_of_overwritten_messages() -> None:
+    mailbox = DroneMailbox()
+
+    for x in (1, 3, 2):
+        mailbox.post(create_full_log_message(x))
+
+    assert mailbox.pending_distance == 4
+
+
+def test_take_clears_the_mailbox() -> None:
+    mailbox = DroneMailbox()
+    log_message = create_full_log_message(1)
+    mailbox.post(log_message)
+
+    assert mailbox.take() == (log_message, log_message, 1)
+    assert mailbox.take() == (None, None, 0)
+    assert mailbox.last_position == (1, 0, 0)
+
+
+def test_mailbox_is_pending_until_taken() -> None:
+    mailbox = DroneMailbox()
+    assert not mailbox.has_pending
+
+    mailbox.post(create_full_log_message(1))
+    assert mailbox.has_pending
+
+    mailbox.take()
+    assert not mailbox.has_pending
@@ -1,18 +1,26 @@
 import asyncio
+import dataclasses
 import json
-from asyncio import Queue
 from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
 from cflib.crazyflie.log import LogTocElement, LogVariable
 
+from backend.bounded_queue import BoundedQueue, QueuePolicy
+from backend.communication.drone_mailbox import DroneMailbox
 from backend.communication.log_message import (
+    ARGOS_BINARY_FIELDS,
+    ARGOS_BINARY_FRAME_HEADER,
+    ARGOS_BINARY_FRAME_MAGIC,
     BatteryAndPositionLogMessage,
     CRAZYFLIE_LOG_CONFIGS,
     FullLogMessage,
+    LOG_MESSAGE_DECODERS,
     LogMessage,
+    LogMessageDecoder,
     RangeLogMessage,
+    encode_argos_binary_frame,
     generate_log_configs,
     on_incoming_argos_log_message,
     on_incoming_crazyflie_log_message,
@@ -39,7 +47,7 @@ def test_generate_log_configs() -> None:
 
 
 async def test_crazyflie_message_are_queued_on_incoming_battery_message() -> None:
-    queue: Queue[LogMessage] = Queue()
+    queue: BoundedQueue[LogMessage] = BoundedQueue()
     log_message = BatteryAndPositionLogMessage(
         drone_id=1,
         timestamp=123,
@@ -69,7 +77,7 @@ async def test_crazyflie_message_are_queued_on_incoming_battery_message() -> Non
 
 
 async def test_crazyflie_messages_are_queued_on_incoming_range_message() -> None:
-    queue: Queue[LogMessage] = Queue()
+    queue: BoundedQueue[LogMessage] = BoundedQueue()
     log_message = RangeLogMessage(
         drone_id=1,
         timestamp=123,
@@ -98,18 +106,29 @@ async def test_crazyflie_messages_are_queued_on_incoming_range_message() -> None
     assert message == log_message
 
 
+async def test_crazyflie_messages_are_dropped_when_queue_is_full() -> None:
+    queue: BoundedQueue[LogMessage] = BoundedQueue(1, QueuePolicy.BLOCK)
+    queue.put_nowait(MagicMock(spec=LogMessage))
+    log_config = next(config for config in generate_log_configs() if config.name == "range")
+    data = {"range.front": 1, "range.back": 2, "range.up": 3, "range.zrange": 4, "range.left": 5, "range.right": 6}
+
+    await asyncio.wait_for(on_incoming_crazyflie_log_message(1, queue, 0, data=data, log_config=log_config), 0.1)
+
+    assert queue.dropped == 1
+
+
 @patch("backend.communication.log_message.logger")
 async def test_errors_are_logged_on_unsupported_config_name(logger_mock: MagicMock) -> None:
     log_config = next(generate_log_configs())
     log_config.name = "bAdNaMe"
 
-    await on_incoming_crazyflie_log_message(1, Queue(), 0, {}, log_config)
+    await on_incoming_crazyflie_log_message(1, BoundedQueue(), 0, {}, log_config)
 
     logger_mock.error.assert_called()
 
 
 async def test_argos_messages_are_queued_on_incoming_message() -> None:
-    queue: Queue[LogMessage] = Queue()
+    queue: BoundedQueue[LogMessage] = BoundedQueue()
     log_message = FullLogMessage(
         drone_id=1,
         timestamp=123,
@@ -146,3 +165,88 @@ async def test_argos_messages_are_queued_on_incoming_message() -> None:
 
     message = await asyncio.wait_for(queue.get(), 0.1)
     assert message == log_message
+
+
+def test_decoder_matches_keys_like_flex() -> None:
+    decoder = LogMessageDecoder(RangeLogMessage)
+
+    message = decoder.decode(
+        {"range.front": 1, "RANGE_BACK": 2, "range.up": 3, "range.left": 4, "range.right": 5, "range.zrange": 6},
+        drone_id=7,
+        timestamp=8,
+    )
+
+    assert message == RangeLogMessage(
+        drone_id=7, timestamp=8, range_front=1, range_back=2, range_up=3, range_left=4, range_right=5, range_zrange=6
+    )
+
+
+def test_decoder_ignores_unknown_keys_and_rejects_missing_fields() -> None:
+    decoder = LogMessageDecoder(RangeLogMessage)
+
+    with pytest.raises(TypeError):
+        decoder.decode({"range.front": 1, "unknown": 2}, drone_id=7, timestamp=8)
+
+    assert decoder.get_field_name("unknown") is None
+    assert decoder.get_field_name("range.front") == "range_front"
+
+
+def test_decoders_are_built_for_every_log_message_type() -> None:
+    assert set(LOG_MESSAGE_DECODERS) == {BatteryAndPositionLogMessage, RangeLogMessage, FullLogMessage}
+    for configuration in CRAZYFLIE_LOG_CONFIGS:
+        assert LOG_MESSAGE_DECODERS[configuration.dataclass].message_type is configuration.dataclass
+
+
+def generate_full_log_message() -> FullLogMessage:
+    return FullLogMessage(
+        drone_id=1,
+        timestamp=123,
+        kalman_state_x=1.5,
+        kalman_state_y=-2.25,
+        kalman_state_z=3,
+        state_estimate_yaw=40,
+        drone_state=5,
+        drone_battery_level=10,
+        range_front=10,
+        range_back=11,
+        range_up=13,
+        range_zrange=43,
+        range_left=112,
+        range_right=1031,
+    )
+
+
+def test_argos_binary_payload_follows_full_log_message_fields() -> None:
+    assert ARGOS_BINARY_FIELDS == tuple(field.name for field in dataclasses.fields(FullLogMessage))[1:]
+
+
+async def test_argos_binary_frames_are_queued_on_incoming_message() -> None:
+    queue: BoundedQueue[LogMessage] = BoundedQueue()
+    log_message = generate_full_log_message()
+
+    await on_incoming_argos_log_message(log_message.drone_id, queue, encode_argos_binary_frame(log_message))
+
+    message = await asyncio.wait_for(queue.get(), 0.1)
+    assert message == log_message
+
+
+@patch("backend.communication.log_message.logger")
+async def test_argos_binary_frames_with_unknown_schema_are_dropped(logger_mock: MagicMock) -> None:
+    queue: BoundedQueue[LogMessage] = BoundedQueue()
+    frame = ARGOS_BINARY_FRAME_HEADER.pack(ARGOS_BINARY_FRAME_MAGIC, 255, 0)
+
+    await on_incoming_argos_log_message(1, queue, frame)
+
+    assert queue.empty()
+    logger_mock.error.assert_called()
+
+
+async def test_argos_messages_are_posted_to_the_mailbox() -> None:
+    queue: BoundedQueue[LogMessage] = BoundedQueue()
+    mailbox = DroneMailbox()
+    log_message = generate_full_log_message()
+
+    await on_incoming_argos_log_message(log_message.drone_id, queue, encode_argos_binary_frame(log_message), mailbox)
+
+    assert mailbox.position_message == log_message
+    assert queue.qsize() == 1
@@ -0,0 +1,49 @@
+import asyncio
+import threading
+from asyncio import AbstractEventLoop
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.communication.thread_handoff import ThreadHandoff
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+async def test_items_pushed_before_the_loop_runs_are_taken_as_one_batch() -> None:
+    handoff: ThreadHandoff[int] = ThreadHandoff(asyncio.get_running_loop())
+
+    def push_items() -> None:
+        for item in range(5):
+            handoff.push(item)
+
+    pushing_thread = threading.Thread(target=push_items)
+    pushing_thread.start()
+    pushing_thread.join()
+
+    assert await asyncio.wait_for(handoff.take_batch(), 1) == [0, 1, 2, 3, 4]
+    assert handoff.statistics.batch_count == 1
+    assert handoff.statistics.largest_batch_size == 5
+    assert handoff.statistics.max_latency > 0
+
+
+async def test_a_new_batch_wakes_the_loop_up_again() -> None:
+    handoff: ThreadHandoff[int] = ThreadHandoff(asyncio.get_running_loop())
+    handoff.push(1)
+    await asyncio.wait_for(handoff.take_batch(), 1)
+
+    handoff.push(2)
+
+    assert await asyncio.wait_for(handoff.take_batch(), 1) == [2]
+    assert handoff.statistics.average_batch_size == 1
+
+
+def test_only_the_first_item_of_a_batch_wakes_the_loop_up() -> None:
+    loop_mock = MagicMock(spec=AbstractEventLoop)
+    handoff: ThreadHandoff[int] = ThreadHandoff(loop_mock)
+
+    handoff.push(1)
+    handoff.push(2)
+
+    loop_mock.call_soon_threadsafe.assert_called_once()
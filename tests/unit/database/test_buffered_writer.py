@@ -0,0 +1,83 @@
+from typing import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.communication.drone_link import DroneLink
+from backend.database.buffered_writer import BatchStatistics, DroneMetricsWriter
+from backend.registered_drone import RegisteredDrone
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture()
+def create_batch_mock() -> Generator[AsyncMock, None, None]:
+    with patch("backend.database.buffered_writer.create_drone_metrics_batch", new_callable=AsyncMock) as mocked:
+        yield mocked
+
+
+def test_writer_is_full_once_batch_size_is_reached() -> None:
+    writer = DroneMetricsWriter(max_batch_size=2)
+    drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+
+    writer.add(drone, 1)
+    assert not writer.is_full
+
+    writer.add(drone, 1)
+    assert writer.is_full
+
+
+async def test_pending_rows_are_written_in_a_single_batch(create_batch_mock: AsyncMock) -> None:
+    writer = DroneMetricsWriter(max_batch_size=10)
+    drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+    writer.add(drone, 3)
+    writer.add(drone, 3)
+
+    await writer.flush()
+
+    create_batch_mock.assert_awaited_once()
+    rows = create_batch_mock.call_args.args[0]
+    assert len(rows) == 2
+    assert all(row["drone_id"] == 1 and row["mission_id"] == 3 for row in rows)
+    assert not writer.pending_rows
+    assert writer.statistics.flush_count == 1
+    assert writer.statistics.written_rows == 2
+    assert writer.statistics.largest_batch_size == 2
+
+
+async def test_nothing_is_written_when_buffer_is_empty(create_batch_mock: AsyncMock) -> None:
+    writer = DroneMetricsWriter()
+
+    await writer.flush()
+
+    create_batch_mock.assert_not_awaited()
+    assert writer.statistics.flush_count == 0
+
+
+@patch("backend.database.buffered_writer.logger.error")
+async def test_failed_flushes_are_counted(logger_mock: MagicMock, create_batch_mock: AsyncMock) -> None:
+    create_batch_mock.side_effect = ConnectionError
+    writer = DroneMetricsWriter()
+    writer.add(RegisteredDrone(1, MagicMock(spec=DroneLink)), 1)
+
+    await writer.flush()
+
+    logger_mock.assert_called()
+    assert writer.statistics.failed_flush_count == 1
+    assert writer.statistics.flush_count == 0
+
+
+def test_batch_statistics_averages() -> None:
+    statistics = BatchStatistics()
+    assert statistics.average_batch_size == 0.0
+    assert statistics.average_flush_latency == 0.0
+
+    statistics.record_flush(10, 0.5)
+    statistics.record_flush(20, 1.5)
+
+    model = statistics.to_model()
+    assert model.average_batch_size == 15
+    assert model.average_flush_latency == 1.0
+    assert model.last_batch_size == 20
+    assert model.largest_batch_size == 20
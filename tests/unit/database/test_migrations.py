@@ -0,0 +1,104 @@
+import zlib
+from typing import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from backend.database.migrations import MIGRATIONS, get_latest_schema_version, get_schema_version, upgrade_schema
+from backend.exceptions.database import UnknownSchemaVersionException
+
+
+@pytest.fixture()
+def sqlite_engine() -> Generator[Engine, None, None]:
+    yield create_engine("sqlite://")
+
+
+@pytest.fixture()
+def base_mock() -> Generator[MagicMock, None, None]:
+    # The partitioned metrics table can only be created by Postgres, only the schema version is stored in SQLite
+    with patch("backend.database.migrations.Base") as mocked_base:
+        yield mocked_base
+
+
+def test_upgrade_schema_creates_a_new_database(sqlite_engine: Engine, base_mock: MagicMock) -> None:
+    with sqlite_engine.begin() as connection:
+        upgrade_schema(connection)
+
+        base_mock.metadata.create_all.assert_called_once_with(connection)
+        assert get_schema_version(connection) == get_latest_schema_version()
+
+
+def test_upgrade_schema_keeps_an_up_to_date_database(sqlite_engine: Engine, base_mock: MagicMock) -> None:
+    with sqlite_engine.begin() as connection:
+        upgrade_schema(connection)
+        base_mock.reset_mock()
+
+        upgrade_schema(connection)
+
+        base_mock.metadata.drop_all.assert_not_called()
+        base_mock.metadata.create_all.assert_not_called()
+
+
+def test_upgrade_schema_applies_the_missing_migrations(sqlite_engine: Engine, base_mock: MagicMock) -> None:
+    with sqlite_engine.begin() as connection:
+        upgrade_schema(connection)
+        migration_mock = MagicMock()
+
+        with patch("backend.database.migrations.MIGRATIONS", [*MIGRATIONS, migration_mock]):
+            upgrade_schema(connection)
+            upgrade_schema(connection)
+
+            migration_mock.assert_called_once_with(connection)
+            assert get_schema_version(connection) == len(MIGRATIONS) + 2
+
+
+def test_upgrade_schema_refuses_a_newer_database(sqlite_engine: Engine, base_mock: MagicMock) -> None:
+    with sqlite_engine.begin() as connection:
+        with patch("backend.database.migrations.MIGRATIONS", [*MIGRATIONS, MagicMock()]):
+            upgrade_schema(connection)
+
+        with pytest.raises(UnknownSchemaVersionException):
+            upgrade_schema(connection)
+
+
+def test_partition_metrics_by_mission_copies_the_metrics() -> None:
+    connection_mock = MagicMock()
+    connection_mock.execute.return_value.scalars.return_value = [1, 2]
+
+    MIGRATIONS[0](connection_mock)
+
+    statements = [str(call.args[0]) for call in connection_mock.execute.call_args_list]
+    assert "ALTER TABLE metrics RENAME TO metrics_unpartitioned" in statements
+    assert any(statement.startswith("CREATE TABLE metrics (") for statement in statements)
+    assert any("metrics_mission_2 PARTITION OF metrics" in statement for statement in statements)
+    assert statements[-1] == "DROP TABLE metrics_unpartitioned"
+
+
+def test_compress_saved_maps() -> None:
+    connection_mock = MagicMock()
+    connection_mock.execute.return_value.all.return_value = [(1, b"YWJj")]
+
+    MIGRATIONS[1](connection_mock)
+
+    parameters = connection_mock.execute.call_args.args[1]
+    assert parameters["mission_id"] == 1
+    assert parameters["base64_encoded"]
+    assert zlib.decompress(parameters["map"]) == b"abc"
+
+
+@pytest.mark.parametrize("stored_map", [b"data:image/png;base64,YWJj", b"YWJ="])
+@patch("backend.database.migrations.logger.warning")
+def test_compress_saved_maps_keeps_the_maps_that_are_not_canonical_base64(
+    logger_mock: MagicMock, stored_map: bytes
+) -> None:
+    connection_mock = MagicMock()
+    connection_mock.execute.return_value.all.return_value = [(1, stored_map)]
+
+    MIGRATIONS[1](connection_mock)
+
+    parameters = connection_mock.execute.call_args.args[1]
+    assert not parameters["base64_encoded"]
+    assert zlib.decompress(parameters["map"]) == stored_map
+    logger_mock.assert_called_once()
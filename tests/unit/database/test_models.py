@@ -1,9 +1,11 @@
 import base64
 import datetime
 
-from backend.database.models import SavedMap, SavedMission
+import pytest
+
+from backend.database.models import SavedLog, SavedMap, SavedMission
 from backend.models.drone import DroneType
-from backend.models.mission import Map, Mission, MissionState
+from backend.models.mission import Log, Map, Mission, MissionState
 
 
 def test_saved_mission_to_model() -> None:
@@ -14,6 +16,7 @@ def test_saved_mission_to_model() -> None:
         starting_time=datetime.datetime.utcnow(),
         total_distance=2.2,
         ending_time=None,
+        telemetry_log_sampling=1,
     )
 
     assert saved_mission.to_model() == Mission(
@@ -23,10 +26,50 @@ def test_saved_mission_to_model() -> None:
         total_distance=saved_mission.total_distance,
         starting_time=saved_mission.starting_time,
         ending_time=saved_mission.ending_time,
+        telemetry_log_sampling=saved_mission.telemetry_log_sampling,
     )
 
 
 def test_saved_map_to_model() -> None:
-    saved_map = SavedMap(mission_id=1, map="YWJj".encode("utf8"))
+    saved_map = SavedMap.from_raw_map(1, base64.b64decode("YWJj"))
+
+    assert saved_map.to_model() == Map(mission_id=saved_map.mission_id, map="YWJj")
+
+
+def test_saved_map_from_model_decodes_canonical_base64() -> None:
+    saved_map = SavedMap.from_model(Map(mission_id=1, map="YWJj"))
+
+    assert saved_map.base64_encoded
+    assert saved_map.raw_map == b"abc"
+
+
+@pytest.mark.parametrize("encoded_map", ["YWJj", "data:image/png;base64,YWJj", "YWJ=", "YW Jj", "carte éditée"])
+def test_saved_map_from_model_keeps_the_posted_map(encoded_map: str) -> None:
+    map_to_save = Map(mission_id=1, map=encoded_map)
+
+    assert SavedMap.from_model(map_to_save).to_model() == map_to_save
+
+
+def test_saved_map_is_compressed() -> None:
+    raw_map = bytes(10000)
+
+    saved_map = SavedMap.from_raw_map(1, raw_map)
+
+    assert len(saved_map.map) < len(raw_map)
+    assert saved_map.raw_map == raw_map
+
+
+def test_saved_log_to_model() -> None:
+    saved_log = SavedLog(id=1, mission_id=2, timestamp=datetime.datetime.utcnow(), message="Mission started")
+
+    assert saved_log.to_model() == Log(
+        id=saved_log.id, mission_id=saved_log.mission_id, timestamp=saved_log.timestamp, message=saved_log.message
+    )
+
+
+def test_saved_log_with_payload_is_formatted() -> None:
+    saved_log = SavedLog(
+        id=1, mission_id=2, timestamp=datetime.datetime.utcnow(), payload={"drone_id": 1, "kalman_state_x": 1.5}
+    )
 
-    assert saved_map.to_model() == Map(mission_id=saved_map.mission_id, map=base64.decodebytes("YWJj".encode("utf8")))
+    assert saved_log.to_model().message == "Message received: 'drone_id': 1,'kalman_state_x': 1.5"
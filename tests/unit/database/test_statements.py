@@ -1,21 +1,33 @@
 import datetime
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
-from backend.database.models import SavedMission
+from backend.communication.log_message import RangeLogMessage
+from backend.database.models import SavedLog, SavedMap, SavedMission
 from backend.database.statements import (
-    create_drone_metrics,
+    create_drone_metrics_batch,
     create_drones_mission_association,
     create_new_mission,
     create_saved_map,
+    create_saved_raw_map,
+    generate_drone_metrics_row,
     get_all_missions,
+    get_drones_metadata,
+    get_drones_metadata_columns,
     get_log_message,
     get_mission,
+    get_saved_map,
+    insert_logs_in_database,
+    select_drone_metrics,
+    stream_drones_metadata,
 )
+from backend.downsampling import DownsamplingMethod
 from backend.models.drone import DroneType
-from backend.models.mission import Log, Mission, MissionState
+from backend.models.mission import Map, MissionState
+from backend.registered_drone import RegisteredDrone
 
 
 # All test coroutines will be treated as marked
@@ -30,18 +42,21 @@ def session_mock() -> Generator[MagicMock, None, None]:
 
 @patch.object(SavedMission, "to_model")
 async def test_create_mission(to_model_mock: MagicMock, session_mock: MagicMock) -> None:
+    session_mock.add = MagicMock(side_effect=lambda mission: setattr(mission, "id", 3))
+
     await create_new_mission(drone_type=DroneType.ARGOS)
 
     session_mock.add.assert_called()
+    assert "metrics_mission_3 PARTITION OF metrics FOR VALUES IN (3)" in str(session_mock.execute.call_args.args[0])
     session_mock.commit.assert_awaited()
     session_mock.refresh.assert_awaited()
     to_model_mock.assert_called()
 
 
-async def test_create_drone(session_mock: MagicMock) -> None:
-    await create_drone_metrics(MagicMock(), 1)
+async def test_create_drone_metrics_batch(session_mock: MagicMock) -> None:
+    await create_drone_metrics_batch([{"drone_id": 1, "mission_id": 1}, {"drone_id": 2, "mission_id": 1}])
 
-    session_mock.add.assert_called()
+    session_mock.execute.assert_awaited()
     session_mock.commit.assert_awaited()
 
 
@@ -53,57 +68,187 @@ async def test_create_drone_mission_association(session_mock: MagicMock) -> None
 
 
 async def test_create_saved_map(session_mock: MagicMock) -> None:
-    await create_saved_map(MagicMock())
+    session_mock.add = MagicMock()
 
-    session_mock.add.assert_called()
+    await create_saved_map(Map(mission_id=1, map="YWJj"))
+
+    assert session_mock.add.call_args.args[0].raw_map == b"abc"
     session_mock.commit.assert_awaited()
 
 
-async def test_get_mission(session_mock: MagicMock) -> None:
-    mission = Mission(
+async def test_create_saved_raw_map(session_mock: MagicMock) -> None:
+    session_mock.add = MagicMock()
+
+    await create_saved_raw_map(1, b"abc")
+
+    saved_map = session_mock.add.call_args.args[0]
+    assert saved_map.raw_map == b"abc"
+    assert saved_map.to_model() == Map(mission_id=1, map="YWJj")
+    session_mock.commit.assert_awaited()
+
+
+async def test_get_saved_map(session_mock: MagicMock) -> None:
+    response_mock = MagicMock()
+    response_mock.scalars.return_value.first.return_value = SavedMap.from_raw_map(1, b"abc")
+    session_mock.execute = AsyncMock(return_value=response_mock)
+
+    assert await get_saved_map(1) == Map(mission_id=1, map="YWJj")
+
+
+async def test_get_saved_map_without_map(session_mock: MagicMock) -> None:
+    response_mock = MagicMock()
+    response_mock.scalars.return_value.first.return_value = None
+    session_mock.execute = AsyncMock(return_value=response_mock)
+
+    assert await get_saved_map(1) is None
+
+
+async def test_insert_logs_in_database(session_mock: MagicMock) -> None:
+    logs = [SavedLog(mission_id=1, timestamp=datetime.datetime.utcnow(), message=str(index)) for index in range(3)]
+    response_mock = MagicMock()
+    # The ids of the sequence can come back in any order
+    response_mock.scalars.return_value.all.return_value = [6, 4, 5]
+    session_mock.execute = AsyncMock(return_value=response_mock)
+
+    assert await insert_logs_in_database(logs) == [4, 5, 6]
+
+    assert session_mock.execute.await_args_list[0].args[1] == {"count": 3}
+    insert_statement = session_mock.execute.await_args_list[1].args[0]
+    parameters = insert_statement.compile(dialect=postgresql.dialect()).params
+    assert [(parameters[f"id_m{index}"], parameters[f"message_m{index}"]) for index in range(3)] == [
+        (4, "0"),
+        (5, "1"),
+        (6, "2"),
+    ]
+    session_mock.commit.assert_awaited()
+
+
+async def test_insert_logs_in_database_retries_the_whole_batch(session_mock: MagicMock) -> None:
+    session_mock.commit.side_effect = [ConnectionError, None]
+    response_mock = MagicMock()
+    response_mock.scalars.return_value.all.return_value = [1]
+    session_mock.execute = AsyncMock(return_value=response_mock)
+
+    await insert_logs_in_database([SavedLog(mission_id=1, timestamp=datetime.datetime.utcnow(), message="retry")])
+
+    # The ids and the insertion, once per attempt
+    assert session_mock.execute.await_count == 4
+    assert session_mock.commit.await_count == 2
+
+
+def generate_saved_mission() -> SavedMission:
+    return SavedMission(
         id=1,
         drone_type=DroneType.CRAZYFLIE,
         state=MissionState.CREATED,
         total_distance=0,
         starting_time=datetime.datetime.utcnow(),
         ending_time=None,
+        telemetry_log_sampling=5,
     )
 
+
+async def test_get_mission(session_mock: MagicMock) -> None:
+    saved_mission = generate_saved_mission()
+
     response_mock = MagicMock()
-    response_mock.scalars.return_value.first.return_value = mission
+    response_mock.scalars.return_value.first.return_value = saved_mission
     session_mock.execute = AsyncMock(return_value=response_mock)
     result = await get_mission(1)
 
-    assert result == mission
+    assert result == saved_mission.to_model()
+    assert result.telemetry_log_sampling == 5
     session_mock.execute.assert_awaited()
 
 
 async def test_get_all_missions(session_mock: MagicMock) -> None:
-    mission = Mission(
-        id=1,
-        drone_type=DroneType.CRAZYFLIE,
-        state=MissionState.CREATED,
-        total_distance=0,
-        starting_time=datetime.datetime.utcnow(),
-        ending_time=None,
-    )
+    saved_mission = generate_saved_mission()
 
     response_mock = MagicMock()
-    response_mock.scalars.return_value.all.return_value = [mission]
+    response_mock.scalars.return_value.all.return_value = [saved_mission]
     session_mock.execute = AsyncMock(return_value=response_mock)
     result = await get_all_missions()
 
-    assert result == [mission]
+    assert result == [saved_mission.to_model()]
     session_mock.execute.assert_awaited()
 
 
 async def test_get_log_message(session_mock: MagicMock) -> None:
-    log = Log(id=1, mission_id=1, timestamp=10, message="HELPMEPLZ")
+    log = SavedLog(id=1, mission_id=1, timestamp=datetime.datetime.utcnow(), message="HELPMEPLZ")
 
     response_mock = MagicMock()
     response_mock.scalars.return_value = [log]
     session_mock.execute = AsyncMock(return_value=response_mock)
     result = await get_log_message(1, 0)
 
-    assert result == [log]
+    assert result == [log.to_model()]
     session_mock.execute.assert_awaited()
+
+
+async def test_stream_drones_metadata(session_mock: MagicMock) -> None:
+    batches = [[MagicMock()], [MagicMock(), MagicMock()]]
+
+    async def partitions() -> AsyncGenerator[list[MagicMock], None]:
+        for batch in batches:
+            yield batch
+
+    result_mock = MagicMock()
+    result_mock.partitions = partitions
+    session_mock.stream = AsyncMock(return_value=result_mock)
+
+    assert [rows async for rows in stream_drones_metadata(1)] == batches
+    session_mock.stream.assert_awaited()
+
+
+async def test_get_drones_metadata_columns(session_mock: MagicMock) -> None:
+    response_mock = MagicMock()
+    response_mock.all.return_value = [(1, *range(10)), (1, *range(1, 11)), (2, *range(10))]
+    session_mock.execute = AsyncMock(return_value=response_mock)
+
+    metrics = await get_drones_metadata_columns(1)
+
+    assert list(metrics) == [1, 2]
+    assert list(metrics[1][0]) == [0, 1]
+    assert list(metrics[1][9]) == [9, 10]
+    assert list(metrics[2][0]) == [0]
+
+
+@pytest.mark.parametrize(
+    "method, expected_clause",
+    [(DownsamplingMethod.STRIDE, "row_number()"), (DownsamplingMethod.BUCKET_AVERAGE, "ntile(")],
+)
+async def test_select_drone_metrics_downsamples_in_the_database(
+    method: DownsamplingMethod, expected_clause: str
+) -> None:
+    statement = str(select_drone_metrics(1, 100, method).compile(dialect=postgresql.dialect()))
+
+    assert expected_clause in statement
+
+
+async def test_select_drone_metrics_without_max_points() -> None:
+    statement = str(select_drone_metrics(1, None, DownsamplingMethod.BUCKET_AVERAGE))
+
+    assert "ntile" not in statement
+
+
+async def test_get_drones_metadata_with_lttb(session_mock: MagicMock) -> None:
+    rows = [MagicMock(drone_id=drone_id, x=float(x), y=0.0) for drone_id in (1, 2) for x in range(10)]
+    response_mock = MagicMock()
+    response_mock.all.return_value = rows
+    session_mock.execute = AsyncMock(return_value=response_mock)
+
+    with patch("backend.database.statements.DronePositionOrientationRange"):
+        metadata = await get_drones_metadata(1, 4, DownsamplingMethod.LTTB)
+
+    assert [len(metrics) for metrics in metadata.values()] == [4, 4]
+
+
+def test_generate_drone_metrics_row_keeps_the_timestamps() -> None:
+    drone = RegisteredDrone(1, MagicMock())
+    log_message = RangeLogMessage(1, 1234, 3, 4, 5, 6, 7, 8)
+
+    row = generate_drone_metrics_row(drone, 2, log_message)
+
+    assert row["drone_timestamp"] == 1234
+    assert row["front"] == 3
+    assert isinstance(row["received_at"], datetime.datetime)
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.database.buffered_writer import DroneMetricsWriter
+from backend.registry import Registry
+from backend.tasks.flush_drone_metrics_task import FlushDroneMetricsTask
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture()
+def writer_mock() -> Generator[MagicMock, None, None]:
+    with patch("backend.tasks.flush_drone_metrics_task.get_registry") as patched_get_registry:
+        mocked_registry = MagicMock(spec=Registry)
+        mocked_registry.drone_metrics_writer = MagicMock(spec=DroneMetricsWriter)
+        mocked_registry.drone_metrics_writer.flush_interval = 0
+        patched_get_registry.return_value = mocked_registry
+        yield mocked_registry.drone_metrics_writer
+
+
+async def test_metrics_are_flushed_periodically(writer_mock: MagicMock) -> None:
+    writer_mock.flush = AsyncMock(side_effect=[None, asyncio.CancelledError])
+
+    await FlushDroneMetricsTask().run()
+
+    assert writer_mock.flush.await_count == 2
+
+
+async def test_metrics_are_flushed_on_termination(writer_mock: MagicMock) -> None:
+    writer_mock.flush = AsyncMock()
+
+    await FlushDroneMetricsTask().terminate()
+
+    writer_mock.flush.assert_awaited()
@@ -1,13 +1,20 @@
 import asyncio
+import dataclasses
 from asyncio import Queue
 from typing import Generator
 from unittest.mock import MagicMock, PropertyMock, patch
 
 import pytest
+from coveo_settings.mock import mock_config_value
 
-from backend.communication.log_message import LogMessage
+from backend.bounded_queue import BoundedQueue
+from backend.communication.drone_mailbox import DroneMailbox
+from backend.communication.log_message import LogMessage, RangeLogMessage
+from backend.database.buffered_writer import DroneMetricsWriter
+from backend.occupancy_grid import MAPPING_ENABLED
 from backend.registered_drone import RegisteredDrone
 from backend.registry import Registry
+from backend.statistics import ThroughputStatistics
 from backend.tasks.inbound_log_processing_task import InboundLogProcessingTask
 
 # All test coroutines will be treated as marked
@@ -32,7 +39,11 @@ def inbound_log_queue(mocked_message: MagicMock) -> Generator[MagicMock, None, N
 def registry_mock(inbound_log_queue: MagicMock) -> Generator[MagicMock, None, None]:
     with patch("backend.tasks.inbound_log_processing_task.get_registry") as patched_get_registry:
         mocked_registry = MagicMock(spec=Registry)
-        mocked_registry.inbound_log_queue = inbound_log_queue
+        mocked_registry.inbound_log_queues = [inbound_log_queue]
+        mocked_registry.inbound_shard_statistics = [ThroughputStatistics()]
+        mocked_registry.drone_metrics_writer = MagicMock(spec=DroneMetricsWriter)
+        mocked_registry.logging_queue = MagicMock(spec=BoundedQueue)
+        mocked_registry.mission_termination_queue = MagicMock(spec=BoundedQueue)
         patched_get_registry.return_value = mocked_registry
         yield mocked_registry
 
@@ -40,11 +51,17 @@ def registry_mock(inbound_log_queue: MagicMock) -> Generator[MagicMock, None, No
 async def test_inbound_log_messages_are_processed(mocked_message: MagicMock, registry_mock: MagicMock) -> None:
     task = InboundLogProcessingTask()
     mocked_drone = MagicMock(spec=RegisteredDrone)
+    mocked_drone.mailbox = None
     registry_mock.get_drone.return_value = mocked_drone
 
     await task.run()
 
     mocked_drone.update_from_log_message.assert_called_with(mocked_message)
+    registry_mock.mark_drone_changed.assert_called_with(1)
+    registry_mock.drone_metrics_writer.add.assert_called_with(
+        mocked_drone, registry_mock.get_active_mission_id(), mocked_message
+    )
+    assert registry_mock.inbound_shard_statistics[0].processed == 1
 
 
 @patch("backend.tasks.inbound_log_processing_task.logger.error")
@@ -57,3 +74,100 @@ async def test_inbound_log_messages_continue_on_unknown_drones(
     await task.run()
 
     logger_mock.assert_called()
+
+
+async def test_every_shard_is_consumed(mocked_message: MagicMock, registry_mock: MagicMock) -> None:
+    shard_queues = [MagicMock(spec=Queue) for _ in range(3)]
+    for shard_queue in shard_queues:
+        shard_queue.get.side_effect = [mocked_message, asyncio.CancelledError]
+    registry_mock.inbound_log_queues = shard_queues
+    registry_mock.inbound_shard_statistics = [ThroughputStatistics() for _ in shard_queues]
+    mocked_drone = MagicMock(spec=RegisteredDrone)
+    mocked_drone.mailbox = None
+    registry_mock.get_drone.return_value = mocked_drone
+
+    await InboundLogProcessingTask().run()
+
+    assert mocked_drone.update_from_log_message.call_count == len(shard_queues)
+    assert all(statistics.processed == 1 for statistics in registry_mock.inbound_shard_statistics)
+
+
+async def test_coalesced_drones_apply_their_mailbox(mocked_message: MagicMock, registry_mock: MagicMock) -> None:
+    mocked_drone = MagicMock(spec=RegisteredDrone)
+    mocked_drone.mailbox = DroneMailbox()
+    registry_mock.get_drone.return_value = mocked_drone
+
+    await InboundLogProcessingTask().run()
+
+    mocked_drone.apply_mailbox.assert_called_once()
+    mocked_drone.update_from_log_message.assert_not_called()
+    registry_mock.drone_metrics_writer.add.assert_called_with(
+        mocked_drone, registry_mock.get_active_mission_id(), mocked_message
+    )
+
+
+async def test_telemetry_is_logged_as_a_payload(registry_mock: MagicMock, inbound_log_queue: MagicMock) -> None:
+    log_message = RangeLogMessage(1, 2, 3, 4, 5, 6, 7, 8)
+    inbound_log_queue.get.side_effect = [log_message, asyncio.CancelledError]
+    registered_drone = RegisteredDrone(1, MagicMock(), active_mission_id=3)
+    registry_mock.get_drone.return_value = registered_drone
+
+    await InboundLogProcessingTask().run()
+
+    saved_log = registry_mock.logging_queue.put.call_args.args[0]
+    assert saved_log.mission_id == 3
+    assert saved_log.message is None
+    assert saved_log.payload == dataclasses.asdict(log_message)
+
+
+async def test_telemetry_is_not_logged_when_sampling_is_disabled(
+    mocked_message: MagicMock, registry_mock: MagicMock
+) -> None:
+    mocked_drone = MagicMock(spec=RegisteredDrone)
+    mocked_drone.mailbox = None
+    mocked_drone.should_log_telemetry.return_value = False
+    registry_mock.get_drone.return_value = mocked_drone
+
+    await InboundLogProcessingTask().run()
+
+    registry_mock.logging_queue.put.assert_not_called()
+
+
+async def test_range_messages_update_the_occupancy_grid(registry_mock: MagicMock, inbound_log_queue: MagicMock) -> None:
+    log_message = RangeLogMessage(1, 2, 3, 4, 5, 6, 7, 8)
+    inbound_log_queue.get.side_effect = [log_message, asyncio.CancelledError]
+    registered_drone = RegisteredDrone(1, MagicMock())
+    registry_mock.get_drone.return_value = registered_drone
+    registry_mock.get_active_mission_id.return_value = 3
+
+    with mock_config_value(MAPPING_ENABLED, True):
+        await InboundLogProcessingTask().run()
+
+    registry_mock.get_occupancy_grid.assert_called_with(3)
+    registry_mock.get_occupancy_grid.return_value.update.assert_called_with(
+        registered_drone.x, registered_drone.y, registered_drone.yaw, log_message
+    )
+
+
+async def test_occupancy_grid_is_not_updated_by_default(registry_mock: MagicMock, inbound_log_queue: MagicMock) -> None:
+    inbound_log_queue.get.side_effect = [RangeLogMessage(1, 2, 3, 4, 5, 6, 7, 8), asyncio.CancelledError]
+    registry_mock.get_drone.return_value = RegisteredDrone(1, MagicMock())
+    registry_mock.get_active_mission_id.return_value = 3
+
+    await InboundLogProcessingTask().run()
+
+    registry_mock.get_occupancy_grid.assert_not_called()
+
+
+async def test_drones_that_stopped_flying_trigger_the_mission_termination(
+    mocked_message: MagicMock, registry_mock: MagicMock
+) -> None:
+    mocked_drone = MagicMock(spec=RegisteredDrone)
+    mocked_drone.mailbox = None
+    registry_mock.get_drone.return_value = mocked_drone
+    registry_mock.record_flying_state.return_value = False
+
+    await InboundLogProcessingTask().run()
+
+    registry_mock.record_flying_state.assert_called_with(mocked_drone)
+    registry_mock.mission_termination_queue.put.assert_awaited_with(mocked_drone.drone_type)
@@ -0,0 +1,102 @@
+import asyncio
+import datetime
+from asyncio import Queue
+from typing import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.database.buffered_writer import BatchStatistics
+from backend.database.models import SavedLog
+from backend.log_publisher import LogPublisher
+from backend.registry import Registry
+from backend.tasks.insert_log_task import InsertLogTask, drain_logging_queue
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+def generate_log(message: str) -> SavedLog:
+    return SavedLog(mission_id=1, timestamp=datetime.datetime.utcnow(), message=message)
+
+
+@pytest.fixture()
+def registry_mock() -> Generator[MagicMock, None, None]:
+    with patch("backend.tasks.insert_log_task.get_registry") as patched_get_registry:
+        mocked_registry = MagicMock(spec=Registry)
+        mocked_registry.log_writer_statistics = BatchStatistics()
+        mocked_registry.log_publisher = MagicMock(spec=LogPublisher)
+        patched_get_registry.return_value = mocked_registry
+        yield mocked_registry
+
+
+@pytest.fixture()
+def insert_logs_mock() -> Generator[AsyncMock, None, None]:
+    with patch("backend.tasks.insert_log_task.insert_logs_in_database", new_callable=AsyncMock) as mocked:
+        yield mocked
+
+
+async def test_queue_is_drained_up_to_the_batch_size(registry_mock: MagicMock) -> None:
+    registry_mock.logging_queue = Queue()
+    for index in range(5):
+        registry_mock.logging_queue.put_nowait(generate_log(str(index)))
+
+    logs = drain_logging_queue(generate_log("first"), max_batch_size=4)
+
+    assert [log.message for log in logs] == ["first", "0", "1", "2"]
+    assert registry_mock.logging_queue.qsize() == 2
+
+
+async def test_logs_are_inserted_in_batches(registry_mock: MagicMock, insert_logs_mock: AsyncMock) -> None:
+    first_log, second_log = generate_log("first"), generate_log("second")
+    queue_mock = MagicMock(spec=Queue)
+    queue_mock.get.side_effect = [first_log, asyncio.CancelledError]
+    queue_mock.empty.side_effect = [False, True]
+    queue_mock.get_nowait.return_value = second_log
+    registry_mock.logging_queue = queue_mock
+
+    await InsertLogTask().run()
+
+    insert_logs_mock.assert_awaited_once_with([first_log, second_log])
+    assert registry_mock.log_writer_statistics.written_rows == 2
+
+
+async def test_written_logs_are_published_with_their_ids(registry_mock: MagicMock, insert_logs_mock: AsyncMock) -> None:
+    insert_logs_mock.return_value = [7]
+    log = generate_log("first")
+    queue_mock = MagicMock(spec=Queue)
+    queue_mock.get.side_effect = [log, asyncio.CancelledError]
+    queue_mock.empty.return_value = True
+    registry_mock.logging_queue = queue_mock
+
+    await InsertLogTask().run()
+
+    assert log.id == 7
+    registry_mock.log_publisher.publish.assert_called_once_with([log])
+
+
+@patch("backend.tasks.insert_log_task.logger.error")
+async def test_failed_batches_are_counted(
+    logger_mock: MagicMock, registry_mock: MagicMock, insert_logs_mock: AsyncMock
+) -> None:
+    insert_logs_mock.side_effect = ConnectionError
+    queue_mock = MagicMock(spec=Queue)
+    queue_mock.get.side_effect = [generate_log("lost"), asyncio.CancelledError]
+    queue_mock.empty.return_value = True
+    registry_mock.logging_queue = queue_mock
+
+    await InsertLogTask().run()
+
+    logger_mock.assert_called()
+    assert registry_mock.log_writer_statistics.failed_flush_count == 1
+    registry_mock.log_publisher.publish.assert_not_called()
+
+
+async def test_remaining_logs_are_written_on_termination(registry_mock: MagicMock, insert_logs_mock: AsyncMock) -> None:
+    registry_mock.logging_queue = Queue()
+    registry_mock.logging_queue.put_nowait(generate_log("pending"))
+
+    await InsertLogTask().terminate()
+
+    insert_logs_mock.assert_awaited_once()
+    assert registry_mock.logging_queue.empty()
@@ -0,0 +1,67 @@
+from typing import Generator
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from backend.database.models import SavedMap
+from backend.models.mission import Map
+from backend.occupancy_grid import PNG_SIGNATURE
+from backend.registry import Registry
+from backend.tasks.process_mission_termination_task import save_occupancy_grid
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture()
+def registry() -> Generator[Registry, None, None]:
+    with patch("backend.tasks.process_mission_termination_task.get_registry") as patched_get_registry:
+        patched_get_registry.return_value = Registry()
+        yield patched_get_registry.return_value
+
+
+@pytest.fixture()
+def get_saved_map_model_mock() -> Generator[AsyncMock, None, None]:
+    with patch("backend.tasks.process_mission_termination_task.get_saved_map_model", new_callable=AsyncMock) as mocked:
+        mocked.return_value = None
+        yield mocked
+
+
+@pytest.fixture()
+def create_saved_raw_map_mock() -> Generator[AsyncMock, None, None]:
+    with patch("backend.tasks.process_mission_termination_task.create_saved_raw_map", new_callable=AsyncMock) as mocked:
+        yield mocked
+
+
+async def test_occupancy_grid_is_saved_as_the_map(
+    registry: Registry, get_saved_map_model_mock: AsyncMock, create_saved_raw_map_mock: AsyncMock
+) -> None:
+    registry.get_occupancy_grid(1)
+    registry.saved_map_cache.put(1, ('"etag"', Map(mission_id=1, map="")))
+
+    await save_occupancy_grid(1)
+
+    mission_id, raw_map = create_saved_raw_map_mock.call_args.args
+    assert mission_id == 1
+    assert raw_map.startswith(PNG_SIGNATURE)
+    assert registry.saved_map_cache.get(1) is None
+
+
+async def test_posted_map_is_not_replaced_by_the_occupancy_grid(
+    registry: Registry, get_saved_map_model_mock: AsyncMock, create_saved_raw_map_mock: AsyncMock
+) -> None:
+    registry.get_occupancy_grid(1)
+    get_saved_map_model_mock.return_value = SavedMap.from_raw_map(1, b"map")
+
+    await save_occupancy_grid(1)
+
+    create_saved_raw_map_mock.assert_not_awaited()
+
+
+async def test_mission_without_occupancy_grid_saves_no_map(
+    registry: Registry, get_saved_map_model_mock: AsyncMock, create_saved_raw_map_mock: AsyncMock
+) -> None:
+    await save_occupancy_grid(1)
+
+    get_saved_map_model_mock.assert_not_awaited()
+    create_saved_raw_map_mock.assert_not_awaited()
@@ -0,0 +1,26 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.drone_state_publisher import DroneStatePublisher
+from backend.registry import Registry
+from backend.tasks.publish_drone_state_task import PublishDroneStateTask
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+@patch("backend.tasks.publish_drone_state_task.get_registry")
+async def test_drone_state_is_published_periodically(get_registry_mock: MagicMock) -> None:
+    mocked_registry = MagicMock(spec=Registry)
+    mocked_registry.drones = {}
+    mocked_registry.drone_state_publisher = MagicMock(spec=DroneStatePublisher)
+    mocked_registry.drone_state_publisher.interval = 0
+    mocked_registry.drone_state_publisher.publish.side_effect = [None, asyncio.CancelledError]
+    get_registry_mock.return_value = mocked_registry
+
+    await PublishDroneStateTask().run()
+
+    mocked_registry.apply_pending_mailboxes.assert_called()
+    mocked_registry.drone_state_publisher.publish.assert_called_with(mocked_registry.drones)
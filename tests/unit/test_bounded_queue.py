@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from backend.bounded_queue import BoundedQueue, QueuePolicy
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+async def test_blocking_queue_waits_for_room() -> None:
+    queue: BoundedQueue[int] = BoundedQueue(1, QueuePolicy.BLOCK)
+    await queue.put(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.put(2), 0.01)
+
+    assert queue.dropped == 0
+
+
+async def test_drop_oldest_keeps_the_newest_items() -> None:
+    queue: BoundedQueue[int] = BoundedQueue(2, QueuePolicy.DROP_OLDEST)
+
+    for item in range(4):
+        await queue.put(item)
+
+    assert [queue.get_nowait(), queue.get_nowait()] == [2, 3]
+    assert queue.dropped == 2
+
+
+async def test_drop_newest_keeps_the_oldest_items() -> None:
+    queue: BoundedQueue[int] = BoundedQueue(2, QueuePolicy.DROP_NEWEST)
+
+    for item in range(4):
+        await queue.put(item)
+
+    assert [queue.get_nowait(), queue.get_nowait()] == [0, 1]
+    assert queue.dropped == 2
+
+
+@pytest.mark.parametrize("policy", [QueuePolicy.BLOCK, QueuePolicy.DROP_NEWEST])
+async def test_offer_never_blocks(policy: QueuePolicy) -> None:
+    queue: BoundedQueue[int] = BoundedQueue(1, policy)
+
+    assert queue.offer(1)
+    assert not queue.offer(2)
+
+    assert queue.to_model().dict() == {"size": 1, "maxsize": 1, "policy": policy.value, "dropped": 1}
+
+
+async def test_unbounded_queue_never_drops() -> None:
+    queue: BoundedQueue[int] = BoundedQueue()
+
+    for item in range(100):
+        assert queue.offer(item)
+
+    assert queue.dropped == 0
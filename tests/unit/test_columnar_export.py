@@ -0,0 +1,36 @@
+from array import array
+
+from backend.columnar_export import (
+    COLUMNAR_COLUMNS,
+    COLUMNAR_DRONE_HEADER,
+    COLUMNAR_HEADER,
+    COLUMNAR_MAGIC,
+    COLUMNAR_VERSION,
+    create_columns,
+    encode_columnar_metrics,
+)
+
+
+def test_create_columns() -> None:
+    assert len(create_columns()) == len(COLUMNAR_COLUMNS)
+
+
+def test_encode_columnar_metrics() -> None:
+    columns = create_columns()
+    for index, column in enumerate(columns):
+        column.extend((index, index + 0.5))
+
+    data = encode_columnar_metrics({7: columns})
+
+    assert COLUMNAR_HEADER.unpack_from(data) == (COLUMNAR_MAGIC, COLUMNAR_VERSION, len(COLUMNAR_COLUMNS), 1)
+    assert COLUMNAR_DRONE_HEADER.unpack_from(data, COLUMNAR_HEADER.size) == (7, 2)
+    columns_start = COLUMNAR_HEADER.size + COLUMNAR_DRONE_HEADER.size
+    values = array("f", data[columns_start:])
+    assert list(values[2:4]) == [1, 1.5]
+    assert len(values) == 2 * len(COLUMNAR_COLUMNS)
+
+
+def test_encode_columnar_metrics_without_drones() -> None:
+    assert encode_columnar_metrics({}) == COLUMNAR_HEADER.pack(
+        COLUMNAR_MAGIC, COLUMNAR_VERSION, len(COLUMNAR_COLUMNS), 0
+    )
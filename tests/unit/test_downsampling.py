@@ -0,0 +1,33 @@
+import numpy as np
+
+from backend.downsampling import largest_triangle_three_buckets
+
+
+def test_lttb_keeps_every_point_when_there_are_few() -> None:
+    points = np.zeros((4, 2))
+
+    assert list(largest_triangle_three_buckets(points, 10)) == [0, 1, 2, 3]
+
+
+def test_lttb_keeps_the_first_and_last_points() -> None:
+    points = np.column_stack((np.arange(100.0), np.zeros(100)))
+
+    selected = largest_triangle_three_buckets(points, 10)
+
+    assert len(selected) == 10
+    assert selected[0] == 0
+    assert selected[-1] == 99
+    assert all(np.diff(selected) > 0)
+
+
+def test_lttb_keeps_the_corners_of_the_path() -> None:
+    points = np.column_stack((np.arange(21.0), np.zeros(21)))
+    points[10, 1] = 50
+
+    assert 10 in largest_triangle_three_buckets(points, 5)
+
+
+def test_lttb_with_two_points() -> None:
+    points = np.zeros((10, 2))
+
+    assert list(largest_triangle_three_buckets(points, 2)) == [0, 9]
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.communication.drone_link import DroneLink
+from backend.drone_state_publisher import DroneStatePublisher
+from backend.models.drone import DroneVec3
+from backend.registered_drone import RegisteredDrone
+
+# All test coroutines will be treated as marked
+pytestmark = pytest.mark.asyncio
+
+
+def create_subscribed_publisher() -> DroneStatePublisher:
+    publisher = DroneStatePublisher(interval=0)
+    publisher.subscriber_count = 1
+    return publisher
+
+
+def test_publish_sends_the_changed_fields() -> None:
+    publisher = create_subscribed_publisher()
+    drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+    publisher.mark_changed(1)
+    publisher.publish({1: drone})
+
+    drone.position = DroneVec3(x=1.0, y=2.0, z=3.0)
+    publisher.mark_changed(1)
+    publisher.publish({1: drone})
+
+    assert publisher.version == 2
+    assert json.loads(publisher.delta) == {
+        "version": 2,
+        "snapshot": False,
+        "drones": {"1": {"position": {"x": 1.0, "y": 2.0, "z": 3.0}}},
+        "removed": [],
+    }
+
+
+def test_publish_sends_the_removed_drones() -> None:
+    publisher = create_subscribed_publisher()
+    publisher.mark_changed(1)
+    publisher.publish({1: RegisteredDrone(1, MagicMock(spec=DroneLink))})
+
+    publisher.mark_changed(1)
+    publisher.publish({})
+
+    assert json.loads(publisher.delta)["removed"] == [1]
+    assert publisher.states == {}
+
+
+def test_publish_skips_unchanged_drones() -> None:
+    publisher = create_subscribed_publisher()
+    drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+    publisher.mark_changed(1)
+    publisher.publish({1: drone})
+
+    publisher.mark_changed(1)
+    publisher.publish({1: drone})
+
+    assert publisher.version == 1
+
+
+def test_changes_are_kept_until_there_are_subscribers() -> None:
+    publisher = DroneStatePublisher(interval=0)
+    publisher.mark_changed(1)
+
+    publisher.publish({1: RegisteredDrone(1, MagicMock(spec=DroneLink))})
+
+    assert publisher.version == 0
+    assert publisher.changed_drone_ids == {1}
+
+
+def test_subscribers_that_missed_a_frame_get_a_snapshot() -> None:
+    publisher = create_subscribed_publisher()
+    drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+    publisher.mark_changed(1)
+    publisher.publish({1: drone})
+    drone.position = DroneVec3(x=1.0, y=2.0, z=3.0)
+    publisher.mark_changed(1)
+    publisher.publish({1: drone})
+
+    snapshot = publisher.get_frame(0)
+
+    assert publisher.get_frame(1) == publisher.delta
+    assert publisher.get_frame(None) is snapshot
+    assert json.loads(snapshot)["snapshot"]
+    assert json.loads(snapshot)["drones"]["1"] == json.loads(drone.to_model().json())
+
+
+async def test_wait_for_frame_waits_for_a_new_version() -> None:
+    publisher = create_subscribed_publisher()
+    waiter = asyncio.create_task(publisher.wait_for_frame(0))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    publisher.mark_changed(1)
+    publisher.publish({1: RegisteredDrone(1, MagicMock(spec=DroneLink))})
+
+    assert await waiter == (publisher.delta, 1)
+
+
+def test_subscribe_counts_the_subscribers() -> None:
+    publisher = DroneStatePublisher(interval=0)
+
+    with publisher.subscribe():
+        assert publisher.subscriber_count == 1
+
+    assert publisher.subscriber_count == 0
@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.communication.argos_drone_link import ArgosDroneLink
+from backend.communication.drone_link import DroneLink
+from backend.fleet_state_table import FleetStateTable
+from backend.models.drone import DroneBattery, DroneOrientation, DroneRange, DroneState, DroneType, DroneVec3
+from backend.registered_drone import RegisteredDrone
+
+
+def create_drone(drone_id: int, x: float, state: DroneState = DroneState.EXPLORING) -> RegisteredDrone:
+    return RegisteredDrone(
+        drone_id,
+        MagicMock(spec=ArgosDroneLink if drone_id % 2 else DroneLink),
+        state,
+        DroneBattery(charge_percentage=50),
+        DroneVec3(x=x, y=0.0, z=1.0),
+        DroneOrientation(yaw=90.0),
+        DroneRange(front=1, back=2, up=3, left=4, right=5, bottom=6),
+        total_distance=x,
+    )
+
+
+def test_aggregates_by_type() -> None:
+    table = FleetStateTable.from_drones(
+        [create_drone(1, 1.0), create_drone(2, 2.0, DroneState.CRASHED), create_drone(3, 3.0, DroneState.READY)]
+    )
+
+    assert table.count_drones(None) == 3
+    assert table.count_drones(DroneType.ARGOS) == 2
+    assert table.count_flying_drones(None) == 1
+    assert table.get_total_distance(DroneType.ARGOS) == 4.0
+    assert table.get_bounding_box(None) == ([1.0, 0.0, 1.0], [3.0, 0.0, 1.0])
+    assert table.get_bounding_box(DroneType.CRAZYFLIE) == ([2.0, 0.0, 1.0], [2.0, 0.0, 1.0])
+
+
+def test_removed_rows_are_reused_and_full_tables_grow() -> None:
+    table = FleetStateTable(capacity=1)
+    table.add(create_drone(1, 1.0))
+    table.add(create_drone(2, 2.0))
+
+    table.remove(1)
+    table.add(create_drone(3, 3.0))
+
+    assert table.capacity == 2
+    assert table.slots == {2: 1, 3: 0}
+    assert table.get_total_distance(None) == 5.0
+
+
+def test_update_copies_the_live_state() -> None:
+    drone = create_drone(1, 1.0)
+    table = FleetStateTable.from_drones([drone])
+
+    drone.position = DroneVec3(x=4.0, y=5.0, z=6.0)
+    drone.state = DroneState.CRASHED
+    table.update(drone)
+    table.update(create_drone(2, 2.0))
+
+    assert table.get_bounding_box(None) == ([4.0, 5.0, 6.0], [4.0, 5.0, 6.0])
+    assert table.count_flying_drones(None) == 0
+    assert table.count_drones(None) == 1
+
+
+def test_get_close_pairs() -> None:
+    table = FleetStateTable.from_drones([create_drone(1, 0.0), create_drone(2, 0.3), create_drone(3, 2.0)])
+
+    assert table.get_close_pairs(0.5, None) == [(1, 2)]
+    assert table.get_close_pairs(0.5, DroneType.ARGOS) == []
+
+
+def test_get_bounding_box_without_drones() -> None:
+    assert FleetStateTable().get_bounding_box(None) is None
+
+
+@pytest.mark.parametrize("drone_type", [None, DroneType.ARGOS])
+def test_to_drone_dicts_matches_the_models(drone_type: DroneType) -> None:
+    drones = [create_drone(1, 1.5), create_drone(2, 2.5)]
+    table = FleetStateTable.from_drones(drones)
+
+    assert table.to_drone_dicts(drone_type) == [
+        drone.to_model().dict() for drone in drones if drone_type in (None, drone.drone_type)
+    ]
@@ -0,0 +1,54 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
+from backend.database.models import SavedLog
+from backend.log_publisher import LogPublisher, create_log_stream_chunk
+from backend.models.mission import Log
+
+
+def generate_saved_log(log_id: int, mission_id: int) -> SavedLog:
+    return SavedLog(id=log_id, mission_id=mission_id, timestamp=datetime.datetime(2021, 1, 1), message=str(log_id))
+
+
+def test_create_log_stream_chunk() -> None:
+    log = Log(id=3, mission_id=1, timestamp=datetime.datetime(2021, 1, 1), message="message")
+
+    chunk = create_log_stream_chunk([log])
+
+    assert (chunk.first_id, chunk.last_id) == (3, 3)
+    assert chunk.text == f"id: 3\nevent: log\ndata: {log.json()}\n\n"
+    assert chunk.events == [(3, chunk.text)]
+
+
+def test_publish_shares_one_chunk_between_the_subscribers_of_a_mission() -> None:
+    publisher = LogPublisher()
+    with publisher.subscribe(1) as first, publisher.subscribe(1) as second, publisher.subscribe(2) as other:
+        publisher.publish([generate_saved_log(1, 1), generate_saved_log(2, 3), generate_saved_log(3, 1)])
+
+        chunk = first.queue.get_nowait()
+        assert second.queue.get_nowait() is chunk
+        assert (chunk.first_id, chunk.last_id) == (1, 3)
+        assert other.queue.empty()
+
+    assert publisher.subscribers == {}
+
+
+def test_subscribers_that_fall_behind_are_lagging() -> None:
+    publisher = LogPublisher()
+    with publisher.subscribe(1) as subscriber:
+        for log_id in range(subscriber.queue.maxsize + 1):
+            publisher.publish([generate_saved_log(log_id, 1)])
+
+        assert subscriber.lagging
+
+        subscriber.reset()
+
+        assert not subscriber.lagging
+        assert subscriber.queue.empty()
+
+
+@patch.object(SavedLog, "to_model")
+def test_publish_without_subscribers_does_not_format_the_logs(to_model_mock: MagicMock) -> None:
+    LogPublisher().publish([generate_saved_log(1, 1)])
+
+    to_model_mock.assert_not_called()
@@ -0,0 +1,24 @@
+from backend.lru_cache import LruCache
+
+
+def test_put_evicts_the_least_recently_used_entry() -> None:
+    cache: LruCache[str, int] = LruCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_invalidate() -> None:
+    cache: LruCache[str, int] = LruCache(2)
+    cache.put("a", 1)
+
+    cache.invalidate("a")
+    cache.invalidate("b")
+
+    assert cache.get("a") is None
@@ -0,0 +1,111 @@
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from backend.communication.log_message import RangeLogMessage
+from backend.occupancy_grid import LOG_ODDS_OCCUPIED, PNG_SIGNATURE, OccupancyGrid, encode_grayscale_png
+
+
+def generate_range_log_message(front: int, left: int, back: int, right: int) -> RangeLogMessage:
+    return RangeLogMessage(
+        drone_id=1,
+        timestamp=2,
+        range_front=front,
+        range_back=back,
+        range_up=0,
+        range_zrange=0,
+        range_left=left,
+        range_right=right,
+    )
+
+
+def test_update_marks_the_free_and_occupied_cells() -> None:
+    occupancy_grid = OccupancyGrid(size=100, resolution=0.1, batch_size=1)
+
+    occupancy_grid.update(0, 0, 0, generate_range_log_message(1000, 9000, 9000, 9000))
+
+    center = occupancy_grid.size // 2
+    assert occupancy_grid.log_odds[center, center + 10] > 0
+    assert occupancy_grid.log_odds[center, center + 5] < 0
+    assert occupancy_grid.log_odds[center + 20, center] < 0
+    assert occupancy_grid.update_count == 1
+
+
+def test_update_follows_the_yaw() -> None:
+    occupancy_grid = OccupancyGrid(size=100, resolution=0.1, batch_size=1)
+
+    occupancy_grid.update(0, 0, 90, generate_range_log_message(1000, 9000, 9000, 9000))
+
+    center = occupancy_grid.size // 2
+    assert occupancy_grid.log_odds[center + 10, center] > 0
+
+
+def test_update_ignores_the_rays_leaving_the_grid() -> None:
+    occupancy_grid = OccupancyGrid(size=10, resolution=0.1, batch_size=1)
+
+    occupancy_grid.update(0, 0, 0, generate_range_log_message(3000, 3000, 3000, 3000))
+
+    assert np.all(occupancy_grid.log_odds <= 0)
+
+
+def test_to_pixels_of_an_unknown_grid_is_gray() -> None:
+    assert np.all(OccupancyGrid(size=4).to_pixels() == 127)
+
+
+def test_encode_grayscale_png() -> None:
+    pixels = np.arange(6, dtype=np.uint8).reshape(2, 3)
+
+    png = encode_grayscale_png(pixels)
+
+    assert png.startswith(PNG_SIGNATURE)
+    header_length, header_type = struct.unpack_from(">I4s", png, len(PNG_SIGNATURE))
+    assert header_type == b"IHDR"
+    assert struct.unpack_from(">II", png, len(PNG_SIGNATURE) + 8) == (3, 2)
+    data_start = len(PNG_SIGNATURE) + 12 + header_length
+    data_length, data_type = struct.unpack_from(">I4s", png, data_start)
+    data_end = data_start + 8 + data_length
+    compressed_start = data_start + 8
+    assert data_type == b"IDAT"
+    assert zlib.decompress(png[compressed_start:data_end]) == b"\x00\x00\x01\x02\x00\x03\x04\x05"
+
+
+def test_samples_are_applied_in_batches() -> None:
+    occupancy_grid = OccupancyGrid(size=100, resolution=0.1, batch_size=2)
+    log_message = generate_range_log_message(1000, 1000, 1000, 1000)
+
+    occupancy_grid.update(0, 0, 0, log_message)
+    assert occupancy_grid.update_count == 0
+
+    occupancy_grid.update(0, 0, 0, log_message)
+    assert occupancy_grid.update_count == 2
+    assert occupancy_grid.log_odds[50, 60] == pytest.approx(2 * LOG_ODDS_OCCUPIED)
+
+
+def test_to_pixels_applies_the_pending_samples() -> None:
+    occupancy_grid = OccupancyGrid(size=100, resolution=0.1)
+    occupancy_grid.update(0, 0, 0, generate_range_log_message(1000, 1000, 1000, 1000))
+
+    pixels = occupancy_grid.to_pixels()
+
+    assert pixels[49, 60] < 127
+    assert not occupancy_grid.pending_samples
+
+
+def test_update_increments_the_version_of_the_touched_tiles() -> None:
+    occupancy_grid = OccupancyGrid(size=100, resolution=0.1, batch_size=1, tile_size=50)
+
+    occupancy_grid.update(0, 0, 0, generate_range_log_message(1000, 0, 0, 0))
+
+    # The ray goes east from the center, the north-east tile is the first row
+    assert occupancy_grid.tile_versions.tolist() == [[0, 1], [0, 0]]
+
+
+def test_tiles_on_the_borders_are_smaller() -> None:
+    occupancy_grid = OccupancyGrid(size=5, tile_size=2)
+
+    tile = occupancy_grid.tile_to_png(2, 0)
+
+    assert occupancy_grid.tiles_per_side == 3
+    assert struct.unpack(">II", tile[16:24]) == (2, 1)
@@ -1,8 +1,9 @@
 from unittest.mock import MagicMock
 
 from backend.communication.drone_link import DroneLink
+from backend.communication.drone_mailbox import DroneMailbox
 from backend.communication.log_message import BatteryAndPositionLogMessage, FullLogMessage, RangeLogMessage
-from backend.models.drone import DroneBattery, DroneRange, DroneVec3
+from backend.models.drone import Drone, DroneBattery, DroneRange, DroneVec3
 from backend.registered_drone import RegisteredDrone
 
 
@@ -81,3 +82,98 @@ def test_update_from_full_message() -> None:
         right=log_message.range_right,
         bottom=log_message.range_zrange,
     )
+
+
+def test_apply_mailbox_sets_the_newest_state_and_the_whole_distance() -> None:
+    mailbox = DroneMailbox()
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink), mailbox=mailbox)
+    for x in (3, 6):
+        mailbox.post(
+            BatteryAndPositionLogMessage(
+                drone_id=1,
+                timestamp=2,
+                kalman_state_x=x,
+                kalman_state_y=0,
+                kalman_state_z=0,
+                state_estimate_yaw=40,
+                drone_state=0,
+                drone_battery_level=90,
+            )
+        )
+
+    registered_drone.apply_mailbox()
+
+    model = registered_drone.to_model()
+    assert model.position == DroneVec3(x=6, y=0, z=0)
+    assert model.total_distance == 6
+    assert mailbox.position_message is None
+
+
+def test_to_model_leaves_the_mailbox_pending() -> None:
+    mailbox = DroneMailbox()
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink), mailbox=mailbox)
+    mailbox.post(
+        BatteryAndPositionLogMessage(
+            drone_id=1,
+            timestamp=2,
+            kalman_state_x=3,
+            kalman_state_y=0,
+            kalman_state_z=0,
+            state_estimate_yaw=40,
+            drone_state=0,
+            drone_battery_level=90,
+        )
+    )
+
+    assert registered_drone.to_model().total_distance == 0
+    assert not registered_drone.is_flying
+    assert mailbox.has_pending
+
+
+def test_should_log_telemetry_samples_every_nth_message() -> None:
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink), telemetry_log_sampling=3)
+
+    assert [registered_drone.should_log_telemetry() for _ in range(6)] == [True, False, False, True, False, False]
+
+
+def test_should_log_telemetry_is_disabled_by_a_sampling_of_zero() -> None:
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink), telemetry_log_sampling=0)
+
+    assert not registered_drone.should_log_telemetry()
+
+
+def test_live_state_is_kept_in_slots() -> None:
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink), position=DroneVec3(x=1, y=2, z=3))
+
+    assert not hasattr(registered_drone, "__dict__")
+    assert (registered_drone.x, registered_drone.y, registered_drone.z) == (1, 2, 3)
+    assert registered_drone.to_model().position == DroneVec3(x=1, y=2, z=3)
+
+
+def test_model_has_the_types_validation_would_give() -> None:
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+    registered_drone.update_from_log_message(
+        FullLogMessage(
+            drone_id=1,
+            timestamp=2,
+            kalman_state_x=1,
+            kalman_state_y=2,
+            kalman_state_z=3,
+            state_estimate_yaw=40,
+            drone_state=0,
+            drone_battery_level=87.6,  # type: ignore[arg-type]
+            range_front=12.7,  # type: ignore[arg-type]
+            range_back=111,
+            range_up=112,
+            range_zrange=113,
+            range_left=114,
+            range_right=116,
+        )
+    )
+
+    model = registered_drone.to_model()
+
+    assert model.json() == Drone(**model.dict()).json()
+    assert '"battery": {"charge_percentage": 87}' in model.json()
+    assert '"x": 1.0' in model.json()
+    assert '"front": 12,' in model.json()
@@ -1,11 +1,19 @@
+import json
 from typing import Generator
 from unittest.mock import MagicMock
 
 import pytest
+from coveo_settings.mock import mock_config_value
 
+from backend.bounded_queue import QueuePolicy
+from backend.communication.argos_drone_link import ArgosDroneLink
 from backend.communication.drone_link import DroneLink
+from backend.communication.drone_mailbox import DroneMailbox
+from backend.communication.log_message import BatteryAndPositionLogMessage, FullLogMessage
+from backend.fleet_state_table import FLEET_TABLE_ENABLED
+from backend.models.drone import DroneState, DroneType
 from backend.registered_drone import RegisteredDrone
-from backend.registry import get_registry
+from backend.registry import INBOUND_LOG_SHARD_COUNT, QUEUE_CONFIGURATIONS, Registry, get_registry
 from backend.tasks.backend_task import BackendTask
 
 # All test coroutines will be treated as marked
@@ -26,11 +34,42 @@ async def test_queues_are_initialized_and_retrieved() -> None:
     registry = get_registry()
 
     with pytest.raises(AssertionError):
-        _ = registry.inbound_log_queue
+        _ = registry.inbound_log_queues
 
     await registry.initialize_queues()
 
-    _ = registry.inbound_log_queue
+    _ = registry.inbound_log_queues
+
+
+async def test_inbound_log_queues_are_partitioned_by_drone() -> None:
+    registry = get_registry()
+    with mock_config_value(INBOUND_LOG_SHARD_COUNT, 3):
+        await registry.initialize_queues()
+
+    assert len(registry.inbound_log_queues) == 3
+    assert registry.get_inbound_log_queue(4) is registry.get_inbound_log_queue(4)
+    assert registry.get_inbound_log_queue(4) is registry.get_inbound_log_queue(7)
+    assert registry.get_inbound_log_queue(4) is not registry.get_inbound_log_queue(5)
+
+    registry.get_inbound_log_queue(5).put_nowait(MagicMock())
+    assert [statistics.queue_depth for statistics in registry.get_inbound_shard_statistics()] == [0, 0, 1]
+
+
+async def test_queues_are_bounded_from_settings() -> None:
+    registry = get_registry()
+    configuration = QUEUE_CONFIGURATIONS["logging"]
+    with mock_config_value(configuration.maxsize, 1), mock_config_value(
+        configuration.policy, QueuePolicy.DROP_NEWEST.value
+    ), mock_config_value(INBOUND_LOG_SHARD_COUNT, 2):
+        await registry.initialize_queues()
+
+    registry.logging_queue.offer(MagicMock())
+    registry.logging_queue.offer(MagicMock())
+
+    statistics = registry.get_queue_statistics()
+    assert set(statistics) == {"logging", "crazyflie_debug", "mission_termination", "inbound_log_0", "inbound_log_1"}
+    assert statistics["logging"].dropped == 1
+    assert statistics["logging"].policy == QueuePolicy.DROP_NEWEST.value
 
 
 def test_drones_are_registered_and_unregistered() -> None:
@@ -61,3 +100,203 @@ def test_tasks_are_registered_and_unregistered() -> None:
     registry.unregister_task(task)
 
     assert not registry.backend_tasks
+
+
+def test_occupancy_grids_are_created_per_mission() -> None:
+    registry = get_registry()
+
+    occupancy_grid = registry.get_occupancy_grid(1)
+
+    assert registry.get_occupancy_grid(1) is occupancy_grid
+    assert registry.get_occupancy_grid(2) is not occupancy_grid
+
+
+def test_occupancy_grid_is_dropped_when_the_mission_ends() -> None:
+    registry = get_registry()
+    registry.set_active_mission_id(1, DroneType.ARGOS)
+    registry.get_occupancy_grid(1)
+    registry.get_occupancy_grid(2)
+
+    registry.clear_active_mission_id(DroneType.ARGOS)
+
+    assert list(registry.occupancy_grids) == [2]
+
+
+def test_drones_json_is_serialized_once_per_version() -> None:
+    registry = get_registry()
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+    registry.register_drone(registered_drone)
+
+    body = registry.get_drones_json(None)
+
+    assert json.loads(body) == [json.loads(registered_drone.to_model().json())]
+    assert registry.get_drones_json(None) is body
+    assert json.loads(registry.get_drones_json(DroneType.ARGOS)) == []
+
+
+def test_drones_json_follows_the_changes() -> None:
+    registry = get_registry()
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink))
+    registry.register_drone(registered_drone)
+    body = registry.get_drones_json(None)
+
+    registered_drone.total_distance = 2.0
+    registry.mark_drone_changed(1)
+
+    assert registry.get_drones_json(None) != body
+    assert json.loads(registry.get_drones_json(None))[0]["total_distance"] == 2.0
+    assert registry.drone_state_publisher.changed_drone_ids == {1}
+
+
+def test_drones_json_applies_the_pending_mailboxes() -> None:
+    registry = get_registry()
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink), mailbox=DroneMailbox())
+    registry.register_drone(registered_drone)
+    body = registry.get_drones_json(None)
+
+    # The consumer of the shard has not processed the message yet
+    registered_drone.mailbox.post(  # type: ignore[union-attr]
+        BatteryAndPositionLogMessage(
+            drone_id=1,
+            timestamp=0,
+            kalman_state_x=3,
+            kalman_state_y=4,
+            kalman_state_z=0,
+            state_estimate_yaw=0,
+            drone_state=0,
+            drone_battery_level=50,
+        )
+    )
+
+    assert registry.get_drones_json(None) != body
+    assert json.loads(registry.get_drones_json(None))[0]["total_distance"] == 5.0
+    assert registry.get_drones_json(None) is registry.get_drones_json(None)
+
+
+def test_drones_json_follows_the_mailbox_after_a_model_is_read() -> None:
+    registry = get_registry()
+    registered_drone = RegisteredDrone(1, MagicMock(spec=DroneLink), mailbox=DroneMailbox())
+    registry.register_drone(registered_drone)
+    registry.get_drones_json(None)
+    registered_drone.mailbox.post(  # type: ignore[union-attr]
+        BatteryAndPositionLogMessage(
+            drone_id=1,
+            timestamp=0,
+            kalman_state_x=3,
+            kalman_state_y=4,
+            kalman_state_z=0,
+            state_estimate_yaw=0,
+            drone_state=0,
+            drone_battery_level=50,
+        )
+    )
+
+    registered_drone.to_model()
+
+    assert json.loads(registry.get_drones_json(None))[0]["total_distance"] == 5.0
+    assert registry.drone_state_publisher.changed_drone_ids == {1}
+
+
+def test_drones_are_indexed_by_type() -> None:
+    registry = get_registry()
+    argos_drone = RegisteredDrone(1, MagicMock(spec=ArgosDroneLink))
+    crazyflie_drone = RegisteredDrone(2, MagicMock(spec=DroneLink))
+    registry.register_drone(argos_drone)
+    registry.register_drone(crazyflie_drone)
+
+    assert list(registry.get_drones(DroneType.ARGOS)) == [argos_drone]
+    assert list(registry.crazyflie_drones) == [crazyflie_drone]
+    assert registry.count_drones(DroneType.CRAZYFLIE) == 1
+
+    registry.register_drone(RegisteredDrone(2, MagicMock(spec=ArgosDroneLink)))
+
+    assert registry.count_drones(DroneType.ARGOS) == 2
+    assert registry.count_drones(DroneType.CRAZYFLIE) == 0
+
+
+def test_drones_given_to_the_registry_are_indexed() -> None:
+    drone = RegisteredDrone(1, MagicMock(spec=ArgosDroneLink))
+
+    assert list(Registry(drones={1: drone}).argos_drones) == [drone]
+
+
+def test_flying_drones_are_tracked_by_type() -> None:
+    registry = get_registry()
+    drone = RegisteredDrone(1, MagicMock(spec=ArgosDroneLink), state=DroneState.EXPLORING)
+    registry.register_drone(drone)
+
+    assert registry.record_flying_state(drone)
+    assert registry.has_flying_drones(DroneType.ARGOS)
+    assert not registry.has_flying_drones(DroneType.CRAZYFLIE)
+
+    drone.state = DroneState.CRASHED
+
+    assert not registry.record_flying_state(drone)
+    assert not registry.has_flying_drones(DroneType.ARGOS)
+
+    drone.state = DroneState.EXPLORING
+    registry.record_flying_state(drone)
+    registry.unregister_drone(drone)
+
+    assert not registry.has_flying_drones(DroneType.ARGOS)
+
+
+def test_fleet_state_table_follows_the_registered_drones() -> None:
+    with mock_config_value(FLEET_TABLE_ENABLED, True):
+        registry = Registry()
+    drone = RegisteredDrone(1, MagicMock(spec=ArgosDroneLink), total_distance=2.0)
+    registry.register_drone(drone)
+
+    drone.total_distance = 3.0
+    registry.mark_drone_changed(1)
+
+    assert registry.get_total_distance(DroneType.ARGOS) == 3.0
+    assert json.loads(registry.get_drones_json(None)) == [json.loads(drone.to_model().json())]
+
+    registry.unregister_drone(drone)
+
+    assert registry.get_fleet_state_table().count_drones(None) == 0
+
+
+@pytest.mark.parametrize("drone_type", [None, DroneType.ARGOS, DroneType.CRAZYFLIE])
+def test_drones_json_is_the_same_with_and_without_the_fleet_state_table(drone_type: DroneType) -> None:
+    registries = []
+    for enabled in (False, True):
+        with mock_config_value(FLEET_TABLE_ENABLED, enabled):
+            registry = Registry()
+        for drone_id, link in enumerate([ArgosDroneLink, DroneLink, ArgosDroneLink, DroneLink]):
+            registry.register_drone(RegisteredDrone(drone_id, MagicMock(spec=link)))
+        # The new drone reuses the row of the unregistered one, it must still come last
+        registry.unregister_drone(registry.drones[1])
+        registry.register_drone(RegisteredDrone(4, MagicMock(spec=DroneLink)))
+        drone = registry.drones[2]
+        drone.update_from_log_message(
+            FullLogMessage(
+                drone_id=2,
+                timestamp=0,
+                kalman_state_x=1,
+                kalman_state_y=2,
+                kalman_state_z=3,
+                state_estimate_yaw=4,
+                drone_state=2,
+                drone_battery_level=87.6,  # type: ignore[arg-type]
+                range_front=12.7,  # type: ignore[arg-type]
+                range_back=1,
+                range_up=2,
+                range_zrange=3,
+                range_left=4,
+                range_right=5,
+            )
+        )
+        registry.mark_drone_changed(2)
+        registries.append(registry)
+
+    assert registries[0].get_drones_json(drone_type) == registries[1].get_drones_json(drone_type)
+
+
+def test_fleet_queries_without_the_fleet_state_table() -> None:
+    registry = Registry(drones={1: RegisteredDrone(1, MagicMock(spec=ArgosDroneLink), total_distance=2.0)})
+
+    assert registry.fleet_state_table is None
+    assert registry.get_total_distance(DroneType.ARGOS) == 2.0
+    assert registry.get_fleet_state_table().count_drones(DroneType.ARGOS) == 1
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock, patch
+
+from backend.statistics import THROUGHPUT_WINDOW_SECOND, HandoffStatistics, ThroughputStatistics
+
+
+@patch("backend.statistics.time.monotonic")
+def test_rate_is_measured_over_completed_windows(monotonic_mock: MagicMock) -> None:
+    monotonic_mock.return_value = 0.0
+    statistics = ThroughputStatistics(window_start=0.0)
+
+    statistics.record(5)
+    assert statistics.current_rate == 0.0
+
+    monotonic_mock.return_value = THROUGHPUT_WINDOW_SECOND
+    statistics.record(5)
+    assert statistics.processed == 10
+    assert statistics.current_rate == 10 / THROUGHPUT_WINDOW_SECOND
+
+
+@patch("backend.statistics.time.monotonic")
+def test_rate_drops_to_zero_when_idle(monotonic_mock: MagicMock) -> None:
+    monotonic_mock.return_value = 0.0
+    statistics = ThroughputStatistics(window_start=0.0)
+    monotonic_mock.return_value = THROUGHPUT_WINDOW_SECOND
+    statistics.record(10)
+
+    monotonic_mock.return_value = 4 * THROUGHPUT_WINDOW_SECOND
+
+    assert statistics.current_rate == 0.0
+
+
+def test_handoff_statistics_averages() -> None:
+    statistics = HandoffStatistics()
+    assert statistics.average_batch_size == 0.0
+    assert statistics.average_latency == 0.0
+
+    statistics.record_batch(1, 0.5)
+    statistics.record_batch(3, 0.1)
+
+    model = statistics.to_model()
+    assert model.handed_off == 4
+    assert model.average_batch_size == 2
+    assert model.largest_batch_size == 3
+    assert model.max_latency == 0.5